@@ -0,0 +1,161 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+Regression benchmark of task_send_command.
+
+A stream task runs a loop whose iterations are paced by the 0.1 s receive timeout of
+its own connection when it is idle. Before the whole queue was drained , each iteration
+sent a single queued chunk and the output of an idle stream was capped at 10 chunks/s.
+The loop is modelled with both send functions while a producer queues chunks at a
+fixed rate , the benchmark fails if the current one doesn't keep up with the producer.
+
+Usage , from the root of the repository :
+    python dev/benchmark_send_command.py [--rate 1000] [--size 64] [--duration 2]
+"""
+
+import argparse
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.StreamConfig.Stream import task_send_command   # pylint: disable=wrong-import-position
+
+# Receive timeout of the stream tasks
+RECV_TIMEOUT = 0.1
+
+def legacy_send_command(linked_data : queue.Queue , stream : socket.socket , udp_send_address = None) -> int :
+    """
+    task_send_command before the queue was drained : a single queued chunk per call
+    """
+    outgoing_data = linked_data.get()
+    if isinstance(outgoing_data, str):
+        outgoing_data = outgoing_data.encode(encoding='ISO-8859-1')
+    if udp_send_address is None :
+        stream.sendall(outgoing_data)
+    else :
+        stream.sendto(outgoing_data, udp_send_address)
+    return len(outgoing_data)
+
+def _produce(linked_data : queue.Queue , rate : int , size : int , duration : float , produced : list):
+    payload = bytes(size)
+    start = time.monotonic()
+    while time.monotonic() - start < duration :
+        # Catch up with the rate after each sleep
+        expected = int((time.monotonic() - start) * rate)
+        while produced[0] < expected :
+            linked_data.put(payload)
+            produced[0] += 1
+        time.sleep(0.001)
+
+def _receive(sock : socket.socket , stop : threading.Event , received : list):
+    sock.settimeout(0.2)
+    while not stop.is_set():
+        try :
+            data = sock.recv(65536)
+        except (socket.timeout, OSError):
+            continue
+        if not data :
+            break
+        received[0] += len(data)
+
+def run(send , udp : bool , rate : int , size : int , duration : float) -> tuple[int, int, int]:
+    """
+    Run the loop of an idle stream with the send function while the producer queues chunks
+
+    Returns:
+        tuple[int, int, int]: number of produced chunks , number of sent chunks and number of received bytes
+    """
+    if udp :
+        receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        receiver.bind(("127.0.0.1", 0))
+        sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        address = receiver.getsockname()
+    else :
+        sender , receiver = socket.socketpair()
+        address = None
+    # The connection of the stream , nothing is ever received on it
+    idle , idle_peer = socket.socketpair()
+    idle.settimeout(RECV_TIMEOUT)
+    linked_data = queue.Queue()
+    produced = [0]
+    received = [0]
+    stop = threading.Event()
+    producer = threading.Thread(target = _produce, args = (linked_data, rate, size, duration, produced), daemon = True)
+    reader = threading.Thread(target = _receive, args = (receiver, stop, received), daemon = True)
+    reader.start()
+    producer.start()
+    while producer.is_alive() :
+        try :
+            idle.recv(4096)
+        except socket.timeout :
+            pass
+        if not linked_data.empty():
+            send(linked_data, sender, udp_send_address = address)
+    sent = produced[0] - linked_data.qsize()
+    time.sleep(0.3)
+    stop.set()
+    reader.join()
+    for sock in (sender, receiver, idle, idle_peer):
+        sock.close()
+    return produced[0] , sent , received[0]
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "task_send_command regression benchmark")
+    parser.add_argument("--rate", type = int, default = 1000, help = "chunks queued per second")
+    parser.add_argument("--size", type = int, default = 64, help = "size of a chunk in bytes")
+    parser.add_argument("--duration", type = float, default = 2.0, help = "duration of a run in seconds")
+    args = parser.parse_args()
+    print(f"{args.rate} chunks/s of {args.size} bytes queued during {args.duration} s , "
+          f"loop paced by a {RECV_TIMEOUT} s receive timeout")
+    failed = False
+    for transport , udp in (("TCP", False), ("UDP", True)):
+        results = {}
+        for name , send in (("before", legacy_send_command), ("after", task_send_command)):
+            produced , sent , received = run(send, udp, args.rate, args.size, args.duration)
+            results[name] = sent
+            print(f"{transport:4} {name:7} {sent / args.duration:10.0f} chunks/s  "
+                  f"{sent} / {produced} chunks sent  {received} bytes received")
+            if received != sent * args.size :
+                print(f"FAILED : {transport} {name} : {sent * args.size} bytes sent , {received} received")
+                failed = True
+        # The producer is at most one loop iteration ahead of the drained queue
+        if results["after"] < (args.duration - 2 * RECV_TIMEOUT) * args.rate :
+            print(f"FAILED : {transport} : the queue isn't drained at the producer rate")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -33,6 +33,7 @@ import os
 import argparse
 from src.constants import  DATAPATH , CONFIGPATH , LOGFILESPATH , DEFAULTCONFIGFILE , MAXFILENUMBER
 from src.StreamConfig.App import App , ConfigurationType
+from src.StreamConfig.Preferences import EngineType
 try :
     from PySide6.QtWidgets import QApplication
     from src.UserInterfaces.GraphicalUserInterface import GraphicalUserInterface 
@@ -77,6 +78,7 @@ class DatalinkApp:
         self.app : App = None
         self.user_interface = None
         self.show_data_port = None
+        engine_type = None if self.config_args.Engine is None else EngineType[self.config_args.Engine]
         if self.config_args.Mode == "CMD" :
             if self.config_args.Streams is None :
                 print("Error : you need to specify the streams to configure\n")
@@ -89,7 +91,7 @@ class DatalinkApp:
                         print(f"Error : streams stream_id \"{self.config_args.ShowData}\" is not correct , please enter a valid ID !")
                         raise exc
 
-                self.app = App(max_stream=len(self.config_args.Streams),stream_settings_list=self.config_args.Streams , configuration_type= ConfigurationType.CMDLINE)
+                self.app = App(max_stream=len(self.config_args.Streams),stream_settings_list=self.config_args.Streams , configuration_type= ConfigurationType.CMDLINE , engine_type=engine_type)
                 if self.config_args.ShowData is not None :
                     if show <= len(self.app.stream_list):
                         self.show_data_port=self.app.stream_list[show - 1]
@@ -97,11 +99,11 @@ class DatalinkApp:
 
         else :
             if os.path.exists(self.config_args.ConfigPath):
-                self.app = App(configuration_type= ConfigurationType.FILE,config_file=self.config_args.ConfigPath, debug_logging=True)
+                self.app = App(configuration_type= ConfigurationType.FILE,config_file=self.config_args.ConfigPath, debug_logging=True , engine_type=engine_type)
             elif os.path.exists(DEFAULTCONFIGFILE) :
-                self.app = App(configuration_type= ConfigurationType.FILE , config_file=DEFAULTCONFIGFILE , debug_logging=True)
+                self.app = App(configuration_type= ConfigurationType.FILE , config_file=DEFAULTCONFIGFILE , debug_logging=True , engine_type=engine_type)
             else :
-                self.app = App(debug_logging=True)
+                self.app = App(debug_logging=True , engine_type=engine_type)
 
     def start(self) -> None :
         if self.config_args.Mode == "TUI":
@@ -152,6 +154,8 @@ if __name__ == "__main__":
                         help="List of streams to configure , the size of this list is configure by --nbPorts\n ,this parameter is only used when in CMD mode \n ")
     parser.add_argument('--ShowData', "-d" ,nargs="?", action="store",
                         help="Lisf of streams stream_id, will print every input and output data from the streams\n ,this parameter is only used when in CMD mode ")
+    parser.add_argument('--Engine', '-e', choices=[engine.name for engine in EngineType], default=None,
+                        help="I/O engine used by the streams : one thread per stream (THREAD) , a single selector loop (SELECTOR) or a single asyncio loop (ASYNCIO) for every stream (DEFAULT : value saved in the config file , THREAD otherwise)")
 
     DatalinkApp(config_args=parser.parse_args()).start()
 
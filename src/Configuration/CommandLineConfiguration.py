@@ -28,8 +28,10 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 from src.StreamSettings import TcpSettings , UdpSettings
+from src.StreamSettings.FileSettings import FileSettings
+from src.StreamSettings.CasterSettings import CasterSettings
 from src.StreamSettings.SerialSettings import SerialSettings ,  BaudRate, ByteSize, Parity, StopBits
-from ..NTRIP import NtripClient, NtripSettings
+from ..NTRIP import NtripClient, NtripSettings, NtripServer
 from ..StreamConfig.Stream import StreamType , Stream
 
 class CommandLineConfigurationException(Exception):
@@ -85,8 +87,18 @@ def command_line_config(stream : Stream, command_line : str):
             config_udp_stream(stream ,command_config=config)
         elif stream_type.lower() == "udpspe":
             config_udp_stream(stream ,specific_host=True, command_config= config)
+        elif stream_type.lower() == "udpmc":
+            config_udp_stream(stream ,specific_host=True, command_config= config , mode=UdpSettings.UdpMode.MULTICAST)
+        elif stream_type.lower() == "udpbc":
+            config_udp_stream(stream ,command_config= config , mode=UdpSettings.UdpMode.BROADCAST)
         elif stream_type.lower() == "ntrip":
             config_ntrip_stream(stream ,config)
+        elif stream_type.lower() == "file":
+            config_file_stream(stream ,config)
+        elif stream_type.lower() == "caster":
+            config_caster_stream(stream ,config)
+        elif stream_type.lower() == "ntripsrv":
+            config_ntrip_server_stream(stream ,config)
         else :
             raise IncorrectStreamException("Stream type not found or incorrect")
     except Exception as e  :
@@ -105,6 +117,30 @@ def command_line_config(stream : Stream, command_line : str):
     except Exception as e:
         raise BeginStreamException(e) from e
 
+def get_credentials_auth(username : str , password : str , password_only : bool = False) -> bool:
+    """
+    Check the credentials of a configuration line , the authentification is used when both are given
+    and a line giving only one of them is rejected
+
+    Args:
+        username (str): username of the line
+        password (str): password of the line
+        password_only (bool, optional): accept a password without username (NTRIP 1.0 upload). Defaults to False.
+
+    Raises:
+        MissingParameterException: only one of the credentials is given
+
+    Returns:
+        bool: True if the authentification is used
+    """
+    if len(username) > 0 and len(password) > 0 :
+        return True
+    if len(username) == 0 and len(password) == 0 :
+        return False
+    if password_only and len(password) > 0 :
+        return True
+    raise MissingParameterException("The username and the password have to be given together !")
+
 def config_ntrip_stream(stream : Stream ,command_config : str ):
     """
     Init a NTRIP Client with a configuration line
@@ -134,12 +170,110 @@ def config_ntrip_stream(stream : Stream ,command_config : str ):
     except Exception as e :
         raise InccorectParameterException(f"Parameters for a NTRIP Client stream are incorrect : \n{e}") from e
 
-def config_udp_stream(stream : Stream,specific_host : bool = False, command_config : str = None):
+def config_ntrip_server_stream(stream : Stream ,command_config : str ):
+    """
+    Init a NTRIP server uploading to a caster mountpoint with a configuration line :
+    [user]:[pwd]@[host]:[port]/[mountpoint]:[version] , the version is optional (2 by default).
+    The user and the password are given together , except for a NTRIP 1.0 caster which only checks the password
+
+    Raises:
+        Exception: Given parameter incorrect
+    """
+    credentials = command_config.split("@")[0].split(":")
+    if len(credentials) != 2 :
+        raise MissingParameterException("Missing a credential paremeter !")
+
+    host = command_config.split("@")[1].split(":", 1)
+    if len(host) != 2:
+        raise MissingParameterException("Missing a host paremeter !")
+
+    mountpoint = host[1].split("/")
+    if len(mountpoint) != 2:
+        raise MissingParameterException("Missing a MountPoint paremeter !")
+    mountpoint , _ , version = mountpoint[1].partition(":")
+    auth = get_credentials_auth(credentials[0], credentials[1], password_only = version == "1")
+
+    try :
+        settings = NtripSettings(host = host[0], port = int(host[1].split("/")[0]),
+                                 auth= auth,
+                                 username= credentials[0],password= credentials[1],
+                                 mountpoint=mountpoint)
+        if len(version) != 0 :
+            settings.set_ntrip_version(int(version))
+        stream.ntrip_server = NtripServer(settings)
+        stream.stream_type = StreamType.NTRIP_SERVER
+    except Exception as e :
+        raise InccorectParameterException(f"Parameters for a NTRIP server stream are incorrect : \n{e}") from e
+
+def config_file_stream(stream : Stream ,command_config : str ):
+    """
+    Init a FILE stream replaying a recorded file with a configuration line : [path]:[speed]:[loop]
+
+    Raises:
+        Exception: Given parameter incorrect
+    """
+    file_name = command_config
+    speed = 1.0
+    loop = False
+    # The path can contain ":" , the options are only read from the end of the line
+    options = command_config.rsplit(":", 2)
+    if len(options) > 1 and options[-1].lower() in ("true", "false"):
+        loop = options[-1].lower() == "true"
+        options = options[:-1]
+        file_name = ":".join(options)
+    if len(options) > 1 :
+        try :
+            speed = float(options[-1])
+            file_name = ":".join(options[:-1])
+        except ValueError :
+            pass
+    try:
+        stream.file_settings = FileSettings(speed=speed, loop=loop)
+        stream.file_settings.set_file_name(file_name)
+        stream.file_settings.set_speed(speed)
+        stream.stream_type = StreamType.FILE
+    except Exception as e :
+        raise InccorectParameterException(f"Parameters for a FILE stream are incorrect : \n{e}") from e
+
+def config_caster_stream(stream : Stream ,command_config : str ):
+    """
+    Init an embedded NTRIP caster with a configuration line :
+    [user]:[pwd]@[port]/[mountpoint]:[stream],[mountpoint]:[stream] , the credentials are optional
+    but the user and the password are given together
+
+    Raises:
+        Exception: Given parameter incorrect
+    """
+    username = ""
+    password = ""
+    if "@" in command_config :
+        credentials , command_config = command_config.split("@", 1)
+        credentials = credentials.split(":", 1)
+        if len(credentials) != 2 :
+            raise MissingParameterException("Missing a credential paremeter !")
+        username , password = credentials
+    auth = get_credentials_auth(username, password)
+    port_and_mountpoints = command_config.split("/", 1)
+    if len(port_and_mountpoints) != 2 :
+        raise MissingParameterException("Missing a mountpoint paremeter !")
+    try :
+        settings = CasterSettings(port = int(port_and_mountpoints[0]) ,
+                                  auth = auth ,
+                                  username = username , password = password)
+        settings.set_mountpoints(port_and_mountpoints[1])
+        stream.caster_settings = settings
+        stream.stream_type = StreamType.NTRIP_CASTER
+    except Exception as e :
+        raise InccorectParameterException(f"Parameters for a NTRIP caster stream are incorrect : \n{e}") from e
+
+def config_udp_stream(stream : Stream,specific_host : bool = False, command_config : str = None,
+                      mode : UdpSettings.UdpMode = UdpSettings.UdpMode.UNICAST):
     """
         Init a UDP stream with a configuration line
     Args:
         specific_host (bool, optional): if True the UDP Stream will stream only to a specific host name. Defaults to False.
         command_config (str, optional): Configuration line. Defaults to None.
+        mode (UdpMode, optional): unicast , multicast (the host is the group) or broadcast. Defaults to UdpMode.UNICAST.
 
     Raises:
         Exception: too few or too much parameter
@@ -147,7 +281,7 @@ def config_udp_stream(stream : Stream,specific_host : bool = False, command_conf
         Exception: Given parameter incorrect (Specific host)
     """
     if specific_host :
-        config = command_config.split(":")[0]
+        config = command_config.split(":")
         if len(config) != 2 :
             if len(config) > 2 :
                 raise MissingParameterException("Too much parameters for a UDP Stream") 
@@ -155,13 +289,13 @@ def config_udp_stream(stream : Stream,specific_host : bool = False, command_conf
                 raise MissingParameterException("Not enough parameters for a UDP Stream")
         else :
             try:
-                stream.udp_settings = UdpSettings.UdpSettings(host=config[0],  port=int(config[1]), specific_host=specific_host)
+                stream.udp_settings = UdpSettings.UdpSettings(host=config[0],  port=int(config[1]), specific_host=specific_host , mode=mode)
                 stream.stream_type = StreamType.UDP
             except Exception as e :
                 raise InccorectParameterException(f"Parameters for a UDP stream are incorrect : \n{e}") from e
     else :
         try:
-            stream.udp_settings = UdpSettings.UdpSettings(port=int(command_config))
+            stream.udp_settings = UdpSettings.UdpSettings(port=int(command_config) , mode=mode)
             stream.stream_type = StreamType.UDP
         except Exception as e :
             raise InccorectParameterException(f"Parameter for a UDP stream are incorrect : \n{e}") from e
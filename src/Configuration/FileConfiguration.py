@@ -29,12 +29,20 @@
 
 import base64
 import configparser
-from ..NTRIP import NtripSettings , NtripClient
-from ..StreamSettings.TcpSettings import StreamMode , TcpSettings
-from ..StreamSettings.UdpSettings import DataFlow , UdpSettings
+from ..NTRIP import NtripSettings , NtripClient , NtripServer
+from ..NTRIP.NtripSettings import DEFAULT_GGA_INTERVAL , DEFAULT_KEEPALIVE , NtripSettingsException
+from ..StreamSettings.TcpSettings import StreamMode , TcpSettings , DEFAULT_MAX_CLIENTS , DEFAULT_CLIENT_BUFFER_SIZE , DEFAULT_LISTEN_BACKLOG
+from ..StreamSettings.UdpSettings import DataFlow , UdpMode , UdpSettings
 from ..StreamSettings.SerialSettings import ByteSize, Parity, BaudRate, StopBits , SerialSettings
+from ..StreamSettings.FileSettings import FileSettings
+from ..StreamSettings.CasterSettings import CasterSettings , CasterSettingsException , DEFAULT_CASTER_PORT , DEFAULT_CASTER_MAX_CLIENTS , DEFAULT_CASTER_BUFFER_SIZE
 from ..StreamConfig.Stream import StreamType , Stream
-from ..StreamConfig.Preferences import Preferences
+from ..StreamConfig.Preferences import Preferences , EngineType
+from ..StreamConfig.LinkQueue import OverflowPolicy , DEFAULT_LINK_BUFFER_SIZE
+from ..StreamConfig.StreamLogger import LogRotation , LogCompression , DEFAULT_LOG_BUFFER_SIZE , DEFAULT_LOG_FLUSH_INTERVAL
+from ..StreamConfig.CaptureFile import LogFormat
+from ..StreamConfig.ReconnectSupervisor import ReconnectPolicy
+from ..Framing import FramingType , FrameFilter
 
 
 class FileConfigurationException(Exception):
@@ -71,6 +79,10 @@ def conf_file_preference(preference : Preferences ,conf_file : configparser.Sect
         preference.line_termination  = str(conf_file.get("linetermination")).replace("\\n","\n").replace("\\r","\r")
     except (TypeError, ValueError) :
         pass
+    try :
+        preference.engine_type = EngineType(int(conf_file.get("ioengine")))
+    except (TypeError, ValueError) :
+        pass
     try:
         if len(conf_file.get("configname")) != 0 :
             preference.config_name = str(conf_file.get("configname"))
@@ -91,6 +103,9 @@ def conf_file_config(stream : Stream ,conf_file : configparser.SectionProxy) :
     stream.tcp_settings= conf_file_tcp(conf_file , stream.debug_logging)
     stream.udp_settings = conf_file_udp(conf_file ,  stream.debug_logging )
     stream.ntrip_client = conf_file_ntrip_client(conf_file ,  stream.debug_logging )
+    stream.file_settings = conf_file_file(conf_file , stream.debug_logging)
+    stream.caster_settings = conf_file_caster(conf_file , stream.debug_logging)
+    stream.ntrip_server = conf_file_ntrip_server(conf_file , stream.debug_logging)
     try :
 
         stream.stream_type = StreamType(int(conf_file.get("connectionType")))
@@ -113,6 +128,49 @@ def conf_file_config(stream : Stream ,conf_file : configparser.SectionProxy) :
     stream.logging_file = conf_file.get("logfile")
     if stream.logging_file != "":
         stream.logging = True
+    try :
+        stream.set_log_buffer(int(conf_file.get("logBufferSize")), float(conf_file.get("logFlushInterval")))
+    except (TypeError, ValueError):
+        stream.set_log_buffer(DEFAULT_LOG_BUFFER_SIZE, DEFAULT_LOG_FLUSH_INTERVAL)
+    try :
+        stream.set_log_format(LogFormat(int(conf_file.get("logFormat"))))
+    except (TypeError, ValueError):
+        stream.set_log_format(LogFormat.RAW)
+    try :
+        stream.set_log_rotation(LogRotation(int(conf_file.get("logSegmentSize")),
+                                            str(conf_file.get("logRotateHourly")).lower() == "true",
+                                            LogCompression(int(conf_file.get("logCompression"))),
+                                            int(conf_file.get("logRetentionCount")),
+                                            int(conf_file.get("logRetentionSize"))))
+    except (TypeError, ValueError):
+        stream.set_log_rotation(LogRotation())
+    try :
+        link_buffer_size : int = int(conf_file.get("linkBufferSize"))
+    except (TypeError, ValueError):
+        link_buffer_size = DEFAULT_LINK_BUFFER_SIZE
+    try :
+        link_overflow_policy : OverflowPolicy = OverflowPolicy(int(conf_file.get("linkOverflowPolicy")))
+    except (TypeError, ValueError):
+        link_overflow_policy = OverflowPolicy.DROP_OLDEST
+    stream.set_link_buffer(link_buffer_size, link_overflow_policy)
+    try :
+        stream.set_reconnect_policy(ReconnectPolicy(str(conf_file.get("reconnect")).lower() != "false",
+                                                    float(conf_file.get("reconnectInitialDelay")),
+                                                    float(conf_file.get("reconnectMaxDelay")),
+                                                    int(conf_file.get("reconnectMaxAttempts")),
+                                                    float(conf_file.get("reconnectCooldown"))))
+    except (TypeError, ValueError):
+        stream.set_reconnect_policy(ReconnectPolicy(str(conf_file.get("reconnect")).lower() != "false"))
+    try :
+        stream.set_framing(FramingType(int(conf_file.get("framing"))))
+    except (TypeError, ValueError):
+        stream.set_framing(FramingType.NONE)
+    for key in conf_file.keys():
+        if key.startswith("linkfilter") and key[len("linkfilter"):].isdigit():
+            try :
+                stream.set_link_filter(int(key[len("linkfilter"):]), FrameFilter.from_string(conf_file.get(key)))
+            except ValueError as e :
+                raise FileConfigurationException(f"Invalid frame filter {key} : {e}") from e
     
 def conf_file_serial(conf_file :configparser.SectionProxy, debug_logging :bool):
     """
@@ -172,9 +230,23 @@ def conf_file_tcp(conf_file : configparser.SectionProxy, debug_logging : bool):
         stream_mode = StreamMode.SERVER
     else:
         stream_mode = StreamMode.CLIENT
+    try :
+        max_clients : int = int(conf_file.get('tcpMaxClients'))
+    except (TypeError, ValueError) :
+        max_clients = DEFAULT_MAX_CLIENTS
+    try :
+        client_buffer_size : int = int(conf_file.get('tcpClientBufferSize'))
+    except (TypeError, ValueError) :
+        client_buffer_size = DEFAULT_CLIENT_BUFFER_SIZE
+    try :
+        backlog : int = int(conf_file.get('tcpBacklog'))
+    except (TypeError, ValueError) :
+        backlog = DEFAULT_LISTEN_BACKLOG
 
     return TcpSettings(host= host , port= port ,
-                       stream_mode = stream_mode , debug_logging=debug_logging)
+                       stream_mode = stream_mode , max_clients = max_clients ,
+                       client_buffer_size = client_buffer_size , backlog = backlog ,
+                       debug_logging=debug_logging)
 
 def conf_file_udp(conf_file : configparser.SectionProxy, debug_logging : bool):
     """
@@ -200,9 +272,138 @@ def conf_file_udp(conf_file : configparser.SectionProxy, debug_logging : bool):
         specific_host : bool  = True if conf_file.get('specificIpUDP').lower() == "true" else False
     except (TypeError, ValueError):
         specific_host = False
+    try :
+        mode : UdpMode = UdpMode(int(conf_file.get('udpMode')))
+    except (TypeError, ValueError):
+        mode = UdpMode.UNICAST
+    try :
+        multicast_ttl : int = int(conf_file.get('multicastTTL'))
+    except (TypeError, ValueError):
+        multicast_ttl = 1
+    multicast_loopback : bool = str(conf_file.get('multicastLoopback')).lower() == "true"
+    interface : str = conf_file.get('multicastInterface') or ""
 
     return UdpSettings(host=host,port=port , dataflow=dataflow,
-                       specific_host=specific_host , debug_logging = debug_logging )
+                       specific_host=specific_host , mode=mode , multicast_ttl=multicast_ttl ,
+                       multicast_loopback=multicast_loopback , interface=interface , debug_logging = debug_logging )
+
+def conf_file_file(conf_file : configparser.SectionProxy, debug_logging : bool):
+    """
+    Init the settings of a FILE stream with value from a configuration file.
+    If no value in configuration file , default value will be use
+
+    Args:
+        conf_file (configparser.SectionProxy): configuration file
+
+    Returns:
+        FileSettings: return a new filesettings
+    """
+    file_name : str = conf_file.get('replayFile')
+    if file_name is None :
+        file_name = ""
+    try :
+        speed : float = float(conf_file.get('replaySpeed'))
+    except (TypeError, ValueError):
+        speed = 1.0
+    try  :
+        loop : bool = True if conf_file.get('replayLoop').lower() == "true" else False
+    except (AttributeError, TypeError, ValueError):
+        loop = False
+    try :
+        start : float = max(0.0, float(conf_file.get('replayStart')))
+    except (TypeError, ValueError):
+        start = 0.0
+    return FileSettings(file_name=file_name, speed=speed, loop=loop, start=start, debug_logging=debug_logging)
+
+def conf_file_caster(conf_file : configparser.SectionProxy, debug_logging : bool):
+    """
+    Init the settings of an embedded NTRIP caster with value from a configuration file.
+    If no value in configuration file , default value will be use
+
+    Args:
+        conf_file (configparser.SectionProxy): configuration file
+
+    Returns:
+        CasterSettings: return a new castersettings
+    """
+    try :
+        port : int = int(conf_file.get('casterPort'))
+    except (TypeError, ValueError):
+        port = DEFAULT_CASTER_PORT
+    try :
+        auth : bool = True if conf_file.get('casterAuthentication').lower() == "true" else False
+    except (AttributeError, TypeError, ValueError):
+        auth = False
+    username : str = conf_file.get('casterUser')
+    if username is None :
+        username = ""
+    try :
+        password : str = base64.b64decode((conf_file.get('casterPassword')).encode()).decode()
+    except (AttributeError, TypeError, ValueError):
+        password = ""
+    try :
+        max_clients : int = int(conf_file.get('casterMaxClients'))
+    except (TypeError, ValueError):
+        max_clients = DEFAULT_CASTER_MAX_CLIENTS
+    try :
+        client_buffer_size : int = int(conf_file.get('casterClientBufferSize'))
+    except (TypeError, ValueError):
+        client_buffer_size = DEFAULT_CASTER_BUFFER_SIZE
+    settings = CasterSettings(port=port, auth=auth, username=username, password=password,
+                              max_clients=max_clients, client_buffer_size=client_buffer_size,
+                              debug_logging=debug_logging)
+    try :
+        settings.set_mountpoints(conf_file.get('casterMountpoints'))
+    except (AttributeError, CasterSettingsException):
+        pass
+    return settings
+
+def conf_file_ntrip_server(conf_file : configparser.SectionProxy , debug_logging : bool):
+    """
+    Init a Ntrip server with value from a configuration file.
+    If no value in configuration file , default value will be use
+
+    Args:
+        conf_file (configparser.SectionProxy): configuration file
+
+    Returns:
+        NtripServer: return a new ntrip server
+    """
+    host : str = conf_file.get('NTRIPServer.hostname')
+    if host is None :
+        host = ""
+    try :
+        port : int = int(conf_file.get('NTRIPServer.portnumber'))
+    except  (TypeError, ValueError):
+        port = 2101
+    mountpoint : str = conf_file.get('NTRIPServer.mountPoint')
+    if mountpoint is None :
+        mountpoint = ""
+    username : str = conf_file.get('NTRIPServer.user')
+    if username is None :
+        username = ""
+    try  :
+        password : str = base64.b64decode((conf_file.get('NTRIPServer.password')).encode()).decode()
+    except  (AttributeError, TypeError, ValueError):
+        password : str = ""
+    try :
+        tls : bool = True if conf_file.get('NTRIPServer.TLS').lower() == "true" else False
+    except  (AttributeError, TypeError, ValueError):
+        tls = False
+    try :
+        keepalive : int = int(conf_file.get('NTRIPServer.keepalive'))
+    except  (TypeError, ValueError):
+        keepalive = DEFAULT_KEEPALIVE
+
+    settings = NtripSettings(host=host , port=port , auth=len(username) > 0 or len(password) > 0 ,
+                             username=username , password=password ,
+                             mountpoint=mountpoint , tls=tls , debug_logging=debug_logging)
+    settings.set_keepalive(keepalive)
+    try :
+        settings.set_ntrip_version(int(conf_file.get('NTRIPServer.version')))
+    except  (TypeError, ValueError, NtripSettingsException):
+        pass
+    return NtripServer(ntrip_settings=settings , debug_logging=debug_logging)
 
 def conf_file_ntrip_client(conf_file : configparser.SectionProxy , debug_logging : bool):
     """
@@ -251,11 +452,19 @@ def conf_file_ntrip_client(conf_file : configparser.SectionProxy , debug_logging
         height : int = int(conf_file.get('NTRIP.fixedheight'))
     except  (TypeError, ValueError) :
         height = 0
+    try :
+        gga_interval : float = float(conf_file.get('NTRIP.ggaInterval'))
+    except  (TypeError, ValueError) :
+        gga_interval = DEFAULT_GGA_INTERVAL
 
     settings = NtripSettings(host=host , port=port , auth=auth ,
                             username=username , password= password,
                             mountpoint=mountpoint, tls= tls ,fixed_pos=fixed_pos ,
                             latitude = latitude ,longitude = longitude ,
                             height = height , debug_logging= debug_logging )
+    settings.set_gga_interval(gga_interval)
 
-    return NtripClient( ntrip_settings= settings ,debug_logging=debug_logging )
+    ntrip_client = NtripClient( ntrip_settings= settings ,debug_logging=debug_logging )
+    # The mountpoint list of the last session is shown without waiting for the caster
+    ntrip_client.load_cached_source_table()
+    return ntrip_client
@@ -63,11 +63,32 @@ def create_conf_file(app):
         config.set(section_name,"close_script",str(stream.send_close_script))
         config.set(section_name,"closeScriptFile",stream.close_script)
         config.set(section_name,"logfile",str(stream.logging_file))
+        config.set(section_name,"logBufferSize",str(stream.log_buffer_size))
+        config.set(section_name,"logFlushInterval",str(stream.log_flush_interval))
+        config.set(section_name,"logFormat",str(stream.log_format.value))
+        config.set(section_name,"logSegmentSize",str(stream.log_rotation.segment_size))
+        config.set(section_name,"logRotateHourly",str(stream.log_rotation.hourly))
+        config.set(section_name,"logCompression",str(stream.log_rotation.compression.value))
+        config.set(section_name,"logRetentionCount",str(stream.log_rotation.retention_count))
+        config.set(section_name,"logRetentionSize",str(stream.log_rotation.retention_size))
+        config.set(section_name,"linkBufferSize",str(stream.link_buffer_size))
+        config.set(section_name,"linkOverflowPolicy",str(stream.link_overflow_policy.value))
+        config.set(section_name,"framing",str(stream.framing.value))
+        config.set(section_name,"reconnect",str(stream.supervisor.policy.enabled))
+        config.set(section_name,"reconnectInitialDelay",str(stream.supervisor.policy.initial_delay))
+        config.set(section_name,"reconnectMaxDelay",str(stream.supervisor.policy.max_delay))
+        config.set(section_name,"reconnectMaxAttempts",str(stream.supervisor.policy.max_attempts))
+        config.set(section_name,"reconnectCooldown",str(stream.supervisor.policy.cooldown))
+        for link , frame_filter in stream.link_filters.items():
+            config.set(section_name,f"linkFilter{link}",frame_filter.to_string())
         save_tcp_config(stream ,section_name , config)
         save_udp_config(stream ,section_name,config)
+        save_file_config(stream ,section_name,config)
+        save_caster_config(stream ,section_name,config)
         config.set(section_name,"connectionType",str(stream.stream_type.value))
         save_serial_config(stream ,section_name , config)
         save_ntrip_config(stream , section_name , config)
+        save_ntrip_server_config(stream , section_name , config)
 
     save_preferences_config(app.preferences, "Preferences" , config)
     with open(constants.DEFAULTCONFIGFILE, 'w' , encoding="utf-8") as configfile:
@@ -82,6 +103,31 @@ def save_udp_config(stream : Stream,section_name : str,save_config_file:configpa
     save_config_file.set(section_name,"portNumberUDP",str(stream.udp_settings.port))
     save_config_file.set(section_name,"specificIpUDP",str(stream.udp_settings.specific_host))
     save_config_file.set(section_name,"dataDirUDP",str(stream.udp_settings.dataflow.value))
+    save_config_file.set(section_name,"udpMode",str(stream.udp_settings.mode.value))
+    save_config_file.set(section_name,"multicastTTL",str(stream.udp_settings.multicast_ttl))
+    save_config_file.set(section_name,"multicastLoopback",str(stream.udp_settings.multicast_loopback))
+    save_config_file.set(section_name,"multicastInterface",stream.udp_settings.interface)
+
+def save_file_config(stream : Stream,section_name : str,save_config_file:configparser.ConfigParser):
+    """
+        Add current file replay settings values in the config_file
+    """
+    save_config_file.set(section_name,"replayFile", stream.file_settings.file_name )
+    save_config_file.set(section_name,"replaySpeed",str(stream.file_settings.speed))
+    save_config_file.set(section_name,"replayLoop",str(stream.file_settings.loop))
+    save_config_file.set(section_name,"replayStart",str(stream.file_settings.start))
+
+def save_caster_config(stream : Stream,section_name : str,save_config_file:configparser.ConfigParser):
+    """
+        Add current embedded caster settings values in the config_file
+    """
+    save_config_file.set(section_name,"casterPort",str(stream.caster_settings.port))
+    save_config_file.set(section_name,"casterAuthentication",str(stream.caster_settings.auth))
+    save_config_file.set(section_name,"casterUser",str(stream.caster_settings.username))
+    save_config_file.set(section_name,"casterPassword",str(base64.b64encode((stream.caster_settings.password).encode()).decode()))
+    save_config_file.set(section_name,"casterMountpoints",stream.caster_settings.mountpoints_to_string())
+    save_config_file.set(section_name,"casterMaxClients",str(stream.caster_settings.max_clients))
+    save_config_file.set(section_name,"casterClientBufferSize",str(stream.caster_settings.client_buffer_size))
 
 def save_tcp_config(stream : Stream,section_name : str,save_config_file:configparser.ConfigParser):
     """
@@ -90,6 +136,9 @@ def save_tcp_config(stream : Stream,section_name : str,save_config_file:configpa
     save_config_file.set(section_name,"hostName",stream.tcp_settings.host)
     save_config_file.set(section_name,"portNumber",str(stream.tcp_settings.port))
     save_config_file.set(section_name,"TCPserver",str(stream.tcp_settings.is_server()))
+    save_config_file.set(section_name,"tcpMaxClients",str(stream.tcp_settings.max_clients))
+    save_config_file.set(section_name,"tcpClientBufferSize",str(stream.tcp_settings.client_buffer_size))
+    save_config_file.set(section_name,"tcpBacklog",str(stream.tcp_settings.backlog))
 
 def save_serial_config(stream:Stream,section_name : str,save_config_file:configparser.ConfigParser):
     """
@@ -118,6 +167,21 @@ def save_ntrip_config(stream : Stream,section_name:str,save_config_file:configpa
     save_config_file.set(section_name,"NTRIP.fixedLongitude",str(stream.ntrip_client.ntrip_settings.longitude))
     save_config_file.set(section_name,"NTRIP.fixedHeight",str(stream.ntrip_client.ntrip_settings.height))
     save_config_file.set(section_name,"NTRIP.TLS", str(stream.ntrip_client.ntrip_settings.tls))
+    save_config_file.set(section_name,"NTRIP.ggaInterval", str(stream.ntrip_client.ntrip_settings.gga_interval))
+
+def save_ntrip_server_config(stream : Stream,section_name:str,save_config_file:configparser.ConfigParser):
+    """
+    Add current ntrip server settings values in the config_file
+    """
+    settings = stream.ntrip_server.ntrip_settings
+    save_config_file.set(section_name,"NTRIPServer.hostname",str(settings.host))
+    save_config_file.set(section_name,"NTRIPServer.portnumber",str(settings.port))
+    save_config_file.set(section_name,"NTRIPServer.mountPoint",str(settings.mountpoint))
+    save_config_file.set(section_name,"NTRIPServer.user",str(settings.username))
+    save_config_file.set(section_name,"NTRIPServer.password",str(base64.b64encode((settings.password).encode()).decode()))
+    save_config_file.set(section_name,"NTRIPServer.TLS", str(settings.tls))
+    save_config_file.set(section_name,"NTRIPServer.version", str(settings.ntrip_version))
+    save_config_file.set(section_name,"NTRIPServer.keepalive", str(settings.keepalive))
     
     
 
@@ -128,6 +192,7 @@ def save_preferences_config(preferences : Preferences , section_name : str,save_
     save_config_file.set(section_name , "config_name" ,str(preferences.config_name))
     save_config_file.set(section_name,"numberOfPortPanels",str(preferences.max_streams))
     save_config_file.set(section_name,"line_termination",preferences.line_termination.replace("\n","\\n").replace("\r","\\r"))
+    save_config_file.set(section_name,"ioEngine",str(preferences.engine_type.value))
     for connect , index in zip(preferences.connect,range(len(preferences.connect))):
         connect_string = "connect" + str(index)
         save_config_file.set(section_name,connect_string,str(connect))
@@ -0,0 +1,188 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from abc import ABC, abstractmethod
+from enum import Enum
+
+class FramingType(Enum):
+    """
+    Framing stage applied to the data read on a stream before it's sent to the linked streams
+    """
+    NONE = 0
+    LINE = 1
+    RTCM3 = 2
+    SBF = 3
+    NMEA = 4
+
+class Frame:
+    """
+    A complete message extracted from the incoming data of a stream
+    """
+    __slots__ = ("data", "message_id", "time")
+
+    def __init__(self, data : bytes , message_id = None , time : int = None) -> None:
+        self.data : bytes = data
+        self.message_id = message_id
+        # Time of the message in milliseconds when the protocol provides it
+        self.time : int = time
+
+class Framer(ABC):
+    """
+    Base class of the framing stages.
+    Data is fed in chunks of any size , the framer keeps the incomplete message
+    until the next chunk and returns the complete ones.
+    Each protocol implements _extract_frames() to cut the frames out of the buffer
+    """
+
+    def __init__(self) -> None:
+        self.buffer : bytearray = bytearray()
+        self.frame_count : int = 0
+        self.discarded_bytes : int = 0
+
+    def feed(self, data : bytes) -> list[Frame]:
+        """
+        Add data read on the stream and return the frames completed by it
+
+        Args:
+            data (bytes): new data
+
+        Returns:
+            list[Frame]: complete frames , in the order they were received
+        """
+        self.buffer += data
+        frames = self._extract_frames()
+        self.frame_count += len(frames)
+        return frames
+
+    @abstractmethod
+    def _extract_frames(self) -> list[Frame]:
+        """
+        Remove the complete frames from the buffer , the incomplete one is kept
+
+        Returns:
+            list[Frame]: complete frames , in the order they were received
+        """
+
+    def reset(self):
+        """
+        Drop the incomplete data , used when the stream is reconnected
+        """
+        self.buffer.clear()
+
+class FrameFilter:
+    """
+    Select the frames sent to a linked stream from their message id.
+    A frame is accepted if its id is in the allow list (or if there is no allow list)
+    and is not in the deny list.
+    Messages with a time can also be decimated : at most one message with this id is sent per interval
+    """
+
+    def __init__(self, allow : set = None , deny : set = None , intervals : dict = None) -> None:
+        self.allow : set = None if allow is None else set(allow)
+        self.deny : set = set() if deny is None else set(deny)
+        # Minimum time in seconds between two messages with the same id
+        self.intervals : dict = {} if intervals is None else dict(intervals)
+        self.last_time : dict = {}
+
+    def accepts(self, frame : Frame) -> bool:
+        """
+        Return True if the frame must be sent to the linked stream
+        """
+        if self.allow is not None and not _matches(self.allow, frame.message_id) :
+            return False
+        if _matches(self.deny, frame.message_id) :
+            return False
+        if frame.time is not None and frame.message_id in self.intervals :
+            last_time = self.last_time.get(frame.message_id)
+            # A negative difference is a new week or a receiver reset
+            if last_time is not None and 0 <= frame.time - last_time < self.intervals[frame.message_id] * 1000 :
+                return False
+            self.last_time[frame.message_id] = frame.time
+        return True
+
+    def reset(self):
+        """
+        Forget the time of the last messages sent , used when the stream is reconnected
+        """
+        self.last_time.clear()
+
+    def to_string(self) -> str:
+        """
+        Return the filter in the format used by the configuration file : allow=1005,1077;deny=1230;decimate=4007:1
+        """
+        parts = []
+        if self.allow is not None :
+            parts.append("allow=" + ",".join(str(message_id) for message_id in sorted(self.allow, key=str)))
+        if len(self.deny) != 0 :
+            parts.append("deny=" + ",".join(str(message_id) for message_id in sorted(self.deny, key=str)))
+        if len(self.intervals) != 0 :
+            parts.append("decimate=" + ",".join(f"{message_id}:{interval:g}" for message_id , interval in self.intervals.items()))
+        return ";".join(parts)
+
+    @staticmethod
+    def from_string(value : str) -> "FrameFilter":
+        """
+        Create a filter from the format used by the configuration file
+
+        Raises:
+            ValueError: the string is not a valid filter
+        """
+        frame_filter = FrameFilter()
+        for part in value.split(";"):
+            part = part.strip()
+            if len(part) == 0 :
+                continue
+            key , _ , ids = part.partition("=")
+            match key.strip().lower() :
+                case "allow" :
+                    frame_filter.allow = _parse_message_ids(ids)
+                case "deny" :
+                    frame_filter.deny = _parse_message_ids(ids)
+                case "decimate" :
+                    for decimation in ids.split(","):
+                        if decimation.strip() == "" :
+                            continue
+                        message_id , _ , interval = decimation.partition(":")
+                        frame_filter.intervals[_parse_message_id(message_id)] = float(interval)
+                case _ :
+                    raise ValueError(f"Unknown frame filter list : {key}")
+        return frame_filter
+
+def _matches(message_ids : set , message_id) -> bool:
+    if message_id in message_ids :
+        return True
+    # An NMEA sentence type (GGA) matches the sentence of every talker (GPGGA , GNGGA ...)
+    return isinstance(message_id, str) and len(message_id) == 5 and not message_id.startswith("P") and message_id[2:] in message_ids
+
+def _parse_message_ids(ids : str) -> set:
+    return {_parse_message_id(message_id) for message_id in ids.split(",") if message_id.strip() != ""}
+
+def _parse_message_id(message_id : str):
+    message_id = message_id.strip()
+    return int(message_id) if message_id.isdigit() else message_id
@@ -0,0 +1,58 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from .Framer import Frame , Framer
+
+DEFAULT_MAX_LINE_LENGTH = 4096
+
+class LineFramer(Framer):
+    """
+    Split the incoming data in lines , each frame ends with b"\n".
+    A line longer than max_line_length is sent as it is to avoid buffering binary data forever
+    """
+
+    def __init__(self, max_line_length : int = DEFAULT_MAX_LINE_LENGTH) -> None:
+        super().__init__()
+        self.max_line_length : int = max_line_length
+
+    def _extract_frames(self) -> list[Frame]:
+        frames : list[Frame] = []
+        start = 0
+        buffer = self.buffer
+        while True :
+            end = buffer.find(b"\n", start)
+            if end == -1 :
+                if len(buffer) - start >= self.max_line_length :
+                    frames.append(Frame(bytes(buffer[start:])))
+                    start = len(buffer)
+                break
+            frames.append(Frame(bytes(buffer[start:end + 1])))
+            start = end + 1
+        del buffer[:start]
+        return frames
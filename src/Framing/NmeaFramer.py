@@ -0,0 +1,131 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from .Framer import Frame , Framer
+
+NMEA_MAX_SENTENCE_LENGTH = 1024
+
+def nmea_checksum_valid(sentence : bytes) -> bool:
+    """
+    Check the *hh checksum of a sentence starting with $ or ! , line termination excluded
+    """
+    star = sentence.rfind(b"*")
+    if star == -1 or len(sentence) < star + 3 :
+        return False
+    checksum = 0
+    for byte in sentence[1:star]:
+        checksum ^= byte
+    try :
+        return checksum == int(sentence[star + 1:star + 3], 16)
+    except ValueError :
+        return False
+
+def find_last_sentence(data : bytes , sentence_type : bytes) -> bytes | None:
+    """
+    Return the most recent valid sentence of a type (b"GGA") in the data , without its line termination
+
+    Args:
+        data (bytes): data containing NMEA sentences
+        sentence_type (bytes): type of the sentence , whatever the talker
+
+    Returns:
+        bytes | None: the sentence or None if there is no valid sentence of this type
+    """
+    end = len(data)
+    while end > 0 :
+        start = data.rfind(b"\n", 0, end - 1) + 1
+        line = data[start:end].strip()
+        dollar = line.find(b"$")
+        if dollar != -1 :
+            line = line[dollar:]
+            comma = line.find(b",")
+            if comma != -1 and line[1:comma].endswith(sentence_type) and nmea_checksum_valid(line) :
+                return line
+        end = start
+    return None
+
+class NmeaFramer(Framer):
+    """
+    Extract the NMEA-0183 sentences : from $ or ! to the line termination.
+    The message id of a frame is the address of the sentence (GPGGA , GNRMC , PSSN ...).
+    Sentences with a wrong or missing checksum and bytes outside of a sentence are dropped
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.checksum_errors : int = 0
+
+    def _extract_frames(self) -> list[Frame]:
+        frames : list[Frame] = []
+        buffer = self.buffer
+        start = 0
+        while True :
+            sentence_start = _find_sentence_start(buffer, start)
+            self.discarded_bytes += sentence_start - start
+            start = sentence_start
+            if start == len(buffer) :
+                break
+            end = buffer.find(b"\n", start)
+            if end == -1 :
+                if len(buffer) - start > NMEA_MAX_SENTENCE_LENGTH :
+                    self.discarded_bytes += 1
+                    start += 1
+                    continue
+                break
+            end += 1
+            sentence = bytes(buffer[start:end])
+            # A new sentence start before the end of line means the previous one was truncated
+            restart = _find_sentence_start(sentence, 1)
+            if restart != len(sentence) :
+                self.discarded_bytes += restart
+                self.checksum_errors += 1
+                start += restart
+                continue
+            if not nmea_checksum_valid(sentence.rstrip(b"\r\n")) :
+                self.checksum_errors += 1
+                self.discarded_bytes += len(sentence)
+                start = end
+                continue
+            comma = sentence.find(b",")
+            address = sentence[1:comma if comma != -1 else sentence.find(b"*")]
+            frames.append(Frame(sentence, address.decode(encoding='ISO-8859-1')))
+            start = end
+        del buffer[:start]
+        return frames
+
+def _find_sentence_start(buffer , start : int) -> int:
+    dollar = buffer.find(b"$", start)
+    bang = buffer.find(b"!", start)
+    if dollar == -1 and bang == -1 :
+        return len(buffer)
+    if dollar == -1 :
+        return bang
+    if bang == -1 :
+        return dollar
+    return min(dollar, bang)
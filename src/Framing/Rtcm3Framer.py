@@ -0,0 +1,106 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from .Framer import Frame , Framer
+
+RTCM3_PREAMBLE = 0xD3
+RTCM3_HEADER_SIZE = 3
+RTCM3_CRC_SIZE = 3
+RTCM3_MAX_PAYLOAD_SIZE = 1023
+
+def _crc24q_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000 :
+                crc ^= 0x1864CFB
+        table.append(crc & 0xFFFFFF)
+    return table
+
+CRC24Q_TABLE = _crc24q_table()
+
+def crc24q(data) -> int:
+    """
+    Compute the CRC-24Q used by RTCM3
+    """
+    crc = 0
+    table = CRC24Q_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ byte]
+    return crc
+
+class Rtcm3Framer(Framer):
+    """
+    Extract the RTCM3 frames : preamble 0xD3 , 10 bits length , payload and CRC-24Q.
+    The message id of a frame is the RTCM message type.
+    Bytes outside of a frame and frames with a wrong CRC are dropped
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.crc_errors : int = 0
+
+    def _extract_frames(self) -> list[Frame]:
+        frames : list[Frame] = []
+        buffer = self.buffer
+        start = 0
+        while True :
+            preamble = buffer.find(RTCM3_PREAMBLE, start)
+            if preamble == -1 :
+                preamble = len(buffer)
+            self.discarded_bytes += preamble - start
+            start = preamble
+            if len(buffer) - start < RTCM3_HEADER_SIZE :
+                break
+            # The 6 bits following the preamble are reserved and always 0
+            if buffer[start + 1] & 0xFC != 0 :
+                self.discarded_bytes += 1
+                start += 1
+                continue
+            length = ((buffer[start + 1] & 0x03) << 8) | buffer[start + 2]
+            end = start + RTCM3_HEADER_SIZE + length + RTCM3_CRC_SIZE
+            if len(buffer) < end :
+                break
+            payload_end = end - RTCM3_CRC_SIZE
+            with memoryview(buffer) as view :
+                valid = crc24q(view[start:payload_end]) == int.from_bytes(view[payload_end:end], "big")
+            if not valid :
+                self.crc_errors += 1
+                self.discarded_bytes += 1
+                start += 1
+                continue
+            message_type = None
+            if length >= 2 :
+                message_type = (buffer[start + 3] << 4) | (buffer[start + 4] >> 4)
+            frames.append(Frame(bytes(buffer[start:end]), message_type))
+            start = end
+        del buffer[:start]
+        return frames
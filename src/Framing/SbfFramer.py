@@ -0,0 +1,107 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from .Framer import Frame , Framer
+
+SBF_SYNC = b"$@"
+SBF_HEADER_SIZE = 8
+SBF_TOW_DO_NOT_USE = 0xFFFFFFFF
+SBF_ID_MASK = 0x1FFF
+
+def _crc16_ccitt_table() -> list[int]:
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+        table.append(crc & 0xFFFF)
+    return table
+
+CRC16_CCITT_TABLE = _crc16_ccitt_table()
+
+def crc16_ccitt(data) -> int:
+    """
+    Compute the CRC-16 CCITT used by SBF
+    """
+    crc = 0
+    table = CRC16_CCITT_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+class SbfFramer(Framer):
+    """
+    Extract the Septentrio Binary Format blocks : sync "$@" , CRC , ID , length and body.
+    The message id of a frame is the block number (without the revision)
+    and its time is the TOW of the block in milliseconds.
+    Bytes outside of a block and blocks with a wrong CRC are dropped
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.crc_errors : int = 0
+
+    def _extract_frames(self) -> list[Frame]:
+        frames : list[Frame] = []
+        buffer = self.buffer
+        start = 0
+        while True :
+            sync = buffer.find(SBF_SYNC, start)
+            if sync == -1 :
+                # Keep a "$" that could be the beginning of the next sync
+                sync = len(buffer) - 1 if buffer.endswith(b"$") else len(buffer)
+            self.discarded_bytes += sync - start
+            start = sync
+            if len(buffer) - start < SBF_HEADER_SIZE :
+                break
+            length = int.from_bytes(buffer[start + 6:start + 8], "little")
+            if length < SBF_HEADER_SIZE or length % 4 != 0 :
+                self.discarded_bytes += 1
+                start += 1
+                continue
+            end = start + length
+            if len(buffer) < end :
+                break
+            with memoryview(buffer) as view :
+                valid = crc16_ccitt(view[start + 4:end]) == int.from_bytes(view[start + 2:start + 4], "little")
+            if not valid :
+                self.crc_errors += 1
+                self.discarded_bytes += 1
+                start += 1
+                continue
+            block_id = int.from_bytes(buffer[start + 4:start + 6], "little") & SBF_ID_MASK
+            tow = None
+            if length >= SBF_HEADER_SIZE + 4 :
+                tow = int.from_bytes(buffer[start + 8:start + 12], "little")
+                if tow == SBF_TOW_DO_NOT_USE :
+                    tow = None
+            frames.append(Frame(bytes(buffer[start:end]), block_id, tow))
+            start = end
+        del buffer[:start]
+        return frames
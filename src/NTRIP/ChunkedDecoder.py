@@ -0,0 +1,151 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+from enum import Enum
+
+# A chunk size line longer than this isn't a chunk size line
+MAX_SIZE_LINE = 1024
+
+class ChunkedEncodingError(ValueError):
+    """
+    Raised when the data received from the caster doesn't follow the chunked transfer encoding
+    """
+
+class _State(Enum):
+    SIZE = 0
+    DATA = 1
+    DATA_END = 2
+    TRAILER = 3
+    DONE = 4
+
+def is_chunked(header : str) -> bool:
+    """
+    Return True if the header of a HTTP response announces a chunked transfer encoding
+    """
+    for line in header.split("\r\n")[1:] :
+        name , separator , value = line.partition(":")
+        if separator and name.strip().lower() == "transfer-encoding" :
+            return "chunked" in value.lower()
+    return False
+
+def encode_chunk(data : bytes) -> bytes:
+    """
+    Return the data as a single chunk of a chunked HTTP body , the chunk size line and the line break are added
+    """
+    return b"".join((f"{len(data):X}\r\n".encode(), data, b"\r\n"))
+
+class ChunkedDecoder:
+    """
+    Incremental decoder of a chunked HTTP body (NTRIP 2.0).
+    The received data can be cut anywhere , the chunk size lines are removed
+    and the payload is copied once , when it's returned
+    """
+
+    def __init__(self) -> None:
+        self._state : _State = _State.SIZE
+        self._remaining : int = 0
+        self._line = bytearray()
+
+    @property
+    def done(self) -> bool:
+        """
+        True once the last chunk has been received
+        """
+        return self._state == _State.DONE
+
+    def decode(self, data : bytes | bytearray | memoryview) -> bytes:
+        """
+        Remove the chunked encoding of the received data ,
+        a memoryview is only copied if a line of the encoding has to be searched in it
+
+        Raises:
+            ChunkedEncodingError: the data isn't chunked encoded
+
+        Returns:
+            bytes: the payload contained in the data
+        """
+        view = memoryview(data).cast("B")
+        length = len(view)
+        # A memoryview has no find() , the lines are searched in a copy made only when needed
+        searchable = data if isinstance(data, (bytes, bytearray)) else None
+        payload : list[memoryview] = []
+        position = 0
+        while position < length :
+            match self._state :
+                case _State.DATA :
+                    end = min(length, position + self._remaining)
+                    payload.append(view[position:end])
+                    self._remaining -= end - position
+                    position = end
+                    if self._remaining == 0 :
+                        self._state = _State.DATA_END
+                case _State.SIZE | _State.TRAILER :
+                    if searchable is None :
+                        searchable = view.tobytes()
+                    end = searchable.find(b"\n", position)
+                    if end == -1 :
+                        self._line += view[position:]
+                        position = length
+                        if len(self._line) > MAX_SIZE_LINE :
+                            raise ChunkedEncodingError("Chunk size line too long")
+                        continue
+                    self._line += view[position:end]
+                    position = end + 1
+                    line = bytes(self._line).strip()
+                    self._line.clear()
+                    if self._state == _State.TRAILER :
+                        if len(line) == 0 :
+                            self._state = _State.DONE
+                        continue
+                    try :
+                        # Chunk extensions after ";" are ignored
+                        size = int(line.split(b";")[0], 16)
+                    except ValueError as e :
+                        raise ChunkedEncodingError(f"Invalid chunk size : {line[:32]}") from e
+                    if size == 0 :
+                        self._state = _State.TRAILER
+                    else :
+                        self._remaining = size
+                        self._state = _State.DATA
+                case _State.DATA_END :
+                    byte = view[position]
+                    position += 1
+                    if byte == 0x0A :
+                        self._state = _State.SIZE
+                    elif byte != 0x0D :
+                        raise ChunkedEncodingError("Missing line break after a chunk")
+                case _State.DONE :
+                    break
+        match len(payload) :
+            case 0 :
+                return b""
+            case 1 :
+                return bytes(payload[0])
+            case _ :
+                return b"".join(payload)
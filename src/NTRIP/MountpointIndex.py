@@ -0,0 +1,177 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import math
+
+from .NtripSettings import NtripSettings
+from .NtripSourceTable import NtripSourceTable
+
+EARTH_RADIUS_KM = 6371.0088
+
+def _to_unit_vector(latitude : float , longitude : float) -> tuple[float, float, float]:
+    latitude = math.radians(latitude)
+    longitude = math.radians(longitude)
+    cos_latitude = math.cos(latitude)
+    return (cos_latitude * math.cos(longitude), cos_latitude * math.sin(longitude), math.sin(latitude))
+
+def _chord_to_km(squared_chord : float) -> float:
+    return 2 * math.asin(min(1.0, math.sqrt(squared_chord) / 2)) * EARTH_RADIUS_KM
+
+def parse_gga_position(gga : str) -> tuple[float, float]:
+    """
+    Extract the latitude and the longitude in degrees from a NMEA GGA sentence
+
+    Returns:
+        tuple[float, float]: the position , None if the sentence has no position
+    """
+    fields = gga.strip().split(",")
+    if len(fields) < 6 or not fields[0].endswith("GGA") :
+        return None
+    try :
+        latitude = int(fields[2][:2]) + float(fields[2][2:]) / 60
+        longitude = int(fields[4][:3]) + float(fields[4][3:]) / 60
+    except ValueError :
+        return None
+    if fields[3] == "S" :
+        latitude = -latitude
+    if fields[5] == "W" :
+        longitude = -longitude
+    return latitude , longitude
+
+class _Node :
+    __slots__ = ("point", "caster", "source", "axis", "left", "right")
+
+    def __init__(self, point : tuple , caster : NtripSettings , source : NtripSourceTable , axis : int) -> None:
+        self.point : tuple = point
+        self.caster : NtripSettings = caster
+        self.source : NtripSourceTable = source
+        self.axis : int = axis
+        self.left : _Node = None
+        self.right : _Node = None
+
+class MountpointIndex :
+    """
+    k-d tree of the mountpoints of one or several casters.
+    The positions are stored as unit vectors , so distances are right across the antimeridian and near the poles
+    """
+
+    def __init__(self, casters : list[tuple[NtripSettings, list[NtripSourceTable]]]) -> None:
+        points = []
+        self._source_tables : dict[int, list[NtripSourceTable]] = {}
+        for caster , source_table in casters :
+            self._source_tables[id(caster)] = source_table
+            for source in source_table :
+                if source.latitude is None or source.longitude is None :
+                    continue
+                points.append((_to_unit_vector(source.latitude, source.longitude), caster, source))
+        self.size : int = len(points)
+        self._root : _Node = self._build(points, 0)
+
+    @classmethod
+    def from_settings(cls, ntrip_settings : NtripSettings):
+        """
+        Create the index of the source table of a single caster
+        """
+        return cls([(ntrip_settings, ntrip_settings.source_table or [])])
+
+    def get_source_table(self, caster : NtripSettings) -> list[NtripSourceTable]:
+        """
+        Get the source table indexed for a caster
+
+        Args:
+            caster (NtripSettings): settings of a caster of the index
+
+        Returns:
+            list[NtripSourceTable]: the source table of the caster
+        """
+        return self._source_tables.get(id(caster), [])
+
+    def _build(self, points : list , axis : int) -> _Node:
+        if len(points) == 0 :
+            return None
+        points.sort(key=lambda point : point[0][axis])
+        middle = len(points) // 2
+        point , caster , source = points[middle]
+        node = _Node(point, caster, source, axis)
+        next_axis = (axis + 1) % 3
+        node.left = self._build(points[:middle], next_axis)
+        node.right = self._build(points[middle + 1:], next_axis)
+        return node
+
+    def nearest(self, latitude : float , longitude : float , ntrip_format : str = None ,
+                max_distance : float = None , accept = None) -> tuple[NtripSettings, NtripSourceTable, float]:
+        """
+        Find the nearest compatible mountpoint of a position
+
+        Args:
+            latitude (float): latitude in degrees
+            longitude (float): longitude in degrees
+            ntrip_format (str, optional): only mountpoints whose format starts with this value (ex "RTCM 3"). Defaults to None.
+            max_distance (float, optional): maximum distance in km. Defaults to None.
+            accept (optional): function called with a NtripSourceTable , the mountpoint is skipped if it returns False. Defaults to None.
+
+        Returns:
+            tuple[NtripSettings, NtripSourceTable, float]: the caster , the mountpoint and its distance in km , None if none is found
+        """
+        target = _to_unit_vector(latitude, longitude)
+        if max_distance is not None :
+            best_distance = (2 * math.sin(min(math.pi / 2, max_distance / EARTH_RADIUS_KM / 2))) ** 2
+        else :
+            best_distance = math.inf
+        if ntrip_format is not None :
+            ntrip_format = ntrip_format.lower()
+        best : _Node = None
+        # Each subtree is kept with the lowest distance a mountpoint of it can have ,
+        # it's skipped once a closer mountpoint has been found
+        stack = [(self._root, 0.0)]
+        while len(stack) != 0 :
+            node , bound = stack.pop()
+            if node is None or bound >= best_distance :
+                continue
+            point = node.point
+            distance = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if distance < best_distance and self._is_compatible(node.source, ntrip_format, accept) :
+                best_distance = distance
+                best = node
+            difference = target[node.axis] - point[node.axis]
+            if difference < 0 :
+                stack.append((node.right, difference * difference))
+                stack.append((node.left, bound))
+            else :
+                stack.append((node.left, difference * difference))
+                stack.append((node.right, bound))
+        if best is None :
+            return None
+        return best.caster , best.source , _chord_to_km(best_distance)
+
+    @staticmethod
+    def _is_compatible(source : NtripSourceTable , ntrip_format : str , accept) -> bool:
+        if ntrip_format is not None and not (source.ntrip_format or "").lower().startswith(ntrip_format) :
+            return False
+        return accept is None or accept(source)
@@ -28,11 +28,17 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import base64
+import copy
 import datetime
 import math
 import logging
-from .NtripSourceTable import NtripSourceTable
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .ChunkedDecoder import ChunkedDecoder, ChunkedEncodingError, is_chunked
+from .MountpointIndex import MountpointIndex, parse_gga_position
+from .NtripSourceTable import NtripSourceTable, SourceTableParser
 from .NtripSettings import NtripSettings, NtripSettingsException
+from .SourceTableCache import SOURCE_TABLE_CACHE, SourceTableEntry
 from ..constants import DEFAULTLOGFILELOGGER
 
 RAD2DEGREES = 180.0 / 3.141592653589793
@@ -64,6 +70,53 @@ class ClosingError(NtripClientError):
     """Error while closing the connection with NTRIP Caster
     """
 
+def parse_source_table(table : str) -> SourceTableParser:
+    """
+    Parse the text of a complete source table
+    """
+    parser = SourceTableParser()
+    parser.feed(table.encode(encoding='ISO-8859-1'))
+    parser.close()
+    return parser
+
+def probe_casters(casters : list[NtripSettings] , force : bool = False ,
+                  max_workers : int = 8) -> list[tuple[NtripSettings, list[NtripSourceTable]]]:
+    """
+    Get the source tables of several casters at the same time , a caster that can't be reached is skipped
+
+    Args:
+        casters (list[NtripSettings]): settings of the casters
+        force (bool, optional): download the tables even if they are cached. Defaults to False.
+        max_workers (int, optional): maximum number of casters requested together. Defaults to 8.
+
+    Returns:
+        list[tuple[NtripSettings, list[NtripSourceTable]]]: the settings and the source table of each reachable caster ,
+        the settings of the casters are not modified
+    """
+    def probe(ntrip_settings : NtripSettings):
+        # The client works on a copy , the settings given may be in use by a stream
+        client = NtripClient(copy.copy(ntrip_settings))
+        try :
+            source_table = client.get_source_table(force)
+        except NtripClientError as e :
+            if ntrip_settings.log_file is not None :
+                ntrip_settings.log_file.error("Failed to get the source table of %s : %s", ntrip_settings.host, e)
+            return None
+        return ntrip_settings , source_table
+
+    if len(casters) == 0 :
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(casters)), thread_name_prefix="NTRIP probe") as executor :
+        results = list(executor.map(probe, casters))
+    return [result for result in results if result is not None]
+
+def _parse_headers(header : str) -> dict[str, str]:
+    headers = {}
+    for line in header.split("\r\n")[1:] :
+        name , separator , value = line.partition(":")
+        if separator :
+            headers[name.strip().lower()] = value.strip()
+    return headers
 
 class NtripClient:
     """Class for a ntrip client 
@@ -73,8 +126,17 @@ class NtripClient:
 
         self.ntrip_settings : NtripSettings = ntrip_settings
         self.socket = None
+        self.transport = None
         self.connected : bool = False
         self.fixed_pos_gga : str
+        # Time of the last GGA sentence sent to the caster
+        self._last_gga_time : float = None
+        # Encoded connect request and the settings it was built from
+        self._connect_request_cache : tuple[tuple, bytes] = None
+        # Set when the caster sends the corrections with a chunked transfer encoding (NTRIP 2.0)
+        self.decoder : ChunkedDecoder = None
+        # Corrections received with the answer to the connect request
+        self.initial_data : bytes = b""
         if debug_logging :
             self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
         else :
@@ -98,97 +160,220 @@ class NtripClient:
                 self.log_file.error("Error while creating NTRIP Socket")
             raise e
 
-    def send_nmea(self, nmea_message):
-        """Sending nmea message to the ntrip caster
+    def send_nmea(self, nmea_message : str | bytes) -> bool:
+        """Send a GGA sentence to the ntrip caster on the open connection.
+        A sentence received less than gga_interval seconds after the last one sent is dropped
+
+        Returns:
+            bool: True if the sentence has been sent
         """
-        if self.ntrip_settings.ntrip_version == 2 :
-            request = "GET /"+ self.ntrip_settings.mountpoint +" HTTP/1.1\r\n"
-        else :
-            request = "GET /"+ self.ntrip_settings.mountpoint +" HTTP/1.0\r\n"
-        request += "Host: " + self.ntrip_settings.host + "\r\n"
-        request += "User-Agent: NTRIP Python Client\r\n"
-        if self.ntrip_settings.ntrip_version == 2 :
-            request += "Ntrip-Version: Ntrip/2.0\r\n"
-        else :
-            request += "Ntrip-Version: Ntrip/1.0\r\n"
-        if self.ntrip_settings.auth :
-            request += "Authorization: Basic " +  base64.b64encode((self.ntrip_settings.username + ":" + self.ntrip_settings.password).encode()).decode() + "\r\n"
-        if self.ntrip_settings.ntrip_version ==2 :
-            request += "Ntrip-GGA: " + nmea_message + "\r\n"
-            request += "Connection: close\r\n\r\n"
-        else :
-            request +=  nmea_message + "\r\n"
+        now = time.monotonic()
+        if self._last_gga_time is not None and now - self._last_gga_time < self.ntrip_settings.gga_interval :
+            return False
+        if isinstance(nmea_message, str) :
+            nmea_message = nmea_message.encode(encoding='ISO-8859-1')
         try :
-            self._send_request(request)
+            self._send_bytes(nmea_message.strip() + b"\r\n")
         except NtripClientError as e :
             raise SendRequestError(e) from e
+        self._last_gga_time = now
+        return True
 
-    def get_source_table(self):
+    def get_source_table(self, force : bool = False) -> list[NtripSourceTable]:
         """retrive source table from a ntrip caster ,
-        if the ntripclient not yet connect ,
-        it will open a temporary connection
+        a temporary connection is opened to request it.
+        A table received less than the cache ttl ago is returned without contacting the caster ,
+        an older one is validated by the caster before being used again
+
+        Args:
+            force (bool, optional): ignore the cached table and download it again. Defaults to False.
         """
+        if self.ntrip_settings.host is None or len(self.ntrip_settings.host) == 0 :
+            if self.log_file is not None :
+                self.log_file.error("Failed to get the source table : hostname empty")
+            raise SourceTableRequestError("Invalid Host Name or Host name Empty")
+        cached = SOURCE_TABLE_CACHE.get(self.ntrip_settings.host, self.ntrip_settings.port, self.ntrip_settings.tls)
+        if force :
+            cached = None
+        elif SOURCE_TABLE_CACHE.is_fresh(cached) :
+            if self.log_file is not None :
+                self.log_file.debug("Using cached source table of NTRIP Caster %s (%.0f s old)",self.ntrip_settings.host , cached.age())
+            return self._use_source_table(cached)
+
         if self.log_file is not None :
             self.log_file.debug("Getting source table from NTRIP Caster %s",self.ntrip_settings.host)
-        temp_connection = None
-        if not self.connected:
-            try :
-                self.socket = self.ntrip_settings.connect()
-            except Exception as e:
+        # The table is always requested on its own connection , the stream connection carries the corrections
+        try :
+            connection = self.ntrip_settings.connect()
+        except Exception as e:
+            if self.log_file is not None :
                 self.log_file.error("Failed to connect to NTRIP caster %s : %s",self.ntrip_settings.host,e)
-                raise SourceTableRequestError(e) from e
-            temp_connection = True
+            raise SourceTableRequestError(e) from e
 
         request = "GET / HTTP/1.1\r\n"
         request += "Host: " + self.ntrip_settings.host + "\r\n"
         request += "User-Agent: NTRIP pydatalink Client\r\n"
         request += "Ntrip-Version: Ntrip/2.0\r\n"
+        if cached is not None :
+            # Ask the caster to answer 304 if the table didn't change since it was cached
+            if cached.etag is not None :
+                request += "If-None-Match: " + cached.etag + "\r\n"
+            if cached.last_modified is not None :
+                request += "If-Modified-Since: " + cached.last_modified + "\r\n"
         # if self.ntrip_settings.auth :
         #     request+="Authorization: Basic " +  base64.b64encode((self.ntrip_settings.username + ":" + self.ntrip_settings.password).encode()).decode() + "\r\n"
         request += "Connection: close\r\n\r\n"
 
+        parser = SourceTableParser()
         try :
-            self._send_request(request)
-        except SendRequestError as e :
+            connection.sendall(request.encode())
+            header , body = self._receive_source_table(connection, parser)
+        except OSError as e :
             if self.log_file is not None :
                 self.log_file.error("Failed to send Header : %s" ,e)
             raise SourceTableRequestError("Failed to send header") from e
-        try :
-            response : str = self._receive_response()
         except ReceiveRequestError as e :
             if self.log_file is not None :
                 self.log_file.error("Failed to read source table : %s" ,e)
             raise SourceTableRequestError("Failed to read source table") from e
-        if "200" in response :
+        finally :
+            try :
+                connection.close()
+            except OSError :
+                pass
+
+        status_line = header.split("\r\n")[0]
+        if cached is not None and " 304" in status_line :
             if self.log_file is not None :
-                self.log_file.info("parsing source table ")
-            # Parse the response to extract the resource table
-            source_table : list[NtripSourceTable]= []
-            response : str= response.split("\r\n\r\n")[1]
-            sources = response.split("STR;")
-            
-            if len(sources) <= 2 :
-                if self.log_file is not None :
-                    self.log_file.debug("returned source table empty")
-                return source_table
-            sources.pop(0)
-            sources.pop()
-            for source in sources :
-                newsourcetable = source.split(";")
-                source_table.append(NtripSourceTable(newsourcetable[0],newsourcetable[1],newsourcetable[2],newsourcetable[3]))
-            if temp_connection is not None:
-                self.close()
+                self.log_file.debug("Source table of NTRIP Caster %s not modified",self.ntrip_settings.host)
+            SOURCE_TABLE_CACHE.validate(cached)
+            return self._use_source_table(cached)
+        if "200" in status_line :
+            headers = _parse_headers(header)
+            entry = SourceTableEntry(self.ntrip_settings.host, self.ntrip_settings.port, self.ntrip_settings.tls,
+                                     body.decode(encoding='ISO-8859-1'), etag=headers.get("etag"),
+                                     last_modified=headers.get("last-modified"))
+            entry.parsed = parser
+            SOURCE_TABLE_CACHE.put(entry)
+            source_table = self._use_source_table(entry)
             if self.log_file is not None :
                 self.log_file.debug("Number of mountpoints available from %s : %s " , self.ntrip_settings.host , str(len(source_table)))
             return source_table
         else :
             if self.log_file is not None :
                 self.log_file.error("The return value is inccorect")
-                self.log_file.debug("NTRIP Caster response : %s",response)
+                self.log_file.debug("NTRIP Caster response : %s",header)
             raise SourceTableRequestError("Error in returned source table")
 
-    def _connect_request(self):
+    def _receive_source_table(self, connection , parser : SourceTableParser) -> tuple[str, bytes]:
+        """
+        Read the answer of the caster , the body is given to the parser as it's received
+        and the reading stops at the end of the table instead of waiting for the caster to close the connection.
+        A chunked body (NTRIP 2.0) is decoded before being parsed
+
+        Returns:
+            tuple[str, bytes]: the header of the answer and the decoded body
+        """
+        received = bytearray()
+        header : str = None
+        decoder : ChunkedDecoder = None
+        body : list[bytes] = []
+        while not parser.complete and (decoder is None or not decoder.done) :
+            try :
+                data = connection.recv(65536)
+            except Exception as e :
+                raise ReceiveRequestError(e) from e
+            if not data :
+                break
+            if header is None :
+                received += data
+                end = received.find(b"\r\n\r\n")
+                if end == -1 :
+                    continue
+                header = received[:end].decode(encoding='ISO-8859-1')
+                data = bytes(received[end + 4:])
+                if "200" not in header.split("\r\n")[0] :
+                    # 304 or error : there is no table to read
+                    break
+                if is_chunked(header) :
+                    decoder = ChunkedDecoder()
+            if decoder is not None :
+                try :
+                    data = decoder.decode(data)
+                except ChunkedEncodingError as e :
+                    raise ReceiveRequestError(e) from e
+            if len(data) != 0 :
+                body.append(data)
+                parser.feed(data)
+        if header is None :
+            header = received.decode(encoding='ISO-8859-1')
+        parser.close()
+        return header , b"".join(body)
+
+    def select_nearest_mountpoint(self, index : MountpointIndex = None , gga : str = None ,
+                                  ntrip_format : str = None , max_distance : float = None) -> NtripSourceTable:
+        """
+        Select the nearest compatible mountpoint of the position of the rover.
+        The position is read from the GGA sentence if one is given , else the fixed position is used.
+        If the mountpoint belongs to another caster of the index , the caster settings are used too.
+        The settings are only changed once a mountpoint is found
+
+        Args:
+            index (MountpointIndex, optional): mountpoints to choose from , the source table of the caster if None. Defaults to None.
+            gga (str, optional): last GGA sentence of the rover. Defaults to None.
+            ntrip_format (str, optional): format the mountpoint must send (ex "RTCM 3"). Defaults to None.
+            max_distance (float, optional): maximum distance in km. Defaults to None.
+
+        Returns:
+            NtripSourceTable: the selected mountpoint , None if none is found
+        """
+        position = parse_gga_position(gga) if gga is not None else None
+        if position is None :
+            position = (self.ntrip_settings.latitude , self.ntrip_settings.longitude)
+        if index is None :
+            index = MountpointIndex.from_settings(self.ntrip_settings)
+        result = index.nearest(position[0], position[1], ntrip_format, max_distance)
+        if result is None :
+            return None
+        caster , source , distance = result
+        if caster is not self.ntrip_settings :
+            self.ntrip_settings.set_caster(caster, index.get_source_table(caster), source.mountpoint)
+        else :
+            self.ntrip_settings.set_mountpoint(source.mountpoint)
+        if self.log_file is not None :
+            self.log_file.info("Nearest mountpoint : %s on %s (%.1f km)", source.mountpoint, caster.host, distance)
+        return source
+
+    def load_cached_source_table(self) -> bool:
+        """
+        Fill the source table of the settings with the cached table of the caster , without contacting it.
+        Used at startup so that the mountpoint list is available at once
 
+        Returns:
+            bool: True if a cached table was found
+        """
+        if self.ntrip_settings.host is None or len(self.ntrip_settings.host) == 0 :
+            return False
+        cached = SOURCE_TABLE_CACHE.get(self.ntrip_settings.host, self.ntrip_settings.port, self.ntrip_settings.tls)
+        if cached is None :
+            return False
+        self.ntrip_settings.source_table = self._use_source_table(cached)
+        return True
+
+    def _use_source_table(self, entry : SourceTableEntry) -> list[NtripSourceTable]:
+        if entry.parsed is None :
+            entry.parsed = parse_source_table(entry.table)
+        self.ntrip_settings.casters = entry.parsed.casters
+        self.ntrip_settings.networks = entry.parsed.networks
+        return entry.parsed.sources
+
+    def get_connect_request(self) -> str :
+        """
+        Build the request sent to the caster to start receiving the mountpoint data
+
+        Returns:
+            str: the request
+        """
         if self.ntrip_settings.ntrip_version == 2 :
             request = "GET /"+ self.ntrip_settings.mountpoint +" HTTP/1.1\r\n"
         else :
@@ -202,17 +387,63 @@ class NtripClient:
         if self.ntrip_settings.auth :
             request += "Authorization: Basic " +  base64.b64encode((self.ntrip_settings.username + ":" + self.ntrip_settings.password).encode()).decode() + "\r\n"
         if self.ntrip_settings.ntrip_version ==2 :
-            request += "Connection: close\r\n\r\n"
+            request += "Connection: close\r\n"
+        request += "\r\n"
+        return request
+
+    def get_connect_request_bytes(self) -> bytes :
+        """
+        Return the encoded connect request , it's only built again when the settings changed
+        """
+        settings = self.ntrip_settings
+        key = (settings.ntrip_version, settings.mountpoint, settings.host, settings.auth, settings.username, settings.password)
+        if self._connect_request_cache is None or self._connect_request_cache[0] != key :
+            self._connect_request_cache = (key, self.get_connect_request().encode())
+        return self._connect_request_cache[1]
+
+    def check_connect_response(self, response : str):
+        """
+        Check the caster response to the connect request
 
+        Raises:
+            ConnectRequestError: the caster refused the request
+        """
+        if "HTTP/1.1 40" in response or "HTTP/1.0 40" in response :
+            error = response.split("\r\n\r\n")[0].split("\r\n")[0].replace("HTTP/1.1","").replace("HTTP/1.0","")
+            if self.log_file is not None :
+                self.log_file.error("Client error : %s",error.replace("\n","").replace("\r",""))
+            raise ConnectRequestError("Caster Response :"  + error)
+        header = response.split("\r\n\r\n")[0]
+        self.decoder = ChunkedDecoder() if is_chunked(header) else None
+        if self.decoder is not None and self.log_file is not None :
+            self.log_file.debug("Chunked transfer encoding used by the caster")
+
+    def decode(self, data : bytes) -> bytes:
+        """
+        Return the corrections contained in the data received from the caster
+
+        Raises:
+            ReceiveRequestError: the chunked encoding of the data is invalid
+        """
+        if self.decoder is None :
+            return data
         try :
-            self._send_request(request)
+            return self.decoder.decode(data)
+        except ChunkedEncodingError as e :
+            raise ReceiveRequestError(e) from e
+
+    def _connect_request(self):
+
+        try :
+            self._send_bytes(self.get_connect_request_bytes())
         except SendRequestError as e :
             if self.log_file is not None :
                 self.log_file.error("Failed to send request : %s",e)
             raise SendRequestError("Failed to send request") from e
         try :
             response = self._receive_response()
-            self.log_file.debug("return value from the request :  %s", response)
+            if self.log_file is not None :
+                self.log_file.debug("return value from the request :  %s", response)
 
         except ReceiveRequestError as e:
             if self.log_file is not None :
@@ -220,15 +451,15 @@ class NtripClient:
                 self.log_file.error("Failed to catch response : %s",e)
             raise ReceiveRequestError("Failed to catch receive a response") from e
 
-        if "HTTP/1.1 40" in response or "HTTP/1.0 40" in response :
-            error = response.split("\r\n\r\n")[0].split("\r\n")[0].replace("HTTP/1.1","").replace("HTTP/1.0","")
-            if self.log_file is not None :
-                self.log_file.error("Client error : %s",error.replace("\n","").replace("\r",""))
-            raise ConnectRequestError("Caster Response :"  + error)
+        self.check_connect_response(response)
+        self.initial_data = self.decode(response.partition("\r\n\r\n")[2].encode(encoding='ISO-8859-1'))
 
-    def _send_request(self, request : str):
+    def _send_bytes(self, data : bytes):
         try:
-            self.socket.sendall(request.encode())
+            if self.transport is not None :
+                self.transport.write(data)
+            else :
+                self.socket.sendall(data)
         except Exception as e:
             raise SendRequestError(e) from e
 
@@ -240,7 +471,7 @@ class NtripClient:
                 if not data:
                     break
                 response += data.decode(encoding='ISO-8859-1')
-                if "\r\n\r\n" in response and "sourcetable" not in response :
+                if "\r\n\r\n" in response and "sourcetable" not in response.lower() :
                     break
             except Exception as e :
                 raise ReceiveRequestError(e) from e
@@ -276,8 +507,13 @@ class NtripClient:
         """Close current ntrip connection
         """
         try:
-            self.socket.close()
+            if self.transport is not None :
+                self.transport.close()
+                self.transport = None
+            if self.socket is not None :
+                self.socket.close()
             self.connected = False
+            self._last_gga_time = None
         except Exception as e:
             raise ClosingError("Error while clossing the socket") from e
         
@@ -0,0 +1,246 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import base64
+import logging
+import select
+import socket
+import ssl
+from .ChunkedDecoder import encode_chunk
+from .NtripSettings import NtripSettings
+from ..constants import DEFAULTLOGFILELOGGER
+
+# Seconds to wait for the caster before the connection is considered lost
+SEND_TIMEOUT = 5
+# Number of unanswered keepalive probes before the connection is closed
+KEEPALIVE_PROBES = 3
+
+class NtripServerError(Exception):
+    """Raised when a error with the NTRIP Server
+    """
+    def __init__(self, message, error_code=None):
+        super().__init__(message)
+        self.error_code = error_code
+
+class SourceRequestError(NtripServerError):
+    """The caster refused the mountpoint upload
+    """
+
+class SendDataError(NtripServerError):
+    """Error while sending data to NTRIP Caster
+    """
+
+class ConnectionClosedError(NtripServerError):
+    """The NTRIP Caster closed the connection
+    """
+
+def enable_keepalive(connection : socket.socket , idle : int):
+    """
+    Enable the TCP keepalive on the connection : probes are sent after idle seconds without traffic
+    and the connection is closed when KEEPALIVE_PROBES probes are not answered
+    """
+    if idle <= 0 :
+        return
+    interval = max(1, idle // KEEPALIVE_PROBES)
+    connection.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if hasattr(socket, "TCP_KEEPIDLE") :
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+    elif hasattr(socket, "TCP_KEEPALIVE") :
+        # macOS
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+    if hasattr(socket, "TCP_KEEPINTVL") :
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+    if hasattr(socket, "TCP_KEEPCNT") :
+        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_PROBES)
+
+class NtripServer:
+    """
+    NTRIP server : upload a data stream to a mountpoint of a NTRIP caster.
+    The upload is opened with a SOURCE request (NTRIP 1.0) or a POST request (NTRIP 2.0) ,
+    in NTRIP 2.0 the data is sent with a chunked transfer encoding
+    """
+
+    def __init__(self, ntrip_settings : NtripSettings = None , debug_logging : bool = False) -> None:
+        self.ntrip_settings : NtripSettings = ntrip_settings if ntrip_settings is not None else NtripSettings()
+        self.socket = None
+        self.connected : bool = False
+        # Set when the connection has to be ended with the last chunk (NTRIP 2.0)
+        self.chunked : bool = False
+        if debug_logging :
+            self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
+        else :
+            self.log_file = None
+
+    def connect(self):
+        """
+        Open the connection with the caster and request the upload of the mountpoint
+
+        Raises:
+            NtripSettingsException: the connection with the caster failed
+            NtripServerError: the caster refused the upload
+        """
+        if self.log_file is not None :
+            self.log_file.debug("Create NTRIP Server socket")
+        self.socket = self.ntrip_settings.connect()
+        try :
+            self.socket.settimeout(SEND_TIMEOUT)
+            # The pending data is already coalesced before each write
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            enable_keepalive(self.socket, self.ntrip_settings.keepalive)
+            self._send_bytes(self.get_source_request().encode(encoding='ISO-8859-1'))
+            self.check_source_response(self._receive_response())
+        except (NtripServerError, OSError) as e :
+            self.close()
+            if self.log_file is not None :
+                self.log_file.error("Failed to upload to mountpoint %s : %s", self.ntrip_settings.mountpoint, e)
+            if isinstance(e, NtripServerError) :
+                raise e
+            raise SourceRequestError(e) from e
+        self.chunked = self.ntrip_settings.ntrip_version == 2
+        self.connected = True
+        if self.log_file is not None :
+            self.log_file.info("NTRIP Server uploading to %s:%s/%s", self.ntrip_settings.host, self.ntrip_settings.port, self.ntrip_settings.mountpoint)
+
+    def get_source_request(self) -> str:
+        """
+        Build the request sent to the caster to start the upload of the mountpoint
+
+        Returns:
+            str: the request
+        """
+        settings = self.ntrip_settings
+        if settings.ntrip_version == 1 :
+            # NTRIP 1.0 only authenticates the source with a password
+            request = f"SOURCE {settings.password} /{settings.mountpoint}\r\n"
+            request += "Source-Agent: NTRIP pydatalink Server\r\n"
+            request += "\r\n"
+            return request
+        request = f"POST /{settings.mountpoint} HTTP/1.1\r\n"
+        request += f"Host: {settings.host}:{settings.port}\r\n"
+        request += "Ntrip-Version: Ntrip/2.0\r\n"
+        request += "User-Agent: NTRIP pydatalink Server\r\n"
+        if settings.auth :
+            request += "Authorization: Basic " + base64.b64encode((settings.username + ":" + settings.password).encode()).decode() + "\r\n"
+        request += "Connection: close\r\n"
+        request += "Transfer-Encoding: chunked\r\n"
+        request += "\r\n"
+        return request
+
+    def check_source_response(self, response : str):
+        """
+        Check the caster response to the source request
+
+        Raises:
+            SourceRequestError: the caster refused the upload
+        """
+        status = response.split("\r\n")[0].strip()
+        if status.startswith("ICY 200") or (status.startswith("HTTP/1.") and " 200" in status) :
+            return
+        if self.log_file is not None :
+            self.log_file.error("Upload refused by the caster : %s", status)
+        raise SourceRequestError("Caster Response : " + (status if len(status) != 0 else "connection closed"))
+
+    def send(self, data : bytes) -> int:
+        """
+        Send the data to the caster with a single write
+
+        Raises:
+            SendDataError: the data couldn't be sent
+
+        Returns:
+            int: number of data bytes sent
+        """
+        if len(data) == 0 :
+            return 0
+        self._send_bytes(encode_chunk(data) if self.chunked else data)
+        return len(data)
+
+    def poll(self) -> int:
+        """
+        Read without waiting what the caster sent on the connection , the data is dropped
+
+        Raises:
+            ConnectionClosedError: the caster closed the connection
+
+        Returns:
+            int: number of bytes read
+        """
+        pending = self.socket.pending() if isinstance(self.socket, ssl.SSLSocket) else 0
+        if pending == 0 :
+            readable , _ , _ = select.select([self.socket], [], [], 0)
+            if len(readable) == 0 :
+                return 0
+        try :
+            data = self.socket.recv(4096)
+        except (ssl.SSLWantReadError, BlockingIOError, socket.timeout) :
+            return 0
+        except OSError as e :
+            raise ConnectionClosedError(e) from e
+        if len(data) == 0 :
+            raise ConnectionClosedError("connection closed by the NTRIP caster")
+        if self.log_file is not None :
+            self.log_file.debug("Data received from the caster : %s", data[:64])
+        return len(data)
+
+    def _send_bytes(self, data : bytes):
+        try :
+            self.socket.sendall(data)
+        except Exception as e :
+            raise SendDataError(e) from e
+
+    def _receive_response(self) -> str:
+        # A NTRIP 1.0 caster only answers a status line , a NTRIP 2.0 caster a full header
+        response = ""
+        while True :
+            data = self.socket.recv(4096)
+            if not data :
+                break
+            response += data.decode(encoding='ISO-8859-1')
+            if "\r\n\r\n" in response or (not response.startswith("HTTP/") and "\r\n" in response) :
+                break
+        return response
+
+    def close(self):
+        """Close the upload , the last chunk is sent first in NTRIP 2.0
+        """
+        if self.socket is None :
+            return
+        try :
+            if self.connected and self.chunked :
+                self.socket.sendall(b"0\r\n\r\n")
+        except OSError :
+            pass
+        try :
+            self.socket.close()
+        except OSError as e :
+            raise NtripServerError("Error while closing the socket") from e
+        finally :
+            self.socket = None
+            self.connected = False
+            self.chunked = False
@@ -30,9 +30,12 @@
 import socket
 import ssl
 import logging
-from .NtripSourceTable import NtripSourceTable
+from .NtripSourceTable import NtripSourceTable, NtripCaster, NtripNetwork
 from ..constants import DEFAULTLOGFILELOGGER
 
+DEFAULT_GGA_INTERVAL = 10
+DEFAULT_KEEPALIVE = 30
+
 class NtripSettingsException(Exception):
     """
         Exception class for ntrip settings 
@@ -85,8 +88,14 @@ class NtripSettings:
         self.latitude : float = latitude
         self.longitude : float = longitude
         self.height : int = height
+        # Minimum number of seconds between two GGA sentences sent to the caster
+        self.gga_interval : float = DEFAULT_GGA_INTERVAL
+        # Idle seconds before TCP keepalive probes are sent on an upload connection , 0 to disable them
+        self.keepalive : int = DEFAULT_KEEPALIVE
 
         self.source_table : list[NtripSourceTable] = []
+        self.casters : list[NtripCaster] = []
+        self.networks : list[NtripNetwork] = []
 
         # Support Log
         if debug_logging :
@@ -106,11 +115,7 @@ class NtripSettings:
             if self.log_file is not None :
                 self.log_file.info("Openning tls socket connection with : %s : %s",self.host ,self.port)
             ntrip_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            if self.cert != "":
-                context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-                context.load_verify_locations(self.cert)
-            else :
-                context = ssl.create_default_context()
+            context = self.get_ssl_context()
             wrapped_socket = context.wrap_socket(ntrip_socket, server_hostname=self.host)
             wrapped_socket.settimeout(0.5)
             try:
@@ -138,6 +143,20 @@ class NtripSettings:
                 raise ConnectFailedError("Failed to open communication socket") from e
 
 
+    def get_ssl_context(self) -> ssl.SSLContext :
+        """
+        Create the TLS context used to connect to the caster
+
+        Returns:
+            ssl.SSLContext: the context , using the given certificate if any
+        """
+        if self.cert != "":
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+            context.load_verify_locations(self.cert)
+        else :
+            context = ssl.create_default_context()
+        return context
+
     def set_host(self, new_host : str):
         """
         Sets the host IP address.
@@ -192,6 +211,26 @@ class NtripSettings:
         """
         self.password = new_password
 
+    def set_caster(self, caster : "NtripSettings", source_table : list[NtripSourceTable], mountpoint : str):
+        """
+        Sets the caster and the mountpoint in one step.
+        
+        Args:
+            caster (NtripSettings): The settings of the new caster.
+            source_table (list[NtripSourceTable]): The source table of the new caster.
+            mountpoint (str): The new mountpoint.
+        """
+        self.host = caster.host
+        self.port = caster.port
+        self.tls = caster.tls
+        self.auth = caster.auth
+        self.username = caster.username
+        self.password = caster.password
+        self.source_table = source_table
+        self.casters = caster.casters
+        self.networks = caster.networks
+        self.mountpoint = mountpoint
+
     def set_fixed_pos(self, new_fixed_pos : bool):
         """
         Sets the fixed position.
@@ -269,6 +308,36 @@ class NtripSettings:
             new_height (int): The new height.
         """
         self.height = new_height
+
+    def set_gga_interval(self, new_gga_interval : float):
+        """
+        Sets the minimum interval between two GGA sentences sent to the caster.
+
+        Args:
+            new_gga_interval (float): The new interval in seconds , 0 to send every sentence.
+        """
+        self.gga_interval = max(0.0, float(new_gga_interval))
+
+    def set_keepalive(self, new_keepalive : int):
+        """
+        Sets the idle time before TCP keepalive probes are sent to the caster.
+
+        Args:
+            new_keepalive (int): The new idle time in seconds , 0 to disable the keepalive.
+        """
+        self.keepalive = max(0, int(new_keepalive))
+
+    def set_ntrip_version(self, new_ntrip_version : int):
+        """
+        Sets the NTRIP version used with the caster.
+
+        Args:
+            new_ntrip_version (int): 1 or 2.
+        """
+        if new_ntrip_version not in (1, 2) :
+            raise NtripSettingsException(f"Invalid NTRIP version : {new_ntrip_version}")
+        self.ntrip_version = new_ntrip_version
+
     def to_string(self) ->str :
         """Return settings as a single string
         """
@@ -45,7 +45,35 @@ class Authentication(Enum):
 class Fee(Enum) :
     N = "No user fee"
     Y = "Usage is charged"
+
+def _to_float(value : str) -> float:
+    try :
+        return float(value)
+    except ValueError :
+        return None
+
+def _to_int(value : str) -> int:
+    try :
+        return int(value)
+    except ValueError :
+        return None
+
+def _to_enum(enum_type, value):
+    try :
+        return enum_type(value)
+    except ValueError :
+        return None
+
+def _field(fields : list[str], index : int) -> str:
+    return fields[index] if index < len(fields) else ""
+
 class NtripSourceTable :
+    """
+    STR record of a source table : a mountpoint of the caster
+    """
+    __slots__ = ("mountpoint", "identifier", "ntrip_format", "format_detail", "carrier", "nav_system",
+                 "network", "country", "latitude", "longitude", "nmea", "solution", "generator",
+                 "compr_encryp", "authentification", "fee", "bitrate", "misc")
 
     def __init__(self,mountpoint : str = None ,identifier : str = None , ntrip_format :str = None , format_detail : str = None ) -> None:
 
@@ -53,17 +81,157 @@ class NtripSourceTable :
         self.identifier :str = identifier
         self.ntrip_format : str = ntrip_format
         self.format_detail : str = format_detail
-        self.carrier : Carrier
-        self.nav_system : str
-        self.network :str
-        self.country :str
-        self.latitude : float
-        self.longitude : float
-        self.nmea :str
-        self.solution : Solution
-        self.generator : str
-        self.compr_encryp :str
-        self.authentification : Authentication
-        self.fee : Fee
-        self.bitrate :str
-        self.misc :str
+        self.carrier : Carrier = None
+        self.nav_system : str = None
+        self.network :str = None
+        self.country :str = None
+        self.latitude : float = None
+        self.longitude : float = None
+        self.nmea : bool = False
+        self.solution : Solution = None
+        self.generator : str = None
+        self.compr_encryp :str = None
+        self.authentification : Authentication = None
+        self.fee : Fee = None
+        self.bitrate : int = None
+        self.misc :str = None
+
+    @classmethod
+    def from_fields(cls, fields : list[str]):
+        """
+        Create the record from the fields of a STR line , the "STR" field excluded
+        """
+        source = cls(_field(fields, 0), _field(fields, 1), _field(fields, 2), _field(fields, 3))
+        source.carrier = _to_enum(Carrier, _to_int(_field(fields, 4)))
+        source.nav_system = _field(fields, 5)
+        source.network = _field(fields, 6)
+        source.country = _field(fields, 7)
+        source.latitude = _to_float(_field(fields, 8))
+        source.longitude = _to_float(_field(fields, 9))
+        source.nmea = _field(fields, 10) == "1"
+        source.solution = _to_enum(Solution, _to_int(_field(fields, 11)))
+        source.generator = _field(fields, 12)
+        source.compr_encryp = _field(fields, 13)
+        source.authentification = _to_enum(Authentication, _field(fields, 14))
+        source.fee = Fee.__members__.get(_field(fields, 15))
+        source.bitrate = _to_int(_field(fields, 16))
+        # The misc field is free text and can contain separators
+        source.misc = ";".join(fields[17:])
+        return source
+
+class NtripCaster :
+    """
+    CAS record of a source table : a caster known by the caster
+    """
+    __slots__ = ("host", "port", "identifier", "operator", "nmea", "country", "latitude", "longitude",
+                 "fallback_host", "fallback_port", "misc")
+
+    def __init__(self, host : str = None , port : int = None , identifier : str = None , operator : str = None) -> None:
+        self.host : str = host
+        self.port : int = port
+        self.identifier : str = identifier
+        self.operator : str = operator
+        self.nmea : bool = False
+        self.country : str = None
+        self.latitude : float = None
+        self.longitude : float = None
+        self.fallback_host : str = None
+        self.fallback_port : int = None
+        self.misc : str = None
+
+    @classmethod
+    def from_fields(cls, fields : list[str]):
+        """
+        Create the record from the fields of a CAS line , the "CAS" field excluded
+        """
+        caster = cls(_field(fields, 0), _to_int(_field(fields, 1)), _field(fields, 2), _field(fields, 3))
+        caster.nmea = _field(fields, 4) == "1"
+        caster.country = _field(fields, 5)
+        caster.latitude = _to_float(_field(fields, 6))
+        caster.longitude = _to_float(_field(fields, 7))
+        caster.fallback_host = _field(fields, 8)
+        caster.fallback_port = _to_int(_field(fields, 9))
+        caster.misc = ";".join(fields[10:])
+        return caster
+
+class NtripNetwork :
+    """
+    NET record of a source table : a network of stations
+    """
+    __slots__ = ("identifier", "operator", "authentification", "fee", "web_net", "web_str", "web_reg", "misc")
+
+    def __init__(self, identifier : str = None , operator : str = None) -> None:
+        self.identifier : str = identifier
+        self.operator : str = operator
+        self.authentification : Authentication = None
+        self.fee : Fee = None
+        self.web_net : str = None
+        self.web_str : str = None
+        self.web_reg : str = None
+        self.misc : str = None
+
+    @classmethod
+    def from_fields(cls, fields : list[str]):
+        """
+        Create the record from the fields of a NET line , the "NET" field excluded
+        """
+        network = cls(_field(fields, 0), _field(fields, 1))
+        network.authentification = _to_enum(Authentication, _field(fields, 2))
+        network.fee = Fee.__members__.get(_field(fields, 3))
+        network.web_net = _field(fields, 4)
+        network.web_str = _field(fields, 5)
+        network.web_reg = _field(fields, 6)
+        network.misc = ";".join(fields[7:])
+        return network
+
+class SourceTableParser :
+    """
+    Incremental source table parser , the body of the caster answer is given as it's received
+    and every complete line is parsed at once , so the table never has to be held as a single string
+    """
+
+    def __init__(self) -> None:
+        self.sources : list[NtripSourceTable] = []
+        self.casters : list[NtripCaster] = []
+        self.networks : list[NtripNetwork] = []
+        self.complete : bool = False
+        self._buffer = bytearray()
+
+    def feed(self, data : bytes):
+        """
+        Parse the complete lines of the received data , the last partial line is kept for the next call
+        """
+        if self.complete :
+            return
+        self._buffer += data
+        end = self._buffer.rfind(b"\n")
+        if end == -1 :
+            return
+        lines = self._buffer[:end].split(b"\n")
+        del self._buffer[:end + 1]
+        for line in lines :
+            self._parse_line(line)
+            if self.complete :
+                self._buffer.clear()
+                return
+
+    def close(self):
+        """
+        Parse the last line if the table didn't end with a line break
+        """
+        if len(self._buffer) != 0 and not self.complete :
+            self._parse_line(bytes(self._buffer))
+        self._buffer.clear()
+
+    def _parse_line(self, line : bytes):
+        line = line.rstrip(b"\r")
+        match line[:4] :
+            case b"STR;" :
+                self.sources.append(NtripSourceTable.from_fields(line[4:].decode(encoding='ISO-8859-1').split(";")))
+            case b"CAS;" :
+                self.casters.append(NtripCaster.from_fields(line[4:].decode(encoding='ISO-8859-1').split(";")))
+            case b"NET;" :
+                self.networks.append(NtripNetwork.from_fields(line[4:].decode(encoding='ISO-8859-1').split(";")))
+            case _ :
+                if line.strip() == b"ENDSOURCETABLE" :
+                    self.complete = True
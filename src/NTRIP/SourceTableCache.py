@@ -0,0 +1,162 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import json
+import os
+import threading
+import time
+
+from ..constants import SOURCETABLESPATH
+
+DEFAULT_SOURCE_TABLE_TTL = 3600
+
+class SourceTableEntry:
+    """
+    Source table of a caster as it was received , with the validators returned by the caster
+    """
+
+    def __init__(self, host : str , port : int , tls : bool , table : str ,
+                 fetch_time : float = None , etag : str = None , last_modified : str = None) -> None:
+        self.host : str = host
+        self.port : int = port
+        self.tls : bool = tls
+        self.table : str = table
+        self.fetch_time : float = fetch_time if fetch_time is not None else time.time()
+        self.etag : str = etag
+        self.last_modified : str = last_modified
+        # Parsed source table (SourceTableParser) , filled by the NTRIP client the first time it's needed
+        self.parsed = None
+
+    def age(self) -> float:
+        """
+        Return the number of seconds since the table has been received or validated by the caster
+        """
+        return time.time() - self.fetch_time
+
+    def to_dict(self) -> dict:
+        """
+        Return the entry as a dictionary that can be saved in a json file
+        """
+        return {"host" : self.host , "port" : self.port , "tls" : self.tls , "fetch_time" : self.fetch_time ,
+                "etag" : self.etag , "last_modified" : self.last_modified , "table" : self.table}
+
+    @classmethod
+    def from_dict(cls, values : dict):
+        """
+        Create an entry from a dictionary created by to_dict()
+        """
+        return cls(values["host"], int(values["port"]), bool(values["tls"]), values["table"],
+                   float(values["fetch_time"]), values.get("etag"), values.get("last_modified"))
+
+class SourceTableCache:
+    """
+    Cache of the source tables received from the NTRIP casters.
+    A table is identified by the host , the port and the use of TLS ,
+    it's kept in memory and saved in a json file so that it's available when the application starts again.
+    A table older than the ttl has to be validated by the caster before being used again
+    """
+
+    def __init__(self, directory : str = SOURCETABLESPATH , ttl : float = DEFAULT_SOURCE_TABLE_TTL) -> None:
+        self.directory : str = directory
+        self.ttl : float = ttl
+        self._entries : dict[tuple, SourceTableEntry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host : str , port : int , tls : bool) -> SourceTableEntry:
+        """
+        Return the cached source table of a caster , None if it has never been received
+        """
+        key = (host.lower(), port, tls)
+        with self._lock :
+            entry = self._entries.get(key)
+            if entry is None :
+                entry = self._load(key)
+                if entry is not None :
+                    self._entries[key] = entry
+            return entry
+
+    def is_fresh(self, entry : SourceTableEntry) -> bool:
+        """
+        Return True if the table can be used without asking the caster
+        """
+        return entry is not None and 0 <= entry.age() < self.ttl
+
+    def put(self, entry : SourceTableEntry):
+        """
+        Add or replace the source table of a caster
+        """
+        key = (entry.host.lower(), entry.port, entry.tls)
+        with self._lock :
+            self._entries[key] = entry
+            self._save(key, entry)
+
+    def validate(self, entry : SourceTableEntry):
+        """
+        Mark a cached table as still valid , the caster answered that it didn't change
+        """
+        entry.fetch_time = time.time()
+        self.put(entry)
+
+    def invalidate(self, host : str , port : int , tls : bool):
+        """
+        Remove the source table of a caster from the cache
+        """
+        key = (host.lower(), port, tls)
+        with self._lock :
+            self._entries.pop(key, None)
+            try :
+                os.remove(self._file_name(key))
+            except OSError :
+                pass
+
+    def _file_name(self, key : tuple) -> str:
+        host , port , tls = key
+        safe_host = "".join(character if character.isalnum() or character in "-." else "_" for character in host)
+        return os.path.join(self.directory, f"{safe_host}_{port}{'_tls' if tls else ''}.json")
+
+    def _load(self, key : tuple) -> SourceTableEntry:
+        try :
+            with open(self._file_name(key), "r", encoding="utf-8") as cache_file :
+                return SourceTableEntry.from_dict(json.load(cache_file))
+        except (OSError, ValueError, KeyError, TypeError) :
+            return None
+
+    def _save(self, key : tuple, entry : SourceTableEntry):
+        # The file is replaced at once so that a reader never sees a partial table
+        file_name = self._file_name(key)
+        try :
+            os.makedirs(self.directory, exist_ok=True)
+            with open(file_name + ".tmp", "w", encoding="utf-8") as cache_file :
+                json.dump(entry.to_dict(), cache_file)
+            os.replace(file_name + ".tmp", file_name)
+        except OSError :
+            pass
+
+# Shared by every NTRIP client of the application
+SOURCE_TABLE_CACHE = SourceTableCache()
@@ -1,3 +1,5 @@
 from .NtripClient import NtripClient
 from .NtripSettings import NtripSettings
-from .NtripSourceTable import NtripSourceTable
\ No newline at end of file
+from .NtripSourceTable import NtripSourceTable
+from .MountpointIndex import MountpointIndex
+from .NtripServer import NtripServer
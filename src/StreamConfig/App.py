@@ -27,13 +27,17 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+import asyncio
 import configparser
 from enum import Enum
 import queue
 
 from ..NTRIP.NtripClient import NtripClientError
-from .Preferences import Preferences
+from .Preferences import Preferences , EngineType
 from .Stream import Stream
+from .LinkQueue import LinkQueue
+from .SelectorEngine import SelectorEngine
+from .AsyncioEngine import AsyncioEngine
 from ..Configuration import SaveConfiguration , CommandLineConfiguration , FileConfiguration
 
 
@@ -70,7 +74,7 @@ class App :
     def __init__(self,max_stream : int = 6, config_file :str = "" ,
                  stream_settings_list : list[str] = None ,
                  configuration_type : ConfigurationType = ConfigurationType.DEFAULT ,
-                 debug_logging : bool = False):
+                 debug_logging : bool = False , engine_type : EngineType = None):
 
         self.preferences : Preferences = Preferences()
         self.max_stream :int  = max_stream
@@ -80,15 +84,21 @@ class App :
         self.linked_data : list[queue.Queue] = []
         self.debug_logging : bool = debug_logging 
         self.configuration_type : ConfigurationType = configuration_type
+        self.engine_type : EngineType = engine_type
+        self.io_engine : SelectorEngine | AsyncioEngine = None
 
         for i in range (self.max_stream) :
-            self.linked_data.append(queue.Queue())
+            self.linked_data.append(LinkQueue())
 
         for i in range(self.max_stream):
             new_port = Stream(i ,self.linked_data , debug_logging=debug_logging )
             self.stream_list.append(new_port)
 
         self.preferences = Preferences(self.max_stream)
+        if engine_type is not None :
+            self.preferences.engine_type = engine_type
+        if configuration_type != ConfigurationType.FILE:
+            self.setup_io_engine()
 
         if configuration_type != ConfigurationType.DEFAULT:
             self.configure_app( configuration_type)
@@ -118,6 +128,9 @@ class App :
                             if next_stream_id < self.max_stream :
                                 FileConfiguration.conf_file_config(self.stream_list[next_stream_id],config[key])
                                 next_stream_id +=1
+                    if self.engine_type is not None :
+                        self.preferences.engine_type = self.engine_type
+                    self.setup_io_engine()
                     for port_id, value  in enumerate(self.preferences.connect):
                         if port_id < self.max_stream:
                             self.stream_list[port_id].set_line_termination(self.preferences.line_termination)
@@ -133,7 +146,7 @@ class App :
             iterator = 0
             for stream in self.stream_settings_list :
                 stream_type = stream.split("://")[0]
-                if stream_type.lower() in ["udp","udpspe","tcpcli","tcpsrv","serial","ntrip"]:
+                if stream_type.lower() in ["udp","udpspe","tcpcli","tcpsrv","serial","udpmc","udpbc","ntrip","file","caster","ntripsrv"]:
                     try :
                         CommandLineConfiguration.command_line_config(self.stream_list[iterator],stream)
                         iterator += 1
@@ -145,6 +158,51 @@ class App :
                     raise InvalidStreamTypeException(f" {stream_type} is not a valid stream type")
 
 
+    def setup_io_engine(self):
+        """
+        Start the I/O engine selected in the preferences and attach it to every stream.
+        With the thread engine each stream runs in its own thread
+        """
+        if self.io_engine is not None :
+            self.io_engine.stop()
+            self.io_engine = None
+        if self.preferences.engine_type == EngineType.SELECTOR :
+            self.io_engine = SelectorEngine(debug_logging=self.debug_logging)
+            self.io_engine.start()
+        elif self.preferences.engine_type == EngineType.ASYNCIO :
+            self.io_engine = AsyncioEngine(debug_logging=self.debug_logging)
+            self.io_engine.start()
+        for link_queue in self.linked_data :
+            link_queue.set_listener(None if self.io_engine is None else self.io_engine.wakeup)
+            # The engine thread can't wait for itself to consume the data
+            link_queue.can_block = self.io_engine is None
+        for stream in self.stream_list :
+            stream.io_engine = self.io_engine
+
+    async def connect_all_async(self):
+        """
+        Connect concurrently every stream selected in the preferences on the asyncio engine loop.
+        Must be awaited on the engine loop
+
+        Returns:
+            list: the result of each connection , an exception if the connection failed
+        """
+        streams = [stream for stream_id , stream in enumerate(self.stream_list)
+                   if stream_id < len(self.preferences.connect) and self.preferences.connect[stream_id]]
+        results = await asyncio.gather(*[stream.connect_async() for stream in streams], return_exceptions=True)
+        for stream , result in zip(streams, results):
+            if isinstance(result, Exception):
+                stream.startup_error = f"Stream couldn't start properly : \n {result}"
+        return results
+
+    async def disconnect_all_async(self):
+        """
+        Disconnect every connected stream on the asyncio engine loop
+        """
+        for stream in self.stream_list:
+            if stream.is_connected():
+                await stream.disconnect_async()
+
     def close_all(self):
         """
         Close every Stream that are still connected
@@ -154,7 +212,12 @@ class App :
 
             SaveConfiguration.create_conf_file(self)
         for port in self.stream_list:
+            # A stream waiting to be reconnected must not be connected again
+            port.supervisor.cancel()
             if port.is_connected() :
                 port.disconnect()
+        if self.io_engine is not None :
+            self.io_engine.stop()
+            self.io_engine = None
         self.linked_data.clear()
         self.stream_list.clear()
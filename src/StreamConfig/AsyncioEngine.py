@@ -0,0 +1,412 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import logging
+import threading
+
+from ..constants import DEFAULTLOGFILELOGGER
+from ..NTRIP.ChunkedDecoder import ChunkedDecoder, ChunkedEncodingError, is_chunked
+from ..NTRIP.NtripServer import NtripServer
+from .FileReplay import FileReplay
+from .NtripCaster import NtripCaster
+
+class AsyncioEngineException(Exception):
+    """
+        Exception class for the asyncio engine
+    """
+    def __init__(self, message, error_code = None):
+        super().__init__(message)
+        self.error_code = error_code
+
+class EngineNotRunningError(AsyncioEngineException):
+    """Raised when the engine loop is not running
+    """
+
+class NtripResponseError(AsyncioEngineException):
+    """Raised when the NTRIP caster closed the connection
+    """
+
+class AsyncioEngine:
+    """
+    I/O engine running every stream on one asyncio event loop.
+    TCP , UDP and NTRIP streams are asyncio protocols and serial ports are read with a file descriptor reader ,
+    incoming data is forwarded to the linked streams as soon as it is received.
+    The loop runs in its own thread unless an existing loop is given
+    """
+
+    is_async = True
+
+    def __init__(self, loop : asyncio.AbstractEventLoop = None , poll_interval : float = 1.0,
+                 debug_logging : bool = False) -> None:
+
+        self.loop : asyncio.AbstractEventLoop = loop
+        self.own_loop : bool = loop is None
+        self.poll_interval : float = poll_interval
+        self.streams : list = []
+        self.thread : threading.Thread = None
+        self._readers : dict = {}
+        self._writers : dict = {}
+        self._wakeup_pending : bool = False
+        self._tick_handle = None
+        self._loop_thread_id : int = None
+
+        if debug_logging :
+            self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
+        else :
+            self.log_file = None
+
+    def start(self):
+        """
+        Start the engine loop
+        """
+        if self.is_running():
+            return
+        if self.own_loop :
+            self.loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self.thread = threading.Thread(target=self._run, args=(started,), name="AsyncioEngine", daemon=True)
+            self.thread.start()
+            started.wait()
+        else :
+            self.loop.call_soon_threadsafe(self._init_loop)
+        if self.log_file is not None :
+            self.log_file.info("Asyncio engine started")
+
+    def stop(self):
+        """
+        Disconnect every stream and stop the engine loop
+        """
+        if not self.is_running():
+            return
+        for stream in list(self.streams):
+            try :
+                stream.disconnect()
+            except Exception as e :
+                if self.log_file is not None :
+                    self.log_file.error("Asyncio engine : failed to disconnect stream %s : %s", stream.stream_id, e)
+        if self.own_loop :
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            if threading.current_thread() is not self.thread :
+                self.thread.join()
+            self.loop.close()
+            self.thread = None
+        elif self._tick_handle is not None :
+            self.loop.call_soon_threadsafe(self._tick_handle.cancel)
+        if self.log_file is not None :
+            self.log_file.info("Asyncio engine stopped")
+
+    def is_running(self) -> bool:
+        """
+        Return True if the engine loop is running
+        """
+        if self.own_loop :
+            return self.thread is not None and self.thread.is_alive()
+        return self.loop is not None and self.loop.is_running()
+
+    def in_loop(self) -> bool:
+        """
+        Return True if called from the engine loop
+        """
+        try :
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError :
+            return False
+
+    def run(self, coroutine):
+        """
+        Execute a coroutine on the engine loop and wait for its result.
+        Can't be called from the engine loop , await the coroutine instead
+
+        Raises:
+            EngineNotRunningError: the engine loop is not running
+        """
+        if not self.is_running():
+            coroutine.close()
+            raise EngineNotRunningError("Asyncio engine is not running")
+        if self.in_loop():
+            coroutine.close()
+            raise AsyncioEngineException("Can't wait for a coroutine from the engine loop")
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    def supports(self, stream) -> bool:
+        """
+        Return True if the opened stream can be handled by the engine.
+        Serial ports need a file descriptor and a loop supporting readers
+        """
+        if stream.stream is None :
+            return False
+        # A replayed file is paced by its own thread , an embedded caster serves its clients
+        # and a NTRIP server uploads to its caster from their own thread
+        if isinstance(stream.stream, (FileReplay, NtripCaster, NtripServer)):
+            return False
+        if hasattr(stream.stream, "in_waiting"):
+            return hasattr(stream.stream, "fileno") and isinstance(self.loop, asyncio.SelectorEventLoop)
+        return True
+
+    def register(self, stream):
+        """
+        Add a connected stream to the engine , must be called from the engine loop
+        """
+        if stream not in self.streams :
+            self.streams.append(stream)
+            self.wakeup()
+            if self.log_file is not None :
+                self.log_file.info("Asyncio engine : Stream %s registered", stream.stream_id)
+
+    def unregister(self, stream):
+        """
+        Remove a stream from the engine , the remaining outgoing data is sent before removing it.
+        Must be called from the engine loop
+        """
+        if stream not in self.streams :
+            return
+        self.streams.remove(stream)
+        try :
+            stream.engine_close(self)
+        finally :
+            self.remove_readers(stream)
+        if self.log_file is not None :
+            self.log_file.info("Asyncio engine : Stream %s unregistered", stream.stream_id)
+
+    def is_registered(self, stream) -> bool:
+        """
+        Return True if the stream is currently handled by the engine
+        """
+        return stream in self.streams
+
+    def call_soon(self, function, *args):
+        """
+        Execute a function in the engine loop
+        """
+        self.loop.call_soon_threadsafe(function, *args)
+
+    def add_reader(self, fileobj, stream, callback):
+        """
+        Watch a file object and call the callback when it's readable
+        """
+        self._readers[fileobj] = stream
+        self.loop.add_reader(fileobj, self._read, fileobj, stream, callback)
+
+    def remove_reader(self, fileobj):
+        """
+        Stop watching a file object
+        """
+        if self._readers.pop(fileobj, None) is not None :
+            self.loop.remove_reader(fileobj)
+        self.remove_writer(fileobj)
+
+    def add_writer(self, fileobj, stream, callback):
+        """
+        Watch a file object and call the callback when it's writable
+        """
+        self._writers[fileobj] = stream
+        self.loop.add_writer(fileobj, self._read, fileobj, stream, callback)
+
+    def remove_writer(self, fileobj):
+        """
+        Stop watching a file object for writing
+        """
+        if self._writers.pop(fileobj, None) is not None :
+            self.loop.remove_writer(fileobj)
+
+    def remove_readers(self, stream):
+        """
+        Stop watching every file object of a stream
+        """
+        for fileobj, owner in list(self._readers.items()) + list(self._writers.items()):
+            if owner is stream :
+                self.remove_reader(fileobj)
+
+    def forward(self, stream, data : bytes):
+        """
+        Forward data received by a protocol to the stream
+        """
+        if stream not in self.streams :
+            return
+        try :
+            stream._engine_forward(data)
+        except Exception as e :
+            self.fail(stream, e)
+
+    def wakeup(self):
+        """
+        Send the queued data of every stream on the next loop iteration
+        """
+        if self._wakeup_pending or self.loop is None or self.loop.is_closed():
+            return
+        self._wakeup_pending = True
+        try :
+            self.loop.call_soon_threadsafe(self._flush)
+        except RuntimeError :
+            self._wakeup_pending = False
+
+    def fail(self, stream, error : Exception):
+        """
+        Disconnect a stream after an error in one of its callbacks
+        """
+        if self.log_file is not None :
+            self.log_file.error("Stream %s %s has been disconnected, error: %s", stream.stream_id, stream.stream_type, error)
+        if stream in self.streams :
+            self.streams.remove(stream)
+        try :
+            stream.engine_close(self, flush = False)
+        except Exception :
+            pass
+        self.remove_readers(stream)
+        try :
+            stream._exception_disconnect(error)
+        except Exception :
+            pass
+
+    def _read(self, fileobj, stream, callback):
+        try :
+            callback(fileobj)
+        except Exception as e :
+            self.fail(stream, e)
+
+    def _flush(self):
+        self._wakeup_pending = False
+        for stream in list(self.streams):
+            try :
+                stream.engine_poll()
+            except Exception as e :
+                self.fail(stream, e)
+
+    def _tick(self):
+        self._flush()
+        self._tick_handle = self.loop.call_later(self.poll_interval, self._tick)
+
+    def _init_loop(self):
+        self._tick_handle = self.loop.call_later(self.poll_interval, self._tick)
+
+    def _run(self, started : threading.Event):
+        asyncio.set_event_loop(self.loop)
+        self._init_loop()
+        self.loop.call_soon(started.set)
+        self.loop.run_forever()
+
+
+class TcpProtocol(asyncio.Protocol):
+    """
+    Protocol forwarding the data received on a TCP connection to a stream
+    """
+
+    def __init__(self, engine : AsyncioEngine, stream) -> None:
+        self.engine = engine
+        self.stream = stream
+        self.transport : asyncio.Transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.stream._async_connection_made(self)
+
+    def data_received(self, data):
+        self.stream._async_data_received(self)
+        self.engine.forward(self.stream, data)
+
+    def connection_lost(self, exc):
+        self.stream._async_connection_lost(self, exc)
+
+
+class UdpProtocol(asyncio.DatagramProtocol):
+    """
+    Protocol forwarding the datagrams received on a UDP socket to a stream
+    """
+
+    def __init__(self, engine : AsyncioEngine, stream) -> None:
+        self.engine = engine
+        self.stream = stream
+        self.transport : asyncio.DatagramTransport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.stream._async_datagram_received(addr)
+        self.engine.forward(self.stream, data)
+
+    def error_received(self, exc):
+        if self.engine.log_file is not None :
+            self.engine.log_file.error("Stream %s : UDP error : %s", self.stream.stream_id, exc)
+
+
+class NtripProtocol(asyncio.Protocol):
+    """
+    Protocol sending the NTRIP request and forwarding the corrections to a stream
+    once the caster accepted the request
+    """
+
+    def __init__(self, engine : AsyncioEngine, stream , request : bytes) -> None:
+        self.engine = engine
+        self.stream = stream
+        self.request : bytes = request
+        self.transport : asyncio.Transport = None
+        self.response = bytearray()
+        self.initial_data : bytes = b""
+        self.ready : asyncio.Future = engine.loop.create_future()
+        # Set when the caster sends the corrections with a chunked transfer encoding (NTRIP 2.0)
+        self.decoder : ChunkedDecoder = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        transport.write(self.request)
+
+    def data_received(self, data):
+        if self.ready.done():
+            if self.decoder is not None :
+                try :
+                    data = self.decoder.decode(data)
+                except ChunkedEncodingError as e :
+                    self.engine.fail(self.stream, NtripResponseError(f"Invalid data from the caster : {e}"))
+                    return
+            self.engine.forward(self.stream, data)
+            return
+        self.response += data
+        header_end = self.response.find(b"\r\n\r\n")
+        if header_end == -1 :
+            return
+        header = bytes(self.response[:header_end]).decode(encoding='ISO-8859-1')
+        # Data received with the header is forwarded once the stream is registered
+        self.initial_data = bytes(self.response[header_end + 4:])
+        self.response = bytearray()
+        if is_chunked(header) :
+            self.decoder = ChunkedDecoder()
+            try :
+                self.initial_data = self.decoder.decode(self.initial_data)
+            except ChunkedEncodingError as e :
+                self.ready.set_exception(NtripResponseError(f"Invalid data from the caster : {e}"))
+                return
+        self.ready.set_result(header)
+
+    def connection_lost(self, exc):
+        if not self.ready.done():
+            self.ready.set_exception(NtripResponseError(f"Connection closed by the caster : {exc}"))
+        elif self.engine.is_registered(self.stream):
+            self.engine.fail(self.stream, NtripResponseError(f"Connection closed by the caster : {exc}"))
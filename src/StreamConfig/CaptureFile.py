@@ -0,0 +1,223 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import bisect
+import gzip
+import mmap
+import os
+import struct
+from enum import Enum
+
+try :
+    import zstandard
+except ImportError :
+    zstandard = None
+
+CAPTURE_MAGIC = b"PYDLCAP\x00"
+CAPTURE_VERSION = 1
+CAPTURE_HEADER = struct.Struct("<8sHHI")
+# monotonic time (ns) , wall-clock time (ns) , stream id , direction , length of the data
+RECORD_HEADER = struct.Struct("<QqHBxI")
+INDEX_MAGIC = b"PYDLIDX\x00"
+INDEX_HEADER = struct.Struct("<8sHHI")
+# wall-clock time (ns) , monotonic time (ns) , offset of the record in the capture file
+INDEX_ENTRY = struct.Struct("<qQQ")
+DEFAULT_INDEX_INTERVAL = 1.0
+
+class CaptureFileException(Exception):
+    """
+    Raised when a capture file or its index is not valid
+    """
+
+class LogFormat(Enum):
+    """
+    Format of the logging file of a stream
+    """
+    # The raw data
+    RAW = 0
+    # Every chunk is recorded with its time , stream id and direction , with a time index next to the file
+    TIMESTAMPED = 1
+
+class Direction(Enum):
+    INCOMING = 0
+    OUTGOING = 1
+
+class CaptureRecord:
+    """
+    A chunk of data recorded in a capture file
+    """
+    __slots__ = ("monotonic_time", "wall_time", "stream_id", "direction", "data", "offset")
+
+    def __init__(self, monotonic_time : int , wall_time : int , stream_id : int , direction : Direction , data , offset : int) -> None:
+        self.monotonic_time : int = monotonic_time
+        self.wall_time : int = wall_time
+        self.stream_id : int = stream_id
+        self.direction : Direction = direction
+        self.data = data
+        self.offset : int = offset
+
+def capture_file_header(stream_id : int) -> bytes:
+    return CAPTURE_HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, 0, stream_id)
+
+def index_file_header(stream_id : int) -> bytes:
+    return INDEX_HEADER.pack(INDEX_MAGIC, CAPTURE_VERSION, 0, stream_id)
+
+def index_file_name(capture_file_name : str) -> str:
+    # A compressed segment keeps the index written next to it before the compression
+    return capture_file_name.removesuffix(".gz").removesuffix(".zst") + ".idx"
+
+def open_log_file(file_name : str):
+    """
+    Open a logging file for reading , a segment compressed by the log rotation is decompressed
+
+    Raises:
+        CaptureFileException: the file is compressed with zstandard which is not installed
+    """
+    if file_name.endswith(".gz") :
+        return gzip.open(file_name, "rb")
+    if file_name.endswith(".zst") :
+        if zstandard is None :
+            raise CaptureFileException("zstandard is not installed")
+        return zstandard.ZstdDecompressor().stream_reader(open(file_name, "rb"), closefd=True)
+    return open(file_name, "rb")
+
+def is_compressed(file_name : str) -> bool:
+    return file_name.endswith((".gz", ".zst"))
+
+class CaptureReader:
+    """
+    Read a timestamped capture file through a memory map.
+    The index file , when present , is used to find the first record after a time without reading the whole capture.
+    A compressed segment is decompressed in memory first : the offsets of its index are offsets in the uncompressed data
+    """
+
+    def __init__(self, file_name : str) -> None:
+        self.file_name : str = file_name
+        self._file = None
+        self._map : mmap.mmap = None
+        self._index = None
+        self._index_map : mmap.mmap = None
+        self.stream_id : int = None
+
+    def open(self):
+        """
+        Map the capture file and its index
+
+        Raises:
+            CaptureFileException: the file is not a capture file
+        """
+        try :
+            if is_compressed(self.file_name) :
+                with open_log_file(self.file_name) as file :
+                    self._map = file.read()
+                if len(self._map) < CAPTURE_HEADER.size :
+                    raise CaptureFileException(f"{self.file_name} is not a capture file")
+            else :
+                self._file = open(self.file_name, "rb")
+                if os.path.getsize(self.file_name) < CAPTURE_HEADER.size :
+                    raise CaptureFileException(f"{self.file_name} is not a capture file")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, EOFError, ValueError) as e :
+            self.close()
+            raise CaptureFileException(e) from e
+        magic , version , _ , self.stream_id = CAPTURE_HEADER.unpack_from(self._map, 0)
+        if magic != CAPTURE_MAGIC or version != CAPTURE_VERSION :
+            self.close()
+            raise CaptureFileException(f"{self.file_name} is not a capture file")
+        index_name = index_file_name(self.file_name)
+        if os.path.exists(index_name) and os.path.getsize(index_name) > INDEX_HEADER.size :
+            self._index = open(index_name, "rb")
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        for resource in (self._index_map, self._index, self._map, self._file):
+            if resource is not None and not isinstance(resource, bytes) :
+                resource.close()
+        self._index_map = self._index = self._map = self._file = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def size(self) -> int:
+        return len(self._map)
+
+    def records(self, offset : int = CAPTURE_HEADER.size):
+        """
+        Iterate over the records from an offset
+
+        Yields:
+            CaptureRecord: the records , a truncated last record is ignored
+        """
+        end = len(self._map)
+        while offset + RECORD_HEADER.size <= end :
+            monotonic_time , wall_time , stream_id , direction , length = RECORD_HEADER.unpack_from(self._map, offset)
+            data_offset = offset + RECORD_HEADER.size
+            if data_offset + length > end :
+                return
+            yield CaptureRecord(monotonic_time, wall_time, stream_id, Direction(direction),
+                                self._map[data_offset:data_offset + length], offset)
+            offset = data_offset + length
+
+    def seek_time(self, wall_time : int) -> int:
+        """
+        Return the offset of the first record recorded at or after a wall-clock time
+
+        Args:
+            wall_time (int): time in nanoseconds since the epoch
+        """
+        offset = CAPTURE_HEADER.size
+        if self._index_map is not None :
+            count = (len(self._index_map) - INDEX_HEADER.size) // INDEX_ENTRY.size
+            times = _IndexTimes(self._index_map, count)
+            position = bisect.bisect_right(times, wall_time) - 1
+            if position >= 0 :
+                offset = INDEX_ENTRY.unpack_from(self._index_map, INDEX_HEADER.size + position * INDEX_ENTRY.size)[2]
+        for record in self.records(offset):
+            if record.wall_time >= wall_time :
+                return record.offset
+        return len(self._map)
+
+class _IndexTimes:
+    """
+    Sequence view of the times of an index file , used by bisect
+    """
+
+    def __init__(self, index_map : mmap.mmap , count : int) -> None:
+        self.index_map = index_map
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, position : int) -> int:
+        return INDEX_ENTRY.unpack_from(self.index_map, INDEX_HEADER.size + position * INDEX_ENTRY.size)[0]
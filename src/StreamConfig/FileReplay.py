@@ -0,0 +1,135 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import mmap
+import os
+
+from .CaptureFile import CaptureReader , CaptureFileException , Direction , CAPTURE_MAGIC , CAPTURE_HEADER , open_log_file , is_compressed
+
+DEFAULT_REPLAY_CHUNK_SIZE = 4096
+# Within a recording session the monotonic and wall-clock times of the records move together ,
+# a larger difference (ns) between their gaps is a new session appended to the file
+SESSION_CLOCK_TOLERANCE = 1_000_000_000
+
+class FileReplayException(Exception):
+    """
+    Raised when a file can't be replayed
+    """
+
+class FileReplay:
+    """
+    Source of a FILE stream : read a recorded file through a memory map.
+    A capture file (timestamped log format) is replayed record by record with the time of each record ,
+    only the data received by the recorded stream is replayed , from start seconds after the first record.
+    Any other file is replayed as raw data in chunks of chunk_size bytes , without timing
+    """
+
+    def __init__(self, file_name : str , chunk_size : int = DEFAULT_REPLAY_CHUNK_SIZE , start : float = 0.0) -> None:
+        self.file_name : str = file_name
+        self.chunk_size : int = chunk_size
+        self.start : float = start
+        self.capture : CaptureReader = None
+        self._file = None
+        self._map : mmap.mmap | bytes = None
+
+    def open(self):
+        """
+        Open the file
+
+        Raises:
+            FileReplayException: the file can't be read
+        """
+        try :
+            with open_log_file(self.file_name) as file :
+                is_capture = file.read(len(CAPTURE_MAGIC)) == CAPTURE_MAGIC
+            if is_capture :
+                self.capture = CaptureReader(self.file_name)
+                self.capture.open()
+            elif is_compressed(self.file_name) :
+                # A rotated log compressed by the logger is replayed decompressed , like a capture
+                with open_log_file(self.file_name) as file :
+                    self._map = file.read()
+            elif os.path.getsize(self.file_name) != 0 :
+                self._file = open(self.file_name, "rb")
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, EOFError, CaptureFileException) as e :
+            self.close()
+            raise FileReplayException(e) from e
+
+    def is_capture(self) -> bool:
+        return self.capture is not None
+
+    def chunks(self):
+        """
+        Iterate over the data of the file
+
+        Yields:
+            tuple[int | None, bytes]: time of the chunk in nanoseconds since the first one (None for raw files) and the data
+        """
+        if self.capture is not None :
+            elapsed = 0
+            previous = None
+            for record in self.capture.records(self._start_offset()):
+                if record.direction != Direction.INCOMING :
+                    continue
+                if previous is not None :
+                    gap = record.monotonic_time - previous.monotonic_time
+                    wall_gap = record.wall_time - previous.wall_time
+                    # The monotonic clock of a session appended to the file has another origin :
+                    # the pause between the sessions isn't replayed
+                    if gap >= 0 and abs(gap - wall_gap) <= SESSION_CLOCK_TOLERANCE :
+                        elapsed += gap
+                previous = record
+                yield elapsed , record.data
+        elif self._map is not None :
+            for offset in range(0, len(self._map), self.chunk_size):
+                yield None , self._map[offset:offset + self.chunk_size]
+
+    def _start_offset(self) -> int:
+        """
+        Return the offset of the first record to replay , found with the index of the capture
+        """
+        if self.start <= 0 :
+            return CAPTURE_HEADER.size
+        first_record = next(self.capture.records(), None)
+        if first_record is None :
+            return CAPTURE_HEADER.size
+        return self.capture.seek_time(first_record.wall_time + int(self.start * 1e9))
+
+    def close(self):
+        if self.capture is not None :
+            self.capture.close()
+            self.capture = None
+        if self._map is not None :
+            if not isinstance(self._map, bytes) :
+                self._map.close()
+            self._map = None
+        if self._file is not None :
+            self._file.close()
+            self._file = None
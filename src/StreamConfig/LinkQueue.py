@@ -0,0 +1,207 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import queue
+import time
+from collections import deque
+from enum import Enum
+
+DEFAULT_LINK_BUFFER_SIZE = 1024 * 1024
+
+class OverflowPolicy(Enum):
+    """
+    What to do when data is put in a full link queue
+    """
+    DROP_OLDEST = 0
+    DROP_NEWEST = 1
+    # Wait for the consumer , the newest data is dropped when the queue can't block
+    # (stream handled by an I/O engine) or when the consumer is still too slow after the timeout
+    BLOCK_PRODUCER = 2
+    # Drop the newest data and disconnect the consumer stream on its next write
+    DISCONNECT = 3
+
+class LinkQueue(queue.Queue):
+    """
+    Queue used to share data between linked streams.
+    The queue is bounded by the number of bytes waiting in it and applies an overflow policy when full ,
+    the dropped data is counted per producer stream.
+    A listener can be attached to be notified each time new data is put in the queue
+    """
+
+    def __init__(self, max_bytes : int = DEFAULT_LINK_BUFFER_SIZE,
+                 policy : OverflowPolicy = OverflowPolicy.DROP_OLDEST , block_timeout : float = 1.0) -> None:
+        super().__init__()
+        self.listener = None
+        self.max_bytes : int = max_bytes
+        self.policy : OverflowPolicy = policy
+        self.block_timeout : float = block_timeout
+        self.can_block : bool = True
+        self.overflowed : bool = False
+        self.dropped : dict[int, list[int]] = {}
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.sources : deque = deque()
+        self.size : int = 0
+
+    def _put(self, item, source : int = None):
+        self.queue.append(item)
+        self.sources.append(source)
+        self.size += len(item)
+
+    def _get(self):
+        item = self.queue.popleft()
+        self.sources.popleft()
+        self.size -= len(item)
+        return item
+
+    def set_listener(self, listener):
+        """
+        Set the function called each time new data is put in the queue
+
+        Args:
+            listener (callable | None): function without argument , None to remove it
+        """
+        self.listener = listener
+
+    def set_limit(self, max_bytes : int , policy : OverflowPolicy):
+        """
+        Set the size of the queue and the policy applied when it's full
+
+        Args:
+            max_bytes (int): maximum number of bytes waiting in the queue , 0 for no limit
+            policy (OverflowPolicy): the overflow policy
+        """
+        with self.mutex :
+            self.max_bytes = max_bytes
+            self.policy = policy
+            self.not_full.notify_all()
+
+    def put(self, item, block : bool = True, timeout : float = None, source : int = None):
+        """
+        Put an item in the queue , apply the overflow policy if the queue is full and notify the listener
+
+        Args:
+            item (bytes | str): the data
+            source (int, optional): id of the stream producing the data , used to count the dropped data
+        """
+        size = len(item)
+        with self.not_full :
+            if self.max_bytes > 0 and self.size + size > self.max_bytes :
+                if not self._make_room(size, source):
+                    self._count_drop(source, size)
+                    return
+            self._put(item, source)
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+        if self.listener is not None:
+            self.listener()
+
+    def get_with_source(self) -> tuple:
+        """
+        Remove and return the oldest item with the id of the stream that produced it , without waiting
+
+        Returns:
+            tuple[bytes, int]: the item and its source , None if the queue is empty
+        """
+        with self.not_empty :
+            if not self._qsize() :
+                return None
+            source = self.sources[0]
+            item = self._get()
+            self.not_full.notify()
+            return item , source
+
+    def get_dropped(self, source : int = None) -> tuple[int, int]:
+        """
+        Return the data dropped because the queue was full
+
+        Args:
+            source (int, optional): id of the producer stream , None for every producer
+
+        Returns:
+            tuple[int, int]: number of dropped chunks and dropped bytes
+        """
+        with self.mutex :
+            if source is not None :
+                chunks , size = self.dropped.get(source, (0, 0))
+                return chunks , size
+            return (sum(value[0] for value in self.dropped.values()),
+                    sum(value[1] for value in self.dropped.values()))
+
+    def reset_dropped(self):
+        """
+        Reset the dropped data counters and the overflow flag
+        """
+        with self.mutex :
+            self.dropped.clear()
+            self.overflowed = False
+
+    def get_size(self) -> int:
+        """
+        Return the number of bytes waiting in the queue
+        """
+        with self.mutex :
+            return self.size
+
+    def _make_room(self, size : int, source : int) -> bool:
+        # Called with the mutex held , return False if the new item has to be dropped
+        if size > self.max_bytes :
+            return False
+        match self.policy :
+            case OverflowPolicy.DROP_OLDEST :
+                while self.size + size > self.max_bytes :
+                    oldest_source = self.sources[0]
+                    oldest = self._get()
+                    self._count_drop(oldest_source, len(oldest))
+                    # An evicted item will never be processed : join() must not wait for it
+                    self.unfinished_tasks -= 1
+                    if self.unfinished_tasks == 0 :
+                        self.all_tasks_done.notify_all()
+                return True
+            case OverflowPolicy.BLOCK_PRODUCER :
+                if not self.can_block :
+                    return False
+                end_time = time.monotonic() + self.block_timeout
+                while self.size + size > self.max_bytes :
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0 :
+                        return False
+                    self.not_full.wait(remaining)
+                return True
+            case OverflowPolicy.DISCONNECT :
+                self.overflowed = True
+                return False
+            case _ :
+                return False
+
+    def _count_drop(self, source : int, size : int):
+        counter = self.dropped.setdefault(source, [0, 0])
+        counter[0] += 1
+        counter[1] += size
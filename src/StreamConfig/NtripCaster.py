@@ -0,0 +1,354 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import base64
+import hmac
+import logging
+import selectors
+import socket
+import time
+
+from .TcpClients import TcpClientGroup
+
+# A client has to send its request within this delay after connecting
+REQUEST_TIMEOUT = 10
+MAX_REQUEST_SIZE = 8192
+
+class _Request:
+    __slots__ = ("address", "buffer", "accept_time")
+
+    def __init__(self, address) -> None:
+        self.address = address
+        self.buffer = bytearray()
+        self.accept_time : float = time.monotonic()
+
+class NtripCaster:
+    """
+    Embedded NTRIP caster.
+    Each mountpoint serves the data of a local stream to its NTRIP clients (NTRIP 1 and 2) ,
+    every client of a mountpoint has its own bounded output buffer so a slow rover is disconnected
+    instead of delaying the others. A request for an unknown mountpoint is answered with the source table
+    """
+
+    def __init__(self, server : socket.socket , settings , stream_id : int = 0 ,
+                 log_file : logging.Logger = None) -> None:
+        self.server : socket.socket = server
+        self.settings = settings
+        self.stream_id : int = stream_id
+        self.log_file : logging.Logger = log_file
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(server, selectors.EVENT_READ)
+        # Written by wakeup() so that data put in the output queue is served without waiting for the poll timeout
+        self._wake_reader , self._wake_writer = socket.socketpair()
+        self._wake_reader.setblocking(False)
+        self._wake_writer.setblocking(False)
+        self._wake_pending : bool = False
+        self.selector.register(self._wake_reader, selectors.EVENT_READ)
+        self.mountpoints : dict[str, TcpClientGroup] = {}
+        self._groups_by_stream : dict[int, list[TcpClientGroup]] = {}
+        for mountpoint in settings.mountpoints :
+            group = TcpClientGroup(settings.max_clients, settings.client_buffer_size, stream_id, log_file)
+            self.mountpoints[mountpoint.name] = group
+            self._groups_by_stream.setdefault(mountpoint.stream_id, []).append(group)
+        # Connections that haven't sent their request yet
+        self._requests : dict[socket.socket, _Request] = {}
+        # Subscribed connections and the mountpoint they receive
+        self._subscriptions : dict[socket.socket, TcpClientGroup] = {}
+        # Connections closed once their answer (source table , error) is sent
+        self._answers = TcpClientGroup(0, 0, stream_id, None)
+        self._authorization : str = base64.b64encode(f"{settings.username}:{settings.password}".encode()).decode()
+        self.source_table : bytes = self._build_source_table()
+
+    def _build_source_table(self) -> bytes:
+        authentication = "B" if self.settings.auth else "N"
+        lines = [f"STR;{mountpoint.name};{mountpoint.name};{mountpoint.ntrip_format};;0;;PyDatalink;;"
+                 f"{mountpoint.latitude:.2f};{mountpoint.longitude:.2f};0;0;PyDatalink;none;{authentication};N;0;"
+                 for mountpoint in self.settings.mountpoints]
+        lines.append("ENDSOURCETABLE")
+        return ("\r\n".join(lines) + "\r\n").encode(encoding='ISO-8859-1')
+
+    def get_client_count(self) -> dict[str, int]:
+        """
+        Return the number of clients of each mountpoint
+        """
+        return {name : len(group) for name , group in self.mountpoints.items()}
+
+    def wakeup(self):
+        """
+        Interrupt the current poll() , can be called from any thread
+        """
+        if self._wake_pending :
+            return
+        self._wake_pending = True
+        try :
+            self._wake_writer.send(b"\0")
+        except OSError :
+            pass
+
+    def poll(self, timeout : float) -> int:
+        """
+        Wait for the clients and serve them : accept the connections , answer the requests and send the buffered data
+
+        Returns:
+            int: number of bytes received from the clients
+        """
+        received = 0
+        for key , events in self.selector.select(timeout):
+            connection = key.fileobj
+            if connection is self.server :
+                self._accept()
+            elif connection is self._wake_reader :
+                self._wake_pending = False
+                try :
+                    while self._wake_reader.recv(4096) :
+                        pass
+                except OSError :
+                    pass
+            elif connection in self._requests :
+                received += self._read_request(connection)
+            else :
+                group = self._subscriptions.get(connection, self._answers)
+                if events & selectors.EVENT_WRITE :
+                    group.flush(connection)
+                if events & selectors.EVENT_READ :
+                    received += self._read_client(connection, group)
+        self._expire_requests()
+        self._update_selector()
+        return received
+
+    def publish(self, stream_id : int , data : bytes) -> int:
+        """
+        Send the data of a local stream to the clients of its mountpoints
+
+        Returns:
+            int: number of bytes written to the clients
+        """
+        sent = 0
+        for group in self._groups_by_stream.get(stream_id, ()) :
+            if len(group) != 0 :
+                sent += len(data) * len(group)
+                group.sendall(data)
+        return sent
+
+    def _accept(self):
+        while True :
+            try :
+                connection , address = self.server.accept()
+            except (BlockingIOError, InterruptedError) :
+                return
+            except OSError as e :
+                if self.log_file is not None :
+                    self.log_file.error("Stream %s : failed to accept a client : %s", self.stream_id, e)
+                return
+            connection.setblocking(False)
+            self._requests[connection] = _Request(address)
+            self._watch(connection, selectors.EVENT_READ)
+
+    def _read_request(self, connection : socket.socket) -> int:
+        request = self._requests[connection]
+        try :
+            data = connection.recv(4096)
+        except (BlockingIOError, InterruptedError) :
+            return 0
+        except OSError :
+            data = b""
+        if len(data) == 0 :
+            self._drop_request(connection)
+            return 0
+        request.buffer += data
+        end = request.buffer.find(b"\r\n\r\n")
+        if end == -1 :
+            if len(request.buffer) > MAX_REQUEST_SIZE :
+                self._drop_request(connection)
+            return len(data)
+        del self._requests[connection]
+        self._answer(connection, request.address, bytes(request.buffer[:end]).decode(encoding='ISO-8859-1'))
+        return len(data)
+
+    def _answer(self, connection : socket.socket , address , request : str):
+        lines = request.split("\r\n")
+        request_line = lines[0].split(" ")
+        headers = {}
+        for line in lines[1:] :
+            name , separator , value = line.partition(":")
+            if separator :
+                headers[name.strip().lower()] = value.strip()
+        version_2 = "ntrip/2.0" in headers.get("ntrip-version", "").lower()
+        if len(request_line) < 2 or request_line[0] != "GET" :
+            self._send_answer(connection, address, self._status(version_2, "400 Bad Request"))
+            return
+        name = request_line[1].lstrip("/").split("?")[0]
+        group = self.mountpoints.get(name)
+        if group is None :
+            self._send_answer(connection, address, self._source_table_answer(version_2))
+            return
+        if self.settings.auth and not self._is_authorized(headers.get("authorization")) :
+            if self.log_file is not None :
+                self.log_file.warning("Stream %s : client %s refused on %s : authentication failed", self.stream_id, address, name)
+            self._send_answer(connection, address, self._status(version_2, "401 Unauthorized",
+                                                                 f'WWW-Authenticate: Basic realm="/{name}"\r\n'))
+            return
+        if group.max_clients > 0 and len(group) >= group.max_clients :
+            if self.log_file is not None :
+                self.log_file.warning("Stream %s : client %s refused on %s : %s clients already connected", self.stream_id, address, name, len(group))
+            self._send_answer(connection, address, self._status(version_2, "503 Service Unavailable"))
+            return
+        client = group.add(connection, address)
+        self._subscriptions[connection] = group
+        if version_2 :
+            answer = ("HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0\r\nServer: NTRIP pydatalink Caster\r\n"
+                      "Content-Type: gnss/data\r\nCache-Control: no-store, no-cache, max-age=0\r\nConnection: close\r\n\r\n")
+        else :
+            answer = "ICY 200 OK\r\n"
+        try :
+            client.write(answer.encode(encoding='ISO-8859-1'))
+        except OSError :
+            group.remove(connection)
+
+    def _is_authorized(self, authorization : str) -> bool:
+        if authorization is None :
+            return False
+        scheme , _ , credentials = authorization.partition(" ")
+        return scheme.lower() == "basic" and hmac.compare_digest(credentials.strip(), self._authorization)
+
+    def _status(self, version_2 : bool , status : str , headers : str = "") -> bytes:
+        if version_2 :
+            answer = f"HTTP/1.1 {status}\r\nNtrip-Version: Ntrip/2.0\r\nServer: NTRIP pydatalink Caster\r\n{headers}Connection: close\r\n\r\n"
+        else :
+            answer = f"HTTP/1.0 {status}\r\nServer: NTRIP pydatalink Caster\r\n{headers}\r\n"
+        return answer.encode(encoding='ISO-8859-1')
+
+    def _source_table_answer(self, version_2 : bool) -> bytes:
+        if version_2 :
+            header = (f"HTTP/1.1 200 OK\r\nNtrip-Version: Ntrip/2.0\r\nServer: NTRIP pydatalink Caster\r\n"
+                      f"Content-Type: gnss/sourcetable\r\nContent-Length: {len(self.source_table)}\r\nConnection: close\r\n\r\n")
+        else :
+            header = (f"SOURCETABLE 200 OK\r\nServer: NTRIP pydatalink Caster\r\n"
+                      f"Content-Type: text/plain\r\nContent-Length: {len(self.source_table)}\r\n\r\n")
+        return header.encode(encoding='ISO-8859-1') + self.source_table
+
+    def _send_answer(self, connection : socket.socket , address , answer : bytes):
+        # The connection is closed as soon as the whole answer has been sent
+        client = self._answers.add(connection, address)
+        try :
+            client.write(answer)
+        except OSError :
+            self._answers.remove(connection)
+
+    def _read_client(self, connection : socket.socket , group : TcpClientGroup) -> int:
+        # The data sent by the clients (GGA) isn't used , it's read to detect the disconnection
+        try :
+            data = connection.recv(4096)
+        except (BlockingIOError, InterruptedError) :
+            return 0
+        except OSError :
+            data = b""
+        if len(data) == 0 :
+            group.remove(connection)
+        return len(data)
+
+    def _drop_request(self, connection : socket.socket):
+        self._requests.pop(connection, None)
+        self._unwatch(connection)
+        try :
+            connection.close()
+        except OSError :
+            pass
+
+    def _expire_requests(self):
+        if len(self._requests) == 0 :
+            return
+        now = time.monotonic()
+        for connection , request in list(self._requests.items()):
+            if now - request.accept_time > REQUEST_TIMEOUT :
+                if self.log_file is not None :
+                    self.log_file.info("Stream %s : client %s closed , no request received", self.stream_id, request.address)
+                self._drop_request(connection)
+
+    def _update_selector(self):
+        for connection , client in list(self._answers.clients.items()):
+            if client.pending_size == 0 :
+                self._unwatch(connection)
+                self._answers.remove(connection, graceful = True)
+            else :
+                self._watch(connection, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        for connection , group in list(self._subscriptions.items()):
+            if connection not in group.clients :
+                # Disconnected or evicted
+                del self._subscriptions[connection]
+                self._unwatch(connection)
+                continue
+            self._watch(connection, selectors.EVENT_READ | (selectors.EVENT_WRITE if group.has_pending(connection) else 0))
+
+    def _watch(self, connection : socket.socket , events : int):
+        try :
+            key = self.selector.get_key(connection)
+        except KeyError :
+            key = None
+        if key is None :
+            self.selector.register(connection, events)
+        elif key.fileobj is not connection :
+            # The descriptor of a closed connection has been reused
+            self.selector.unregister(key.fileobj)
+            self.selector.register(connection, events)
+        elif key.events != events :
+            self.selector.modify(connection, events)
+
+    def _unwatch(self, connection : socket.socket):
+        try :
+            self.selector.unregister(connection)
+        except (KeyError, ValueError) :
+            pass
+
+    def close_clients(self, flush_timeout : float = 0):
+        """
+        Disconnect every client
+        """
+        for connection in list(self._requests):
+            self._drop_request(connection)
+        for group in self.mountpoints.values():
+            for connection in list(group.clients):
+                self._unwatch(connection)
+            group.close(flush_timeout)
+        for connection in list(self._answers.clients):
+            self._unwatch(connection)
+        self._answers.close()
+        self._subscriptions.clear()
+
+    def close(self):
+        """
+        Disconnect every client and stop listening
+        """
+        self.close_clients()
+        self.selector.close()
+        for connection in (self.server, self._wake_reader, self._wake_writer):
+            try :
+                connection.close()
+            except OSError :
+                pass
@@ -0,0 +1,110 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import select
+import time
+from collections import deque
+
+class OutputBuffer:
+    """
+    Output buffer of a stream handled by an I/O engine.
+    The data is written without blocking , the part the connection doesn't accept is kept
+    and sent when the connection is writable again
+    """
+
+    def __init__(self, connection , write) -> None:
+        """
+        Args:
+            connection: the socket or serial port , watched by the engine while data is waiting
+            write (callable): non blocking write of the connection , returns the number of bytes written
+        """
+        self.connection = connection
+        self._write = write
+        self.pending : deque = deque()
+        self.pending_size : int = 0
+
+    def __len__(self) -> int:
+        return self.pending_size
+
+    def write(self, data : bytes):
+        """
+        Write data , the part that can't be written now is kept in the buffer
+
+        Raises:
+            OSError: the connection is lost
+        """
+        if self.pending_size == 0 :
+            try :
+                sent = self._write(data)
+            except BlockingIOError :
+                sent = 0
+            if sent == len(data):
+                return
+            data = data[sent:]
+        self.pending.append(data)
+        self.pending_size += len(data)
+
+    def flush(self):
+        """
+        Write as much of the buffer as the connection accepts
+
+        Raises:
+            OSError: the connection is lost
+        """
+        while len(self.pending) != 0 :
+            data = self.pending[0]
+            try :
+                sent = self._write(data)
+            except BlockingIOError :
+                return
+            self.pending_size -= sent
+            if sent < len(data):
+                self.pending[0] = data[sent:]
+                return
+            self.pending.popleft()
+
+    def drain(self, timeout : float):
+        """
+        Wait up to timeout seconds for the buffer to be written , used before closing the connection
+        """
+        end = time.monotonic() + timeout
+        while self.pending_size != 0 :
+            remaining = end - time.monotonic()
+            if remaining <= 0 :
+                return
+            _ , writable , _ = select.select([], [self.connection], [], remaining)
+            if len(writable) != 0 :
+                self.flush()
+
+    def clear(self):
+        """
+        Drop the data waiting in the buffer
+        """
+        self.pending.clear()
+        self.pending_size = 0
@@ -27,19 +27,29 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
+from enum import Enum
+
+class EngineType(Enum):
+    """ Execution mode of the streams
+    """
+    THREAD = 0
+    SELECTOR = 1
+    ASYNCIO = 2
+
 class Preferences :
     """
     Preferences class : save every preferences and options done previously
     """
 
     def __init__(self,max_streams : int = 2, config_name : str = "Datalink_Config" ,
-                 line_termination :str = "\r\n") -> None:
+                 line_termination :str = "\r\n" , engine_type : EngineType = EngineType.THREAD) -> None:
         self.max_streams = max_streams
         self.connect : list[bool] = []
         self.config_name : str = config_name
         for _ in range(max_streams) :
             self.connect.append(False)
         self.line_termination : str = line_termination
+        self.engine_type : EngineType = engine_type
 
     def set_max_stream(self,new_max_stream : int ):
         """
@@ -68,6 +78,15 @@ class Preferences :
         """
         self.line_termination = new_line_termination
 
+    def set_engine_type(self, new_engine_type : EngineType):
+        """
+        Set the execution mode used by the streams
+
+        Args:
+            new_engine_type (EngineType): the new execution mode
+        """
+        self.engine_type = new_engine_type
+
     def get_line_termination(self):
         """
         Convert the termination line to readable string
@@ -0,0 +1,205 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import logging
+import random
+import threading
+import time
+from enum import Enum
+
+class BreakerState(Enum):
+    """
+    State of the circuit breaker of a reconnect supervisor
+    """
+    # Reconnection attempts are made with an exponential backoff
+    CLOSED = 0
+    # Too many failed attempts : wait for the cool down before trying again
+    OPEN = 1
+    # First attempt after the cool down , the breaker opens again if it fails
+    HALF_OPEN = 2
+
+class ReconnectPolicy:
+    """
+    How a stream disconnected by an error is reconnected.
+    The delay before each attempt grows exponentially from initial_delay up to max_delay ,
+    a random part of the delay (jitter) spreads the attempts of several streams.
+    After max_attempts consecutive failures the circuit breaker opens for cooldown seconds ,
+    the stream is given up if cooldown is 0
+    """
+
+    def __init__(self, enabled : bool = True , initial_delay : float = 0.5 , max_delay : float = 30.0 ,
+                 max_attempts : int = 10 , cooldown : float = 300.0 , multiplier : float = 2.0 ,
+                 jitter : float = 0.5) -> None:
+        self.enabled : bool = enabled
+        self.initial_delay : float = initial_delay
+        self.max_delay : float = max_delay
+        self.max_attempts : int = max_attempts
+        self.cooldown : float = cooldown
+        self.multiplier : float = multiplier
+        self.jitter : float = jitter
+
+    def get_delay(self, attempt : int) -> float:
+        """
+        Return the delay before an attempt
+
+        Args:
+            attempt (int): number of the attempt , starting at 1
+        """
+        delay = min(self.max_delay, self.initial_delay * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter * random.random())
+
+class ReconnectSupervisor:
+    """
+    Reconnect a stream after it has been disconnected by an error.
+    The stream keeps its links and the data waiting in its output queue while it's reconnecting
+    """
+
+    def __init__(self, stream , policy : ReconnectPolicy = None , log_file : logging.Logger = None) -> None:
+        self.stream = stream
+        self.policy : ReconnectPolicy = policy if policy is not None else ReconnectPolicy()
+        self.log_file : logging.Logger = log_file
+        self.state : BreakerState = BreakerState.CLOSED
+        self.attempts : int = 0
+        self.reconnects : int = 0
+        self.failures : int = 0
+        self.consecutive_failures : int = 0
+        self.last_error : Exception = None
+        self.downtime : float = 0.0
+        self._thread : threading.Thread = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending_failure : bool = False
+
+    def is_reconnecting(self) -> bool:
+        """
+        Return True while the supervisor is trying to reconnect the stream
+        """
+        return self._thread is not None
+
+    def stream_failed(self, error : Exception = None):
+        """
+        Start reconnecting the stream , called when the stream has been disconnected by an error
+        """
+        if not self.policy.enabled :
+            return
+        with self._lock :
+            if self.is_reconnecting():
+                # The stream failed right after being reconnected
+                self._pending_failure = True
+                self.last_error = error
+                return
+            self.failures += 1
+            self.last_error = error
+            self._cancel_event.clear()
+            self._thread = threading.Thread(target=self._run, name=f"ReconnectStream{self.stream.stream_id}", daemon=True)
+            self._thread.start()
+        if self.log_file is not None :
+            self.log_file.warning("Stream %s : disconnected by an error , reconnecting : %s", self.stream.stream_id, error)
+
+    def cancel(self):
+        """
+        Stop reconnecting the stream , called when the stream is disconnected or connected by the user
+        """
+        self._cancel_event.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def reset(self):
+        """
+        Reset the counters and close the circuit breaker
+        """
+        self.state = BreakerState.CLOSED
+        self.attempts = 0
+        self.reconnects = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.downtime = 0.0
+
+    def get_counters(self) -> dict:
+        """
+        Return the reconnection counters of the stream
+        """
+        return {"state" : self.state.name , "failures" : self.failures , "attempts" : self.attempts ,
+                "reconnects" : self.reconnects , "consecutive_failures" : self.consecutive_failures ,
+                "downtime" : round(self.downtime, 3) , "last_error" : str(self.last_error) if self.last_error is not None else ""}
+
+    def _run(self):
+        while True :
+            self._reconnect()
+            with self._lock :
+                if not self._pending_failure or self._cancel_event.is_set():
+                    self._pending_failure = False
+                    self._thread = None
+                    return
+                self._pending_failure = False
+                self.failures += 1
+
+    def _reconnect(self):
+        # Return once the stream is connected , the reconnection is cancelled or given up
+        start_time = time.monotonic()
+        attempt = 0
+        while not self._cancel_event.is_set():
+            if self.state == BreakerState.OPEN :
+                if self.policy.cooldown <= 0 :
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : reconnection given up after %s attempts", self.stream.stream_id, self.consecutive_failures)
+                    return
+                if self._cancel_event.wait(self.policy.cooldown):
+                    return
+                self.state = BreakerState.HALF_OPEN
+                delay = 0
+            else :
+                attempt += 1
+                delay = self.policy.get_delay(attempt)
+            if self._cancel_event.wait(delay):
+                return
+            if self.stream.connected :
+                return
+            self.attempts += 1
+            try :
+                self.stream.reconnect()
+            except Exception as e :
+                self.last_error = e
+                self.consecutive_failures += 1
+                if self.log_file is not None :
+                    self.log_file.warning("Stream %s : reconnection attempt %s failed : %s", self.stream.stream_id, self.attempts, e)
+                if self.state == BreakerState.HALF_OPEN or (self.policy.max_attempts > 0 and self.consecutive_failures >= self.policy.max_attempts):
+                    if self.state != BreakerState.OPEN and self.log_file is not None :
+                        self.log_file.error("Stream %s : %s consecutive failures , next attempt in %s s", self.stream.stream_id, self.consecutive_failures, self.policy.cooldown)
+                    self.state = BreakerState.OPEN
+                continue
+            self.reconnects += 1
+            self.consecutive_failures = 0
+            self.state = BreakerState.CLOSED
+            self.downtime += time.monotonic() - start_time
+            if self.log_file is not None :
+                self.log_file.info("Stream %s : reconnected after %.1f s", self.stream.stream_id, time.monotonic() - start_time)
+            return
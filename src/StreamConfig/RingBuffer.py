@@ -0,0 +1,127 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import threading
+
+DEFAULT_SHOW_BUFFER_SIZE = 4 * 1024 * 1024
+
+class RingBuffer:
+    """
+    Fixed capacity byte buffer used to share the data shown to the user.
+    The memory is allocated once , when the buffer is full the oldest data is overwritten.
+    Every byte written gets a sequence number : a viewer keeps the sequence of the next byte
+    it wants to read and can detect when data has been overwritten before it could read it.
+    Only one thread is expected to write (the stream task or the I/O engine) ,
+    any number of viewers can read without blocking the writer
+    """
+
+    def __init__(self, capacity : int = DEFAULT_SHOW_BUFFER_SIZE) -> None:
+        self.capacity : int = capacity
+        self.buffer : bytearray = bytearray(capacity)
+        # Sequence number of the next byte written
+        self.sequence : int = 0
+        # Sequence number of the end of the write in progress , moved before the data is copied :
+        # a viewer compares it with its sequence once its copy is done to detect a concurrent overwrite
+        self._write_end : int = 0
+        self._write_lock = threading.Lock()
+
+    def put(self, data : bytes | str):
+        """
+        Write data in the buffer , overwrite the oldest data if there is not enough room
+
+        Args:
+            data (bytes | str): data to write , text is encoded in ISO-8859-1
+        """
+        if isinstance(data, str):
+            data = data.encode(encoding='ISO-8859-1')
+        size = len(data)
+        if size == 0 :
+            return
+        with self._write_lock :
+            self._write_end = self.sequence + size
+            if size > self.capacity :
+                data = memoryview(data)[size - self.capacity:]
+                self.sequence += size - self.capacity
+                size = self.capacity
+            start = self.sequence % self.capacity
+            first_part = min(size, self.capacity - start)
+            self.buffer[start:start + first_part] = data[:first_part]
+            if first_part < size :
+                self.buffer[0:size - first_part] = data[first_part:]
+            # Publish the data only once it has been copied
+            self.sequence += size
+
+    def get_sequence(self) -> int:
+        """
+        Return the sequence number of the next byte written : a new viewer starts reading from there
+        """
+        return self.sequence
+
+    def empty(self, sequence : int) -> bool:
+        """
+        Return True if there is no data to read from the sequence number
+        """
+        return sequence >= self.sequence
+
+    def read(self, sequence : int , max_size : int = None) -> tuple[bytes, int, int]:
+        """
+        Read every data written since the sequence number
+
+        Args:
+            sequence (int): sequence number of the first byte to read
+            max_size (int, optional): maximum number of bytes to read. Defaults to None.
+
+        Returns:
+            tuple[bytes, int, int]: the data , the sequence number to use for the next read
+            and the number of bytes overwritten before they could be read
+        """
+        end = self.sequence
+        lost = 0
+        oldest = max(0, end - self.capacity)
+        if sequence < oldest :
+            lost = oldest - sequence
+            sequence = oldest
+        if max_size is not None :
+            end = min(end, sequence + max_size)
+        if end <= sequence :
+            return b"" , sequence , lost
+        start = sequence % self.capacity
+        size = end - sequence
+        first_part = min(size, self.capacity - start)
+        data = bytes(self.buffer[start:start + first_part])
+        if first_part < size :
+            data += self.buffer[0:size - first_part]
+        # The writer may have overwritten the beginning of the data while it was copied ,
+        # including by a put still in progress
+        overwritten = min(self._write_end - self.capacity - sequence, size)
+        if overwritten > 0 :
+            data = data[overwritten:]
+            lost += overwritten
+            sequence += overwritten
+        return data , end , lost
@@ -0,0 +1,331 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import logging
+import queue
+import selectors
+import socket
+import threading
+from concurrent.futures import Future
+
+from ..constants import DEFAULTLOGFILELOGGER
+from ..NTRIP.NtripServer import NtripServer
+
+class SelectorEngineException(Exception):
+    """
+        Exception class for the selector engine
+    """
+    def __init__(self, message, error_code = None):
+        super().__init__(message)
+        self.error_code = error_code
+
+class EngineNotRunningError(SelectorEngineException):
+    """Raised when a stream is registered while the engine is not running
+    """
+
+class SelectorEngine:
+    """
+    Single threaded I/O engine.
+    Every stream registered in the engine is handled by one event loop built on selectors :
+    the thread only wakes up when a socket or a serial port is readable ,
+    when data has been queued for a stream or once per poll interval to update the data rates.
+    """
+
+    is_async = False
+
+    def __init__(self, poll_interval : float = 1.0, debug_logging : bool = False) -> None:
+
+        self.poll_interval : float = poll_interval
+        self.selector = selectors.DefaultSelector()
+        self.streams : list = []
+        self.thread : threading.Thread = None
+        self.stop_event = threading.Event()
+        self._commands : queue.Queue = queue.Queue()
+        self._wakeup_pending : bool = False
+        self._wakeup_reader , self._wakeup_writer = socket.socketpair()
+        self._wakeup_reader.setblocking(False)
+        self._wakeup_writer.setblocking(False)
+        self.selector.register(self._wakeup_reader, selectors.EVENT_READ)
+
+        if debug_logging :
+            self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
+        else :
+            self.log_file = None
+
+    def start(self):
+        """
+        Start the engine thread
+        """
+        if self.is_running():
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="SelectorEngine", daemon=True)
+        self.thread.start()
+        if self.log_file is not None :
+            self.log_file.info("Selector engine started")
+
+    def stop(self):
+        """
+        Unregister every stream and stop the engine thread
+        """
+        if not self.is_running():
+            return
+        for stream in list(self.streams):
+            self.unregister(stream)
+        self.stop_event.set()
+        self.wakeup()
+        if threading.current_thread() is not self.thread :
+            self.thread.join()
+        self.selector.close()
+        self._wakeup_reader.close()
+        self._wakeup_writer.close()
+        if self.log_file is not None :
+            self.log_file.info("Selector engine stopped")
+
+    def is_running(self) -> bool:
+        """
+        Return True if the engine thread is running
+        """
+        return self.thread is not None and self.thread.is_alive()
+
+    def supports(self, stream) -> bool:
+        """
+        Return True if the opened stream can be handled by the engine.
+        Serial ports can only be watched when the platform expose a file descriptor for them
+        """
+        if stream.stream is None :
+            return False
+        # A NTRIP server uploads to its caster from its own thread
+        if isinstance(stream.stream, NtripServer):
+            return False
+        if hasattr(stream.stream, "socket"):
+            return stream.stream.socket is not None
+        return hasattr(stream.stream, "fileno")
+
+    def register(self, stream):
+        """
+        Add a connected stream to the engine
+
+        Args:
+            stream (Stream): the stream to handle
+
+        Raises:
+            EngineNotRunningError: the engine thread is not running
+        """
+        if not self.is_running():
+            raise EngineNotRunningError("Selector engine is not running")
+        self._call(self._register, stream).result()
+
+    def unregister(self, stream):
+        """
+        Remove a stream from the engine , the remaining outgoing data is sent before removing it
+
+        Args:
+            stream (Stream): the stream to remove
+        """
+        if not self.is_running():
+            return
+        self._call(self._unregister, stream).result()
+
+    def is_registered(self, stream) -> bool:
+        """
+        Return True if the stream is currently handled by the engine
+        """
+        return stream in self.streams
+
+    def call_soon(self, function, *args) -> Future:
+        """
+        Execute a function in the engine thread
+
+        Returns:
+            Future: the result of the function
+        """
+        return self._call(function, *args)
+
+    def add_reader(self, fileobj, stream, callback):
+        """
+        Watch a file object and call the callback when it's readable.
+        Must be called from the engine thread
+        """
+        self._watch(fileobj, stream, selectors.EVENT_READ, callback)
+
+    def add_writer(self, fileobj, stream, callback):
+        """
+        Watch a file object and call the callback when it's writable.
+        Must be called from the engine thread
+        """
+        self._watch(fileobj, stream, selectors.EVENT_WRITE, callback)
+
+    def remove_writer(self, fileobj):
+        """
+        Stop watching a file object for writing , it's still watched for reading.
+        Must be called from the engine thread
+        """
+        try :
+            key = self.selector.get_key(fileobj)
+        except (KeyError, ValueError):
+            return
+        stream , reader , _ = key.data
+        if reader is None :
+            self.remove_reader(fileobj)
+        else :
+            self.selector.modify(fileobj, selectors.EVENT_READ, (stream, reader, None))
+
+    def _watch(self, fileobj, stream, event : int, callback):
+        try :
+            key = self.selector.get_key(fileobj)
+        except KeyError :
+            key = None
+        if key is None :
+            reader = callback if event == selectors.EVENT_READ else None
+            writer = callback if event == selectors.EVENT_WRITE else None
+            self.selector.register(fileobj, event, (stream, reader, writer))
+            return
+        _ , reader , writer = key.data
+        if event == selectors.EVENT_READ :
+            reader = callback
+        else :
+            writer = callback
+        self.selector.modify(fileobj, key.events | event, (stream, reader, writer))
+
+    def remove_reader(self, fileobj):
+        """
+        Stop watching a file object.
+        Must be called from the engine thread
+        """
+        try :
+            self.selector.unregister(fileobj)
+        except (KeyError, ValueError):
+            pass
+
+    def remove_readers(self, stream):
+        """
+        Stop watching every file object of a stream.
+        Must be called from the engine thread
+        """
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None and key.data[0] is stream :
+                self.remove_reader(key.fileobj)
+
+    def wakeup(self):
+        """
+        Wake up the engine so that queued data is sent without waiting for the poll interval
+        """
+        if self._wakeup_pending :
+            return
+        self._wakeup_pending = True
+        try :
+            self._wakeup_writer.send(b"\x00")
+        except (BlockingIOError, OSError):
+            pass
+
+    def _call(self, function, *args) -> Future:
+        future = Future()
+        if threading.current_thread() is self.thread :
+            self._execute(function, args, future)
+        else :
+            self._commands.put((function, args, future))
+            self.wakeup()
+        return future
+
+    def _execute(self, function, args, future : Future):
+        try :
+            future.set_result(function(*args))
+        except Exception as e :
+            future.set_exception(e)
+
+    def _register(self, stream):
+        if stream in self.streams :
+            return
+        self.streams.append(stream)
+        try :
+            stream.engine_open(self)
+        except Exception :
+            self.streams.remove(stream)
+            raise
+        if self.log_file is not None :
+            self.log_file.info("Selector engine : Stream %s registered", stream.stream_id)
+
+    def _unregister(self, stream):
+        if stream not in self.streams :
+            return
+        self.streams.remove(stream)
+        try :
+            stream.engine_close(self)
+        finally :
+            self.remove_readers(stream)
+        if self.log_file is not None :
+            self.log_file.info("Selector engine : Stream %s unregistered", stream.stream_id)
+
+    def _fail(self, stream, error : Exception):
+        if self.log_file is not None :
+            self.log_file.error("Stream %s %s has been disconnected, error: %s", stream.stream_id, stream.stream_type, error)
+        if stream in self.streams :
+            self.streams.remove(stream)
+        try :
+            stream.engine_close(self, flush = False)
+        except Exception :
+            pass
+        self.remove_readers(stream)
+        try :
+            stream._exception_disconnect(error)
+        except Exception :
+            pass
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            events = self.selector.select(self.poll_interval)
+            self._wakeup_pending = False
+            for key, mask in events:
+                if key.fileobj is self._wakeup_reader :
+                    try :
+                        while self._wakeup_reader.recv(4096):
+                            pass
+                    except (BlockingIOError, OSError):
+                        pass
+                    continue
+                stream, reader, writer = key.data
+                if stream not in self.streams :
+                    continue
+                try :
+                    if mask & selectors.EVENT_READ and reader is not None :
+                        reader(key.fileobj)
+                    # The reader may have closed the connection
+                    if mask & selectors.EVENT_WRITE and writer is not None and key.fileobj in self.selector.get_map() :
+                        writer(key.fileobj)
+                except Exception as e :
+                    self._fail(stream, e)
+            while not self._commands.empty():
+                function, args, future = self._commands.get()
+                self._execute(function, args, future)
+            for stream in list(self.streams):
+                try :
+                    stream.engine_poll()
+                except Exception as e :
+                    self._fail(stream, e)
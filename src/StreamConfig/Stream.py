@@ -29,22 +29,42 @@
 
 
 from enum import Enum
-from io import TextIOWrapper
 import os
 import socket
 import threading
 import queue
+import selectors
 import logging
 from  datetime import datetime
 import time
+import asyncio
 from serial import Serial, SerialException
 
 from ..NTRIP.NtripSettings import NtripSettingsException
 from ..StreamSettings.UdpSettings import UDPSettingsException, UdpSettings
 from ..StreamSettings.SerialSettings import SerialSettings, SerialSettingsException
 from ..StreamSettings.TcpSettings import StreamMode, TCPSettingsException , TcpSettings
+from ..StreamSettings.FileSettings import FileSettings , FileSettingsException
+from ..StreamSettings.CasterSettings import CasterSettings , CasterSettingsException
 from ..NTRIP.NtripClient import NtripClient , NtripClientError
+from ..NTRIP.NtripServer import NtripServer , NtripServerError
 from ..constants import DEFAULTLOGFILELOGGER
+from .AsyncioEngine import TcpProtocol , UdpProtocol , NtripProtocol , NtripResponseError
+from .LinkQueue import LinkQueue , OverflowPolicy , DEFAULT_LINK_BUFFER_SIZE
+from .RingBuffer import RingBuffer
+from .StreamLogger import StreamLogger , LogRotation , DEFAULT_LOG_BUFFER_SIZE , DEFAULT_LOG_FLUSH_INTERVAL
+from .CaptureFile import LogFormat , Direction
+from .FileReplay import FileReplay
+from .NtripCaster import NtripCaster
+from .TcpClients import TcpClientGroup
+from .OutputBuffer import OutputBuffer
+from .ReconnectSupervisor import ReconnectSupervisor , ReconnectPolicy
+from ..Framing import Framer , FramingType , FrameFilter , LineFramer , Rtcm3Framer , SbfFramer , NmeaFramer , find_last_sentence
+
+UDP_MAX_DATAGRAM_SIZE = 65507
+UDP_MAX_RECEIVE_SIZE = 65535
+# Maximum number of datagrams read each time a UDP socket is readable
+UDP_MAX_BATCH = 64
 
 class StreamException(Exception):
     """
@@ -73,6 +93,10 @@ class LogFileException(StreamException):
 class TaskException(StreamException):
     """Raised when a issue occur in a Task function
     """
+class LinkOverflowException(TaskException):
+    """Raised when the output queue of a stream is full with the DISCONNECT overflow policy ,
+    the stream is disconnected without being reconnected
+    """
 class StreamThreadException(StreamException):
     """Raised when a issue occur with the stream thread
     """
@@ -84,6 +108,9 @@ class StreamType(Enum):
     TCP = 1
     UDP = 2
     NTRIP = 3
+    FILE = 4
+    NTRIP_CASTER = 5
+    NTRIP_SERVER = 6
     NONE = None
 
 class Stream:
@@ -100,7 +127,7 @@ class Stream:
         self.connected: bool = False
         self.current_task = None
         self.stream_type: StreamType = StreamType.NONE
-        self.stream : Serial | socket.socket | NtripClient | None  = None
+        self.stream : Serial | socket.socket | NtripClient | NtripServer | None  = None
         self.line_termination :str = "\r\n"
         self.data_transfer_input : float = 0.0
         self.data_transfer_output :float = 0.0
@@ -117,7 +144,11 @@ class Stream:
 
         self.logging : bool = False
         self.logging_file : str = ""
-        self.logger : TextIOWrapper  = None
+        self.logger : StreamLogger  = None
+        self.log_buffer_size : int = DEFAULT_LOG_BUFFER_SIZE
+        self.log_flush_interval : float = DEFAULT_LOG_FLUSH_INTERVAL
+        self.log_rotation : LogRotation = LogRotation()
+        self.log_format : LogFormat = LogFormat.RAW
 
         # Startup and close script
 
@@ -135,18 +166,50 @@ class Stream:
         # Queue for data link between ports
 
         self.linked_data = linked_data
+        self.link_buffer_size : int = DEFAULT_LINK_BUFFER_SIZE
+        self.link_overflow_policy : OverflowPolicy = OverflowPolicy.DROP_OLDEST
+        self.framing : FramingType = FramingType.NONE
+        self.framer : Framer = None
+        self.link_filters : dict[int, FrameFilter] = {}
         self.update_linked_ports_queue: queue.Queue = queue.Queue()
-        self.data_to_show: queue.Queue = queue.Queue()
+        self.data_to_show: RingBuffer = RingBuffer()
 
         # Thread for data read/link
 
         self.datalink_stream_thread: threading.Thread = None
 
+        # Clients of a TCP server stream
+
+        self.tcp_clients : TcpClientGroup = None
+        # Time of the connection of a TCP client stream and delay before the first data received
+        self._connect_time : float = None
+        self._first_byte_latency : float = None
+
+        # Optional I/O engine handling the stream instead of a dedicated thread
+
+        self.io_engine = None
+        self._engine = None
+        self._engine_connection = None
+        self._engine_address = None
+        self._engine_output : OutputBuffer = None
+        self._engine_linked_ports : list[int] = []
+        self._engine_incoming : int = 0
+        self._engine_outgoing : int = 0
+        self._engine_time : datetime = datetime.now()
+
+        # Reconnection after an error
+
+        self.supervisor : ReconnectSupervisor = ReconnectSupervisor(self, log_file=self.log_file)
+        self._reconnecting : bool = False
+
         # Init all Settings
         self.serial_settings = SerialSettings(debug_logging = debug_logging)
         self.tcp_settings = TcpSettings(debug_logging = debug_logging)
         self.udp_settings = UdpSettings(debug_logging = debug_logging)
+        self.file_settings = FileSettings(debug_logging = debug_logging)
+        self.caster_settings = CasterSettings(debug_logging = debug_logging)
         self.ntrip_client = NtripClient()
+        self.ntrip_server = NtripServer()
 
     def connect(self, stream_type : StreamType = None):
         """
@@ -158,6 +221,12 @@ class Stream:
         Returns:
             int: 0 if the Stream fails, otherwise None.
         """
+        if not self._reconnecting :
+            # Only the disconnections caused by an error count for the circuit breaker
+            self.supervisor.cancel()
+            self.supervisor.reset()
+        if self.io_engine is not None and self.io_engine.is_async :
+            return self.io_engine.run(self.connect_async(stream_type))
         if self.log_file is not None :
             self.log_file.info("Connecting Stream %s " , self.stream_id)
         if stream_type is None :
@@ -168,6 +237,8 @@ class Stream:
             if self.log_file is not None :
                 self.log_file.error("Stream %s : Stream was already connected",self.stream_id)
         else :
+            # The I/O engine and the reconnect supervisor open the stream with its recorded type
+            self.stream_type = stream_type
             if stream_type == StreamType.Serial:
                 if self.serial_settings.port == "" or self.serial_settings is None:
                     if self.log_file is not None :
@@ -202,6 +273,7 @@ class Stream:
                         if self.tcp_settings.stream_mode == StreamMode.SERVER:
                             task = self.datalink_tcp_server_task
                         else :
+                            self._tcp_connection_opened()
                             task = self.datalink_tcp_client_task
                         if self.log_file is not None :
                             self.log_file.info("Stream %s : Stream openned successfully " , self.stream_id)
@@ -255,6 +327,55 @@ class Stream:
                         if self.log_file is not None :
                             self.log_file.error("Stream %s : Failed to open NTRIP stream: %s" , self.stream_id,e)
                         raise OpenConnectionError(f"Failed to open NTRIP Stream : {e}") from e
+            elif stream_type == StreamType.FILE:
+                if self.file_settings is None or self.file_settings.file_name == "":
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : Failed to open FILE stream : no file selected ", self.stream_id)
+                    raise MissingSettingsException("no file to replay !")
+                try:
+                    self.stream = self.file_settings.connect()
+                    self.connected = True
+                    task = self.datalink_file_task
+                    if self.log_file is not None :
+                        self.log_file.info("Stream %s : Stream openned successfully " , self.stream_id)
+                except FileSettingsException as e:
+                    self.stream = None
+                    self.connected = False
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : Failed to open FILE stream: %s" , self.stream_id,e)
+                    raise OpenConnectionError(e) from e
+            elif stream_type == StreamType.NTRIP_CASTER:
+                try:
+                    self.stream = self.caster_settings.connect(self.stream_id)
+                    self.connected = True
+                    task = self.datalink_caster_task
+                    if self.log_file is not None :
+                        self.log_file.info("Stream %s : Stream openned successfully " , self.stream_id)
+                except CasterSettingsException as e:
+                    self.stream = None
+                    self.connected = False
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : Failed to open NTRIP caster stream: %s" , self.stream_id,e)
+                    raise OpenConnectionError(e) from e
+            elif stream_type == StreamType.NTRIP_SERVER:
+                if self.ntrip_server is None or len(self.ntrip_server.ntrip_settings.host.replace(" ","")) == 0 :
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : Failed to open NTRIP server stream : Incorect Settings " , self.stream_id)
+                    raise MissingSettingsException("ntrip server is not set !")
+                try:
+                    socket.gethostbyname(self.ntrip_server.ntrip_settings.host)
+                    self.ntrip_server.connect()
+                    self.stream = self.ntrip_server
+                    self.connected = True
+                    task = self.datalink_ntrip_server_task
+                    if self.log_file is not None :
+                        self.log_file.info("Stream %s : Stream openned successfully " , self.stream_id)
+                except (NtripServerError, NtripSettingsException, OSError) as e:
+                    self.stream = None
+                    self.connected = False
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %s : Failed to open NTRIP server stream: %s" , self.stream_id,e)
+                    raise OpenConnectionError(f"Failed to open NTRIP Server Stream : {e}") from e
             elif stream_type == StreamType.NONE :
                 if self.log_file is not None :
                     self.log_file.error("Stream %s : no configuration yet " , self.stream_id)
@@ -264,53 +385,246 @@ class Stream:
                     self.log_file.error("Stream %s : Invalid Stream Type " , self.stream_id)
                 raise InvalidStreamTypeException(f" {stream_type.name} is not a valid Stream type !")
             if self.connected is True:
-                try:
-                    if self.log_file is not None :
-                        self.log_file.debug("Stream %s : start final configuration " , self.stream_id)
+                self._start_stream_task(task)
 
-                    self.stop_event.clear()
-                    self._clear_queue(self.linked_data[self.stream_id])
-                    if self.logging :
-                        self.logger = open(self.logging_file,"w",encoding="utf-8")
+    def _start_stream_task(self, task):
+        """
+        Final configuration of a connected stream : open the logging file , queue the startup script
+        and start the stream task thread or register the stream in the I/O engine
 
-                        if self.log_file is not None :
-                            self.log_file.debug("Stream %s : init loggin file :  %s" , self.stream_id,self.logging_file)
+        Args:
+            task: the thread task of the stream type
 
-                    if self.send_startup_script:
+        Raises:
+            StreamThreadException: the final configuration failed
+        """
+        try:
+            if self.log_file is not None :
+                self.log_file.debug("Stream %s : start final configuration " , self.stream_id)
+
+            self.stop_event.clear()
+            # The data waiting in the output queue is kept when the stream is reconnected after an error
+            if not self._reconnecting :
+                self._clear_queue(self.linked_data[self.stream_id])
+            if isinstance(self.linked_data[self.stream_id], LinkQueue):
+                self.linked_data[self.stream_id].set_limit(self.link_buffer_size, self.link_overflow_policy)
+                if not self._reconnecting :
+                    self.linked_data[self.stream_id].reset_dropped()
+            if self.framer is not None :
+                self.framer.reset()
+            for frame_filter in self.link_filters.values():
+                frame_filter.reset()
+            if self.logging :
+                self._close_logger()
+                self.logger = StreamLogger(self.logging_file, self.log_buffer_size, self.log_flush_interval,
+                                           stream_id=self.stream_id, rotation=self.log_rotation, log_format=self.log_format)
+                self.logger.open()
 
-                        if self.log_file is not None :
-                            self.log_file.debug("Stream %s : init startup script file :  %s" , self.stream_id,self.startup_script)
+                if self.log_file is not None :
+                    self.log_file.debug("Stream %s : init loggin file :  %s" , self.stream_id,self.logging_file)
 
-                        self.send_script(self.linked_data[self.stream_id], True)
-                    self.datalink_stream_thread = threading.Thread(target=task,args=(self.stream, self.linked_data, self.update_linked_ports_queue,self.data_to_show , self.logger))
+            if self.send_startup_script:
 
-                    if self.log_file is not None :
-                        self.log_file.debug("Stream %s : Starting Thread " , self.stream_id)
+                if self.log_file is not None :
+                    self.log_file.debug("Stream %s : init startup script file :  %s" , self.stream_id,self.startup_script)
 
-                    self.datalink_stream_thread.start()
-                    self.current_task = task
+                self.send_script(self.linked_data[self.stream_id], True)
+            # The links are queued before the task starts so that its first data is already forwarded
+            self._clear_queue(self.update_linked_ports_queue)
+            if len(self.linked_ports) != 0:
+                if self.log_file is not None :
+                    self.log_file.info("Stream %s : update linked Port : %s" , self.stream_id ,str(self.linked_ports) )  
 
-                    if len(self.linked_ports) != 0:
-                        
-                        if self.log_file is not None :
-                            self.log_file.info("Stream %s : update linked Port : %s" , self.stream_id ,str(self.linked_ports) )  
+                for link in self.linked_ports:
+                    self.update_linked_ports_queue.put(link)
 
-                        for link in self.linked_ports:
-                            self.update_linked_ports_queue.put(link)
+            if self.io_engine is not None and self.io_engine.supports(self):
+                if self.log_file is not None :
+                    self.log_file.debug("Stream %s : Registering stream in the I/O engine " , self.stream_id)
+                self.datalink_stream_thread = None
+                self.io_engine.register(self)
+                self.current_task = self.io_engine
+            else :
+                self.datalink_stream_thread = threading.Thread(target=task,args=(self.stream, self.linked_data, self.update_linked_ports_queue,self.data_to_show , self.logger))
 
-                    if self.log_file is not None :
-                        self.log_file.info("Stream %s : final configuration finished " , self.stream_id  )
+                if self.log_file is not None :
+                    self.log_file.debug("Stream %s : Starting Thread " , self.stream_id)
 
-                except Exception as e:
-                    if self.log_file is not None :
-                        self.log_file.error("Stream %s : Failed during final configuration : %s" , self.stream_id ,e )
-                    self.connected = False
-                    raise StreamThreadException(e) from e
+                self.datalink_stream_thread.start()
+                self.current_task = task
+
+            if self.log_file is not None :
+                self.log_file.info("Stream %s : final configuration finished " , self.stream_id  )
+
+        except Exception as e:
+            if self.log_file is not None :
+                self.log_file.error("Stream %s : Failed during final configuration : %s" , self.stream_id ,e )
+            self.connected = False
+            raise StreamThreadException(e) from e
+
+    async def connect_async(self, stream_type : StreamType = None):
+        """
+        Connects the port on the loop of the asyncio engine.
+        TCP , UDP and NTRIP streams are opened as asyncio protocols ,
+        serial ports are read with a file descriptor reader
+
+        Args:
+            stream_type: The type of Stream.
+        """
+        if self.log_file is not None :
+            self.log_file.info("Connecting Stream %s on the asyncio engine" , self.stream_id)
+        if stream_type is None :
+            stream_type = self.stream_type
+        if self.connected is True:
+            if self.log_file is not None :
+                self.log_file.error("Stream %s : Stream was already connected",self.stream_id)
+            return
+        if not self._reconnecting :
+            self.supervisor.reset()
+        self.stream_type = stream_type
+        engine = self.io_engine
+        loop = asyncio.get_running_loop()
+        self._engine_reset(engine)
+        if stream_type == StreamType.Serial:
+            if self.serial_settings.port == "" or self.serial_settings is None:
+                raise MissingSettingsException("Serial settings hasn't been given yet")
+            try:
+                self.stream = self.serial_settings.connect()
+            except SerialSettingsException as e:
+                self.stream = None
+                raise OpenConnectionError(e) from e
+            if engine.supports(self):
+                self._engine_connection = self.stream
+                self._engine_output = self._open_serial_output(self.stream)
+                engine.add_reader(self.stream, self, self._engine_read_serial)
+        elif stream_type == StreamType.TCP:
+            if self.tcp_settings is None:
+                raise MissingSettingsException("tcp settings are empty !")
+            try:
+                if self.tcp_settings.stream_mode == StreamMode.SERVER:
+                    self._engine_connection = self._open_tcp_clients()
+                    self.stream = await loop.create_server(lambda : TcpProtocol(engine, self), sock=self.tcp_settings.connect(),
+                                                           backlog=self.tcp_settings.backlog)
+                else :
+                    transport , _ = await asyncio.wait_for(loop.create_connection(lambda : TcpProtocol(engine, self), self.tcp_settings.host, self.tcp_settings.port), 5)
+                    self.stream = transport
+            except (TCPSettingsException, OSError, asyncio.TimeoutError) as e :
+                self.stream = None
+                if self.log_file is not None :
+                    self.log_file.error("Stream %s : Failed to open TCP stream: %s",self.stream_id,e)
+                raise OpenConnectionError(e) from e
+        elif stream_type == StreamType.UDP:
+            if self.udp_settings is None:
+                raise MissingSettingsException("udp settings are empty!")
+            try:
+                transport , _ = await loop.create_datagram_endpoint(lambda : UdpProtocol(engine, self), sock=self.udp_settings.connect())
+            except (UDPSettingsException, OSError) as e :
+                self.stream = None
+                if self.log_file is not None :
+                    self.log_file.error("Stream %s : Failed to open UDP stream: %s",self.stream_id,e)
+                raise OpenConnectionError(e) from e
+            self.stream = transport
+            self._engine_connection = transport
+            self._engine_address = self.udp_settings.get_send_address()
+        elif stream_type == StreamType.NTRIP:
+            settings = self.ntrip_client.ntrip_settings
+            if self.ntrip_client is None or len(settings.host.replace(" ","")) == 0 :
+                raise MissingSettingsException("ntrip client is not set !")
+            protocol = NtripProtocol(engine, self, self.ntrip_client.get_connect_request_bytes())
+            try:
+                transport , _ = await asyncio.wait_for(loop.create_connection(lambda : protocol, settings.host, settings.port,
+                                                                              ssl=settings.get_ssl_context() if settings.tls else None), 5)
+                self.ntrip_client.transport = transport
+                self.ntrip_client.check_connect_response(await asyncio.wait_for(protocol.ready, 5))
+            except (NtripClientError, NtripResponseError, OSError, asyncio.TimeoutError) as e:
+                self.ntrip_client.close()
+                self.stream = None
+                if self.log_file is not None :
+                    self.log_file.error("Stream %s : Failed to open NTRIP stream: %s" , self.stream_id,e)
+                raise OpenConnectionError(f"Failed to open NTRIP Stream : {e}") from e
+            self.ntrip_client.connected = True
+            self.stream = self.ntrip_client
+            self._engine_connection = self.ntrip_client
+            if settings.fixed_pos:
+                self.ntrip_client.create_gga_string()
+        elif stream_type == StreamType.FILE:
+            if self.file_settings is None or self.file_settings.file_name == "":
+                raise MissingSettingsException("no file to replay !")
+            try:
+                self.stream = self.file_settings.connect()
+            except FileSettingsException as e:
+                self.stream = None
+                raise OpenConnectionError(e) from e
+        elif stream_type == StreamType.NTRIP_CASTER:
+            try:
+                self.stream = self.caster_settings.connect(self.stream_id)
+            except CasterSettingsException as e:
+                self.stream = None
+                raise OpenConnectionError(e) from e
+        elif stream_type == StreamType.NTRIP_SERVER:
+            if self.ntrip_server is None or len(self.ntrip_server.ntrip_settings.host.replace(" ","")) == 0 :
+                raise MissingSettingsException("ntrip server is not set !")
+            try:
+                # The handshake is blocking : it's done outside of the loop
+                await loop.run_in_executor(None, self.ntrip_server.connect)
+            except (NtripServerError, NtripSettingsException, OSError) as e:
+                self.stream = None
+                if self.log_file is not None :
+                    self.log_file.error("Stream %s : Failed to open NTRIP server stream: %s" , self.stream_id,e)
+                raise OpenConnectionError(f"Failed to open NTRIP Server Stream : {e}") from e
+            self.stream = self.ntrip_server
+        elif stream_type == StreamType.NONE :
+            raise InvalidStreamTypeException(" No configuration selected ")
+        else:
+            raise InvalidStreamTypeException(f" {stream_type.name} is not a valid Stream type !")
+        self.connected = True
+        match stream_type :
+            case StreamType.Serial :
+                self._start_stream_task(self.datalink_serial_task)
+            case StreamType.FILE :
+                self._start_stream_task(self.datalink_file_task)
+            case StreamType.NTRIP_CASTER :
+                self._start_stream_task(self.datalink_caster_task)
+            case StreamType.NTRIP_SERVER :
+                self._start_stream_task(self.datalink_ntrip_server_task)
+            case _ :
+                self._start_stream_task(None)
+        if stream_type == StreamType.NTRIP:
+            if self.ntrip_client.ntrip_settings.fixed_pos:
+                self.linked_data[self.stream_id].put(self.ntrip_client.fixed_pos_gga.encode(encoding='ISO-8859-1'))
+            if len(protocol.initial_data) != 0 :
+                engine.forward(self, protocol.initial_data)
+
+    async def disconnect_async(self):
+        """
+        Disconnects the port on the loop of the asyncio engine
+        """
+        self._disconnect()
+
+    def reconnect(self):
+        """
+        Connects again a stream disconnected by an error ,
+        the data waiting in its output queue is sent once it's connected
+        """
+        self._reconnecting = True
+        try :
+            self.connect()
+        finally :
+            self._reconnecting = False
+        if not self.connected :
+            raise OpenConnectionError(f"Stream {self.stream_id} couldn't be reconnected")
 
     def disconnect(self):
         """
         Disconnects the port if is connected.
         """
+        self.supervisor.cancel()
+        self.supervisor.reset()
+        if self.io_engine is not None and self.io_engine.is_async and not self.io_engine.in_loop():
+            return self.io_engine.run(self.disconnect_async())
+        self._disconnect()
+
+    def _disconnect(self):
         if self.stream is not None:
             if self.log_file is not None :
                 self.log_file.info("Stream %s : Disconnecting stream",self.stream_id)
@@ -319,10 +633,16 @@ class Stream:
                     self.send_script(self.linked_data[self.stream_id], False)
                 self.stop_event.set()
                 self.current_task = None
-                self.datalink_stream_thread.join()
+                if self.io_engine is not None and self.io_engine.is_registered(self):
+                    self.io_engine.unregister(self)
+                elif self.datalink_stream_thread is not None :
+                    self.datalink_stream_thread.join()
                 if self.log_file is not None :
                     self.log_file.debug("Stream %s : wait for Thread to stop",self.stream_id)
+                if self.stream_type == StreamType.UDP :
+                    self.udp_settings.leave_group(self.stream.get_extra_info("socket") if isinstance(self.stream, asyncio.BaseTransport) else self.stream)
                 self.stream.close()
+                self._close_logger()
                 self.connected = False
                 self.data_transfer_input = 0.0
                 self.data_transfer_output = 0.0
@@ -366,6 +686,12 @@ class Stream:
             return self.udp_settings.to_string()
         elif self.stream_type == StreamType.NTRIP:
             return self.ntrip_client.ntrip_settings.to_string()
+        elif self.stream_type == StreamType.FILE:
+            return self.file_settings.to_string()
+        elif self.stream_type == StreamType.NTRIP_CASTER:
+            return self.caster_settings.to_string()
+        elif self.stream_type == StreamType.NTRIP_SERVER:
+            return self.ntrip_server.ntrip_settings.to_string()
         else:
             return ""
 
@@ -421,7 +747,7 @@ class Stream:
         """
         send a command to ouput
         """
-        self.linked_data[self.stream_id].put(command)
+        self.linked_data[self.stream_id].put(command.encode(encoding='ISO-8859-1'))
     # Getter & Setter
 
     def toggle_incomming_data_visibility(self):
@@ -517,6 +843,145 @@ class Stream:
                 self.log_file.error("Stream %s : Logging file Path not found : %s",self.stream_id,new_file_name)
             raise LogFileException("Path not found")
 
+    def set_log_buffer(self, new_size : int , new_flush_interval : float):
+        """
+        Set how the data is buffered before being written in the logging file
+
+        Args:
+            new_size (int): data is written when this number of bytes is waiting
+            new_flush_interval (float): maximum time in seconds before waiting data is written
+        """
+        self.log_buffer_size = new_size
+        self.log_flush_interval = new_flush_interval
+
+    def set_log_format(self, new_log_format : LogFormat):
+        """
+        Set the format of the logging file , used the next time the stream is connected
+
+        Args:
+            new_log_format (LogFormat): RAW data or TIMESTAMPED records with a time index
+        """
+        self.log_format = new_log_format
+
+    def set_log_rotation(self, new_rotation : LogRotation):
+        """
+        Set the segmentation , compression and retention of the logging file ,
+        used the next time the stream is connected
+
+        Args:
+            new_rotation (LogRotation): the rotation settings
+        """
+        self.log_rotation = new_rotation
+
+    def set_link_buffer(self, new_size : int , new_policy : OverflowPolicy):
+        """
+        Set the size of the buffer holding the data sent to this stream by the linked streams
+        and the policy applied when it's full
+
+        Args:
+            new_size (int): size of the buffer in bytes , 0 for no limit
+            new_policy (OverflowPolicy): the overflow policy
+        """
+        self.link_buffer_size = new_size
+        self.link_overflow_policy = new_policy
+        if self.linked_data is not None and isinstance(self.linked_data[self.stream_id], LinkQueue):
+            self.linked_data[self.stream_id].set_limit(new_size, new_policy)
+
+    def get_dropped_data(self, link : int = None) -> tuple[int, int]:
+        """
+        Return the data dropped because a link buffer was full
+
+        Args:
+            link (int, optional): id of a linked stream : data sent by this stream and dropped by the linked stream.
+            If None : every data sent to this stream and dropped by its own buffer
+
+        Returns:
+            tuple[int, int]: number of dropped chunks and dropped bytes
+        """
+        if link is not None :
+            if isinstance(self.linked_data[link], LinkQueue):
+                return self.linked_data[link].get_dropped(self.stream_id)
+        elif isinstance(self.linked_data[self.stream_id], LinkQueue):
+            return self.linked_data[self.stream_id].get_dropped()
+        return 0 , 0
+
+    def set_framing(self, new_framing : FramingType):
+        """
+        Set the framing stage applied to the incoming data before it's sent to the linked streams.
+        Only complete frames are sent to the linked streams
+
+        Args:
+            new_framing (FramingType): the framing stage , FramingType.NONE to send the data as it's read
+        """
+        self.framing = new_framing
+        match new_framing :
+            case FramingType.LINE :
+                self.framer = LineFramer()
+            case FramingType.RTCM3 :
+                self.framer = Rtcm3Framer()
+            case FramingType.SBF :
+                self.framer = SbfFramer()
+            case FramingType.NMEA :
+                self.framer = NmeaFramer()
+            case _ :
+                self.framer = None
+
+    def set_link_filter(self, link : int , frame_filter : FrameFilter):
+        """
+        Select the frames sent to a linked stream , only used when a framing stage is set
+
+        Args:
+            link (int): id of the linked stream
+            frame_filter (FrameFilter): the filter , None to send every frame
+        """
+        if frame_filter is None :
+            self.link_filters.pop(link, None)
+        else :
+            self.link_filters[link] = frame_filter
+
+    def get_first_byte_latency(self) -> float | None:
+        """
+        Return the time between the connection of the last client of a TCP server
+        and the first data sent to this client ,
+        for a TCP client the time between its last (re)connection and the first data received from the server
+
+        Returns:
+            float | None: latency in seconds , None if no data was exchanged yet
+        """
+        if self.tcp_settings.stream_mode != StreamMode.SERVER :
+            return self._first_byte_latency
+        if self.tcp_clients is None :
+            return None
+        return self.tcp_clients.first_byte_latency
+
+    def _tcp_connection_opened(self):
+        self._connect_time = time.monotonic()
+        self._first_byte_latency = None
+
+    def _tcp_first_byte_received(self):
+        if self._connect_time is None :
+            return
+        self._first_byte_latency = time.monotonic() - self._connect_time
+        if self.log_file is not None :
+            self.log_file.info("Stream %s : first data received %.1f ms after the connection",
+                               self.stream_id, self._first_byte_latency * 1000)
+
+    def set_reconnect_policy(self, new_policy : ReconnectPolicy):
+        """
+        Set how the stream is reconnected after an error
+
+        Args:
+            new_policy (ReconnectPolicy): the new policy
+        """
+        self.supervisor.policy = new_policy
+
+    def get_reconnect_counters(self) -> dict:
+        """
+        Return the reconnection counters of the stream : state of the circuit breaker ,
+        number of failures , reconnection attempts and successful reconnections
+        """
+        return self.supervisor.get_counters()
+
     def set_stream_type(self,new_stream_type : StreamType):
         """
         Change the stream type of the current stream
@@ -542,6 +1007,9 @@ class Stream:
         Returns:
             status(bool): return True if stream is connected , otherwise False
         """
+        if self.io_engine is not None and self.io_engine.is_registered(self):
+            self.connected = True
+            return self.connected
         if self.datalink_stream_thread is None :
             return False
         if self.datalink_stream_thread.is_alive() :
@@ -559,9 +1027,13 @@ class Stream:
         while not queue_to_empty.empty():
             queue_to_empty.get()
 
-    def _exception_disconnect(self):
+    def _exception_disconnect(self, error : Exception = None , reconnect : bool = True):
         """
         Disconnects the port if is connected in case of a exception caused in the task Thread
+
+        Args:
+            error (Exception, optional): the error that caused the disconnection
+            reconnect (bool, optional): let the reconnect supervisor connect the stream again
         """
         self.stop_event.set()
         self.current_task = None
@@ -569,16 +1041,283 @@ class Stream:
             if self.stream is not None:
                 self.stream.close()
         finally:
+            self._close_logger()
             self.connected = False  
             self.data_transfer_input = 0.0
             self.data_transfer_output = 0.0
+            # A stream too slow for the data of its linked streams would overflow again once reconnected
+            if reconnect and not isinstance(error, LinkOverflowException) :
+                self.supervisor.stream_failed(error)
+
+    def _close_logger(self):
+        """
+        Write the remaining data in the log file and close it
+        """
+        if self.logger is None :
+            return
+        self.logger.close()
+        if self.log_file is not None :
+            if self.logger.error is not None :
+                self.log_file.error("Stream %s : Failed to write the logging file : %s",self.stream_id,self.logger.error)
+            if self.logger.dropped_bytes != 0 :
+                self.log_file.warning("Stream %s : %s bytes not written in the logging file",self.stream_id,self.logger.dropped_bytes)
+        self.logger = None
     
     
     
+    def _forward_incoming_data(self, incoming_data : bytes, linked_ports : list[int]):
+        """
+        Log , show and send the data read on the stream to the linked streams.
+        The chunk is immutable : every linked stream receives a reference to the same
+        bytes object , it is never copied nor decoded for the fan-out
+
+        Args:
+            incoming_data (bytes): data read on the stream
+            linked_ports (list[int]): id of the streams that receive the data
+        """
+        if len(incoming_data) == 0:
+            return
+        if self.logging and self.logger is not None:
+            self.logger.write(incoming_data)
+        if self.show_incoming_data.is_set():
+            self.data_to_show.put(incoming_data)
+        frames = None
+        if self.framer is not None :
+            frames = self.framer.feed(incoming_data)
+            if len(frames) == 0 :
+                return
+            incoming_data = frames[0].data if len(frames) == 1 else b"".join(frame.data for frame in frames)
+        if linked_ports is None :
+            return
+        source = self.stream_id
+        for portid in linked_ports:
+            frame_filter = self.link_filters.get(portid)
+            if frames is not None and frame_filter is not None :
+                filtered_data = b"".join(frame.data for frame in frames if frame_filter.accepts(frame))
+                if len(filtered_data) != 0 :
+                    self.linked_data[portid].put(filtered_data, source=source)
+            else :
+                self.linked_data[portid].put(incoming_data, source=source)
+
+    # Selector engine Methods
+
+    def engine_open(self, engine):
+        """
+        Prepare the opened stream to be handled by the selector engine.
+        Called from the engine thread when the stream is registered
+
+        Args:
+            engine (SelectorEngine): the engine handling the stream
+        """
+        self._engine_reset(engine)
+        if self.stream_type == StreamType.Serial:
+            self._engine_connection = self.stream
+            self._engine_output = self._open_serial_output(self.stream)
+            engine.add_reader(self.stream, self, self._engine_read_serial)
+        elif self.stream_type == StreamType.TCP:
+            if self.tcp_settings.stream_mode == StreamMode.SERVER:
+                self.stream.listen(self.tcp_settings.backlog)
+                self.stream.setblocking(False)
+                self._engine_connection = self._open_tcp_clients()
+                engine.add_reader(self.stream, self, self._engine_accept_tcp)
+            else :
+                # The engine thread never waits for a slow server : what it doesn't accept is kept in the output buffer
+                self.stream.setblocking(False)
+                # The queued data is already coalesced before each write
+                self.stream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self._engine_connection = self.stream
+                self._engine_output = OutputBuffer(self.stream, self.stream.send)
+                engine.add_reader(self.stream, self, self._engine_read_tcp)
+        elif self.stream_type == StreamType.UDP:
+            self.stream.settimeout(0.1)
+            self._engine_connection = self.stream
+            self._engine_address = self.udp_settings.get_send_address()
+            if self.udp_settings.dataflow.value in (1, 2):
+                engine.add_reader(self.stream, self, self._engine_read_udp)
+        elif self.stream_type == StreamType.NTRIP:
+            self.stream.socket.settimeout(0.1)
+            self._engine_connection = self.stream
+            if self.ntrip_client.ntrip_settings.fixed_pos :
+                self.linked_data[self.stream_id].put(self.ntrip_client.fixed_pos_gga.encode(encoding='ISO-8859-1'))
+            engine.add_reader(self.stream.socket, self, self._engine_read_ntrip)
+            if len(self.stream.initial_data) != 0 :
+                self._engine_forward(self.stream.initial_data)
+        else :
+            raise InvalidStreamTypeException(f" {self.stream_type.name} is not a valid Stream type !")
+        if self.log_file is not None :
+            self.log_file.info("Stream %i : handled by the selector engine " , self.stream_id )
+
+    def _engine_reset(self, engine):
+        self._engine = engine
+        self._engine_connection = None
+        self._engine_address = None
+        self._engine_output = None
+        self._engine_linked_ports = []
+        self._engine_incoming = 0
+        self._engine_outgoing = 0
+        self._engine_time = datetime.now()
+
+    def engine_poll(self):
+        """
+        Update the linked streams , send the queued data and update the data rate.
+        Called from the engine thread at each loop iteration
+        """
+        if not self.update_linked_ports_queue.empty():
+            task_update_linked_port(self.update_linked_ports_queue, self._engine_linked_ports)
+        self._engine_send()
+        self._engine_incoming , self._engine_outgoing , self._engine_time = task_data_transfer_rate(self, self._engine_time, self._engine_incoming, self._engine_outgoing)
+
+    def engine_close(self, engine, flush : bool = True):
+        """
+        Send the remaining data (closeup script) and close the client connection if any.
+        Called from the engine thread when the stream is unregistered
+
+        Args:
+            engine (SelectorEngine): the engine handling the stream
+            flush (bool): send the remaining queued data before closing
+        """
+        try :
+            if flush :
+                self._engine_send()
+                if self._engine_output is not None :
+                    self._engine_output.drain(1)
+        finally :
+            engine.remove_readers(self)
+            if self._engine_output is not None :
+                self._engine_output.clear()
+                self._engine_output = None
+            if self.stream_type == StreamType.TCP and self.tcp_settings.stream_mode == StreamMode.SERVER:
+                if self.tcp_clients is not None :
+                    self.tcp_clients.close(flush_timeout = 1 if flush else 0)
+            self._engine_connection = None
+            self._engine = None
+
+    def _engine_send(self):
+        if self._engine_connection is None :
+            return
+        if isinstance(self._engine_connection, TcpClientGroup):
+            # The data waits in the queue until a client is connected
+            if len(self._engine_connection) == 0 :
+                return
+            self._engine_connection.flush()
+        if self.stream_type == StreamType.UDP and self.udp_settings.dataflow.value not in (0, 2):
+            self._clear_queue(self.linked_data[self.stream_id])
+            return
+        connection = self._engine_connection
+        if self._engine_output is not None :
+            # Nothing more is taken from the queue until the connection accepted the previous data ,
+            # the overflow policy of the queue applies meanwhile
+            self._engine_output.flush()
+            if len(self._engine_output) != 0 :
+                return
+            connection = self._engine_output
+        address = self._engine_address if self.stream_type == StreamType.UDP else None
+        if not self.linked_data[self.stream_id].empty():
+            self._engine_outgoing += task_send_command(self.linked_data[self.stream_id], connection, self.show_outgoing_data.is_set(),
+                                                       udp_send_address=address, data_to_show=self.data_to_show,
+                                                       logger=self.logger, line_termination=self.line_termination)
+        if self._engine_output is not None and len(self._engine_output) != 0 :
+            self._engine.add_writer(self._engine_output.connection, self, self._engine_write_ready)
+
+    def _engine_write_ready(self, connection):
+        self._engine_output.flush()
+        if len(self._engine_output) == 0 :
+            self._engine.remove_writer(connection)
+            self._engine_send()
+
+    def _open_serial_output(self, serial : Serial) -> OutputBuffer | None:
+        # The serial port is opened in non blocking mode : it's written directly to know how much it accepted
+        if not hasattr(serial, "fileno"):
+            return None
+        fd = serial.fileno()
+        return OutputBuffer(serial, lambda data : os.write(fd, data))
+
+    def _engine_forward(self, incoming_data : bytes):
+        if not self.update_linked_ports_queue.empty():
+            task_update_linked_port(self.update_linked_ports_queue, self._engine_linked_ports)
+        self._engine_incoming += len(incoming_data)
+        self._forward_incoming_data(incoming_data, self._engine_linked_ports)
+
+    def _engine_read_serial(self, serial : Serial):
+        self._engine_forward(serial.read(serial.in_waiting or 1))
+
+    def _engine_accept_tcp(self, tcp : socket.socket):
+        for conn in self._accept_tcp_clients(tcp, self.tcp_clients):
+            self._engine.add_reader(conn, self, self._engine_read_tcp_client)
+
+    def _engine_read_tcp_client(self, conn : socket.socket):
+        incoming_data = self._read_tcp_client(conn, self.tcp_clients)
+        if conn not in self.tcp_clients.clients :
+            self._engine.remove_reader(conn)
+        if len(incoming_data) != 0 :
+            self._engine_forward(incoming_data)
+
+    def _engine_read_tcp(self, conn : socket.socket):
+        try :
+            incoming_data = conn.recv(4096)
+        except BlockingIOError :
+            return
+        if len(incoming_data) == 0 :
+            # The reconnect supervisor connects the stream again
+            raise StreamThreadException(f"Stream {self.stream_id} : connection closed by the server")
+        if self._first_byte_latency is None :
+            self._tcp_first_byte_received()
+        self._engine_forward(incoming_data)
+
+    def _engine_read_udp(self, udp : socket.socket):
+        for incoming_data , address in task_receive_datagrams(udp):
+            if self.udp_settings.replies_to_sender():
+                self._engine_address = (address[0], self.udp_settings.port)
+            self._engine_forward(incoming_data)
+
+    def _engine_read_ntrip(self, ntrip_socket : socket.socket):
+        incoming_data = ntrip_socket.recv(4096)
+        if len(incoming_data) == 0 :
+            raise StreamThreadException(f"Stream {self.stream_id} : connection closed by the NTRIP caster")
+        # TLS sockets may hold decrypted data that the selector can't see
+        while hasattr(ntrip_socket, "pending") and ntrip_socket.pending() > 0 :
+            incoming_data += ntrip_socket.recv(ntrip_socket.pending())
+        self._engine_forward(self.stream.decode(incoming_data))
+
+    # Asyncio engine Methods
+
+    def _async_connection_made(self, protocol : TcpProtocol):
+        if self.tcp_settings.stream_mode == StreamMode.SERVER:
+            self.tcp_clients.add(protocol.transport, protocol.transport.get_extra_info("peername"))
+            return
+        if self._engine_connection is not None and self._engine_connection is not protocol.transport :
+            # Only one client is served at a time
+            protocol.transport.close()
+            return
+        self._engine_connection = protocol.transport
+        self._tcp_connection_opened()
+        if self.log_file is not None :
+            self.log_file.info("Stream %s : connected to %s", self.stream_id, protocol.transport.get_extra_info("peername"))
+
+    def _async_data_received(self, protocol : TcpProtocol):
+        if self._first_byte_latency is None and protocol.transport is self._engine_connection :
+            self._tcp_first_byte_received()
+
+    def _async_connection_lost(self, protocol : TcpProtocol, exc : Exception):
+        if self.tcp_settings.stream_mode == StreamMode.SERVER:
+            self.tcp_clients.remove(protocol.transport)
+            return
+        if self._engine_connection is not protocol.transport :
+            return
+        self._engine_connection = None
+        if self._engine is None or not self._engine.is_registered(self):
+            return
+        # The reconnect supervisor connects the stream again
+        self._engine.fail(self, StreamThreadException(f"Stream {self.stream_id} : connection closed by the server : {exc}"))
+
+    def _async_datagram_received(self, address):
+        if self.udp_settings.replies_to_sender():
+            self._engine_address = (address[0], self.udp_settings.port)
+
     # Thread task Methods 
     
     def datalink_serial_task(self, serial: Serial, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue 
-                           , data_to_show : queue.Queue  , logger ):
+                           , data_to_show : RingBuffer  , logger ):
         """
         The task for data link Stream using serial communication.
 
@@ -603,7 +1342,7 @@ class Stream:
         except TaskException as e :
             if self.log_file is not None :
                 self.log_file.error("Stream %i :  Start script couldn't finish : %e ", self.stream_id , e )
-            self._exception_disconnect()
+            self._exception_disconnect(e)
             raise ScriptFileException(f"Start script couldn't finish {e}") from e
         current_time = datetime.now()
         #Main loop
@@ -615,20 +1354,14 @@ class Stream:
             try:
                 if serial is not None:
                     if serial.is_open:
-                        incoming_data = serial.readline()
+                        # Bulk read of every byte waiting , the port timeout bounds the wait for the first one
+                        incoming_data = serial.read(serial.in_waiting or 1)
                         temp_incoming_tranfert += len(incoming_data)
-                        if len(incoming_data) != 0 :
-                            if self.show_incoming_data.is_set() :
-                                data_to_show.put(incoming_data.decode(encoding='ISO-8859-1'))
-                            if self.logging:
-                                logger.write(incoming_data.decode(encoding='ISO-8859-1'))
-                            if linked_ports is not None:
-                                for portid in linked_ports:
-                                    linked_data[portid].put(incoming_data)
+                        self._forward_incoming_data(incoming_data, linked_ports)
                         if not linked_data[self.stream_id].empty():
                             temp_outgoing_tranfert += task_send_command(linked_data[self.stream_id],serial,self.show_outgoing_data.is_set(), data_to_show=data_to_show,logger=logger,line_termination=self.line_termination )
             except Exception as e:
-                self._exception_disconnect()
+                self._exception_disconnect(e)
                 if self.log_file is not None :
                     self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , e )
                 raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
@@ -649,118 +1382,103 @@ class Stream:
         return 0
 
     def datalink_tcp_server_task(self, tcp: socket.socket, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue 
-                              ,  data_to_show : queue.Queue , logger):
+                              ,  data_to_show : RingBuffer , logger):
         """
         The task for data link Stream using TCP communication.
-
+        Every client connected to the server receives the outgoing data ,
+        the data received from any client is sent to the linked streams
         """
         linked_ports: list[int] = []
-        tcp.settimeout(0.1)
-        tcp.setblocking(0)
         temp_incoming_tranfert = 0
         temp_outgoing_tranfert = 0
-        # Wait for a client to connect to the server
+        clients = self._open_tcp_clients()
+        selector = selectors.DefaultSelector()
+        tcp.listen(self.tcp_settings.backlog)
+        tcp.setblocking(False)
+        selector.register(tcp, selectors.EVENT_READ)
         if self.log_file is not None :
             self.log_file.info("Stream %i : Task Started " , self.stream_id )
-            self.log_file.info("Stream %i : waiting for client to connect " , self.stream_id)
-        while True:
-            try:
-                tcp.listen()
-                conn, _ = tcp.accept()
-                conn.settimeout(0.1)
-                break
-            except (TimeoutError , BlockingIOError) :
-                if self.stop_event.is_set():
-                    return self._exception_disconnect()
-        # Send startup command
-        if self.log_file is not None :
-            self.log_file.info("Stream %i : sending startup script" , self.stream_id )
-        try:
-            if not self.linked_data[self.stream_id].empty():
-                task_send_command(self.linked_data[self.stream_id],conn,logger=logger,line_termination=self.line_termination)
-        except TaskException as e :
-            if self.log_file is not None :
-                self.log_file.error("Stream %i :  Start script couldn't finish : %e ", self.stream_id , e )
-            self._exception_disconnect()
-            raise ScriptFileException(f"Start script couldn't finish {e}") from e
+            self.log_file.info("Stream %i : waiting for clients to connect " , self.stream_id)
         current_time = datetime.now()
-        #Main loop
-        if self.log_file is not None :
-            self.log_file.info("Stream %i : sending startup script finished  ", self.stream_id )
-            self.log_file.info("Stream %i : start main loop",self.stream_id )
-        while self.stop_event.is_set() is not True:
-            temp_incoming_tranfert ,temp_outgoing_tranfert, current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)
-            try:
-                #If a client is connected
-                if conn is not None:
-                    #Read input data 
-                    try:
-                        incoming_data = conn.recv(4096)
-                        temp_incoming_tranfert += len(incoming_data)
-                        if len(incoming_data) == 0:
-                            conn = None
-                    except socket.timeout:
-                        incoming_data = ""
-                    if len(incoming_data) != 0 :
-                        if self.logging:
-                            logger.write(incoming_data.decode(encoding='ISO-8859-1'))
-                        # Print data if show data input
-                        if self.show_incoming_data.is_set() :
-                            data_to_show.put(incoming_data.decode(encoding='ISO-8859-1'))
-                        # Send input data to linked Streams
-                        if linked_ports is not None :
-                            for portid in linked_ports:
-                                linked_data[portid].put(incoming_data)
+        try :
+            while self.stop_event.is_set() is not True:
+                temp_incoming_tranfert ,temp_outgoing_tranfert, current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)
+                try:
+                    for key, events in selector.select(0.1):
+                        if key.fileobj is tcp :
+                            self._accept_tcp_clients(tcp, clients)
+                            continue
+                        if events & selectors.EVENT_WRITE :
+                            clients.flush(key.fileobj)
+                        if events & selectors.EVENT_READ :
+                            incoming_data = self._read_tcp_client(key.fileobj, clients)
+                            temp_incoming_tranfert += len(incoming_data)
+                            self._forward_incoming_data(incoming_data, linked_ports)
                     #Send output data comming from other streams and print data if showdata is set
-                    if not linked_data[self.stream_id].empty():
-                        temp_outgoing_tranfert+= task_send_command(linked_data[self.stream_id] , conn , self.show_outgoing_data.is_set(), data_to_show=data_to_show,logger=logger,line_termination=self.line_termination)
-                else :
-                    time.sleep(1)
-                    #Wait for a new Client if the current one has disconnect
+                    # The data (and the startup script) waits in the queue until a client is connected
+                    if len(clients) != 0 and not linked_data[self.stream_id].empty():
+                        temp_outgoing_tranfert+= task_send_command(linked_data[self.stream_id] , clients , self.show_outgoing_data.is_set(), data_to_show=data_to_show,logger=logger,line_termination=self.line_termination)
+                    _update_tcp_selector(selector, tcp, clients)
+                except Exception as exc:
+                    self._exception_disconnect(exc)
                     if self.log_file is not None :
-                        self.log_file.info(f"Stream {self.stream_id} : Client disconnected  {e}")
-                    while True:
-                        try:
-                           
-                            tcp.listen()
-                            conn, address = tcp.accept()
-                            conn.settimeout(0.1)
-                            if self.log_file is not None :
-                                self.log_file.info(f"Stream {self.stream_id} : new Client Connected  {e}")
-                            break
-                        except Exception as e :
-                            if self.stop_event.is_set():
-                                raise e 
-            except Exception as exc:
-                self._exception_disconnect()
-                if self.log_file is not None :
-                    self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , exc )
-                raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {exc}") from exc
-            #Update current linked Streams list
-            if not update_linked_ports_queue.empty():
-                linked_ports = task_update_linked_port(update_linked_ports_queue , linked_ports)
-        #Send closeup commands
-        if self.log_file is not None :
-            self.log_file.info("Stream %i : main loop ended ",self.stream_id )
-            self.log_file.info("Stream %i : sending closing script" , self.stream_id )
-        try : 
-            if not self.linked_data[self.stream_id].empty():
-                task_send_command(self.linked_data[self.stream_id],conn,logger=logger,line_termination=self.line_termination)
-        except TaskException as e :
+                        self.log_file.error("Stream %i %s has been disconnected, error: %s",self.stream_id , self.stream_type , exc )
+                    raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {exc}") from exc
+                #Update current linked Streams list
+                if not update_linked_ports_queue.empty():
+                    linked_ports = task_update_linked_port(update_linked_ports_queue , linked_ports)
+            #Send closeup commands
             if self.log_file is not None :
-                    self.log_file.error("Stream %i :  closing script couldn't finish : %e " , self.stream_id , e)
-            raise ScriptFileException(f"Closeup script couldn't finish {e}") from e
+                self.log_file.info("Stream %i : main loop ended ",self.stream_id )
+                self.log_file.info("Stream %i : sending closing script" , self.stream_id )
+            try : 
+                if len(clients) != 0 and not self.linked_data[self.stream_id].empty():
+                    task_send_command(self.linked_data[self.stream_id],clients,logger=logger,line_termination=self.line_termination)
+            except TaskException as e :
+                if self.log_file is not None :
+                        self.log_file.error("Stream %i :  closing script couldn't finish : %s " , self.stream_id , e)
+                raise ScriptFileException(f"Closeup script couldn't finish {e}") from e
+        finally :
+            selector.close()
+            clients.close(flush_timeout = 1)
         return 0
-    
+
+    def _open_tcp_clients(self) -> TcpClientGroup:
+        self.tcp_clients = TcpClientGroup(self.tcp_settings.max_clients, self.tcp_settings.client_buffer_size,
+                                          self.stream_id, self.log_file)
+        return self.tcp_clients
+
+    def _accept_tcp_clients(self, tcp : socket.socket, clients : TcpClientGroup) -> list[socket.socket]:
+        # Accept every pending connection , return the new client sockets
+        new_connections = []
+        while True :
+            try :
+                conn, address = tcp.accept()
+            except (BlockingIOError, InterruptedError) :
+                return new_connections
+            if clients.add(conn, address) is not None :
+                new_connections.append(conn)
+
+    def _read_tcp_client(self, conn : socket.socket, clients : TcpClientGroup) -> bytes:
+        # Read the data of a client , the client is removed if it has disconnected
+        try :
+            incoming_data = conn.recv(4096)
+        except (BlockingIOError, InterruptedError) :
+            return b""
+        except OSError :
+            incoming_data = b""
+        if len(incoming_data) == 0 :
+            clients.remove(conn)
+        return incoming_data
+
     def datalink_tcp_client_task(self, tcp: socket.socket, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue 
-                              ,  data_to_show : queue.Queue , logger):
+                              ,  data_to_show : RingBuffer , logger):
         """
         The task for data link Stream using TCP communication.
 
         """
         linked_ports: list[int] = []
         tcp.settimeout(0.1)
-        conn = 1
         temp_incoming_tranfert = 0
         temp_outgoing_tranfert = 0
         #Send startup command
@@ -773,7 +1491,7 @@ class Stream:
         except TaskException as e :
             if self.log_file is not None :
                 self.log_file.error("Stream %i :  Start script couldn't finish : %e ", self.stream_id , e )
-            self._exception_disconnect()
+            self._exception_disconnect(e)
             raise ScriptFileException(f"Start script couldn't finish {e}") from e
         current_time = datetime.now()
         #Main loop
@@ -783,49 +1501,25 @@ class Stream:
         while self.stop_event.is_set() is not True:
             temp_incoming_tranfert ,temp_outgoing_tranfert,current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)          
             try:
-                #While Connection still up 
-                if conn  is not None :
-                    #Read input data 
-                    try:
-                        incoming_data = tcp.recv(4096)
-                        temp_incoming_tranfert += len(incoming_data)
-                        if len(incoming_data) == 0:
-                            conn = None
-                    except socket.timeout:
-                        incoming_data = ""
-                    except ConnectionResetError :
-                        conn = None
-                    except BrokenPipeError :
-                        conn = None
-                    # Print if show data
-                    if len(incoming_data) != 0:
-                        if self.logging:
-                            logger.write(incoming_data.decode(encoding='ISO-8859-1'))
-                        if self.show_incoming_data.is_set():
-                            data_to_show.put(incoming_data.decode(encoding='ISO-8859-1'))
-                        # Send data to linked stream
-                        if linked_ports is not None:
-                            for portid in linked_ports:
-                                linked_data[portid].put(incoming_data)
-                    # Output data comming from other streams
-                    if not linked_data[self.stream_id].empty():
-                        returnedValue = task_send_command(linked_data[self.stream_id],tcp,self.show_outgoing_data.is_set(),data_to_show=data_to_show,logger=logger,line_termination=self.line_termination)
-                        if returnedValue is not None :
-                            temp_outgoing_tranfert += returnedValue
-                else : 
-                    # If connection Lost try to reconnect to the server
-                    while True:
-                        try:
-                            tcp = self.tcp_settings.connect()
-                            conn = 1
-                            break
-                        except TimeoutError:
-                            if self.stop_event.is_set():
-                                return 0
-                            
+                #Read input data 
+                try:
+                    incoming_data = tcp.recv(4096)
+                    temp_incoming_tranfert += len(incoming_data)
+                    if len(incoming_data) == 0:
+                        # The reconnect supervisor connects the stream again
+                        raise StreamThreadException("connection closed by the server")
+                    if self._first_byte_latency is None :
+                        self._tcp_first_byte_received()
+                except socket.timeout:
+                    incoming_data = b""
+                # Print if show data
+                self._forward_incoming_data(incoming_data, linked_ports)
+                # Output data comming from other streams
+                if not linked_data[self.stream_id].empty():
+                    temp_outgoing_tranfert += task_send_command(linked_data[self.stream_id],tcp,self.show_outgoing_data.is_set(),data_to_show=data_to_show,logger=logger,line_termination=self.line_termination)
             #If there is any probleme , disconnect everything and kill thread
             except Exception as e:
-                self._exception_disconnect()
+                self._exception_disconnect(e)
                 if self.log_file is not None :
                     self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , e )
                 raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
@@ -846,31 +1540,26 @@ class Stream:
         return 0
                     
     def datalink_udp_task(self, udp: socket.socket, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue 
-                           , data_to_show : queue.Queue, logger ):
+                           , data_to_show : RingBuffer, logger ):
         """
         Task for data link Stream using UDP communication.
         """
         linked_ports = []
         temp_incoming_tranfert = 0
         temp_outgoing_tranfert = 0
-        bytes_address_pair = None
         udp.settimeout(0.1)
-        if self.udp_settings.specific_host is True:
-            sendaddress = (self.udp_settings.host, self.udp_settings.port)
-        else:
-            sendaddress = ('localhost', self.udp_settings.port)
+        sendaddress = self.udp_settings.get_send_address()
         #Send Startup command
         if self.log_file is not None :
             self.log_file.info("Stream %i : Task Started " , self.stream_id )
             self.log_file.info("Stream %i : sending startup script" , self.stream_id )
         try:
             if not self.linked_data[self.stream_id].empty():
-                if sendaddress is not None:
-                    task_send_command(self.linked_data[self.stream_id] , stream=udp , udp_send_address=sendaddress,logger = logger,line_termination = self.line_termination)
+                task_send_command(self.linked_data[self.stream_id] , stream=udp , udp_send_address=sendaddress,logger = logger,line_termination = self.line_termination)
         except TaskException as e :
             if self.log_file is not None :
-                self.log_file.error("Stream %i :  Start script couldn't finish : %e ", self.stream_id , e )
-            self._exception_disconnect()
+                self.log_file.error("Stream %i :  Start script couldn't finish : %s ", self.stream_id , e )
+            self._exception_disconnect(e)
             raise ScriptFileException(f"Start script couldn't finish {e}") from e
         current_time = datetime.now()
         #Main loop
@@ -880,38 +1569,24 @@ class Stream:
         while self.stop_event.is_set() is not True:
             temp_incoming_tranfert ,temp_outgoing_tranfert,current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)
             try:
-                #Continue is Stream is still up
-                if udp is not None:
-                    if self.udp_settings.dataflow.value in (1, 2):
-                        try :
-                            bytes_address_pair = udp.recvfrom(4096)
-                            incoming_data = bytes_address_pair[0]
-                            temp_incoming_tranfert += len(incoming_data)
-                        except socket.timeout :
-                            incoming_data = ""
-                        if len(incoming_data) != 0:
-                            if self.show_incoming_data.is_set():
-                                data_to_show.put(incoming_data.decode(encoding='ISO-8859-1'))
-                                if self.logging:
-                                    logger.write(incoming_data.decode(encoding='ISO-8859-1'))
-
-                            if linked_ports is not None :
-                                for port in linked_ports:
-                                    linked_data[port].put(incoming_data)
-
-                    if self.udp_settings.dataflow.value in (0, 2):
-                        if not linked_data[self.stream_id].empty():
-                            if bytes_address_pair is not None:
-                                send_to_addresse = (bytes_address_pair[1],self.udp_settings.port)
-                            else :
-                                send_to_addresse = sendaddress
-                                returned_value = task_send_command(self.linked_data[self.stream_id] , stream=self.stream , show_data=self.show_outgoing_data.is_set() , udp_send_address=send_to_addresse , data_to_show=self.data_to_show,logger=logger,line_termination=self.line_termination)
-                                if returned_value is not None :
-                                    temp_outgoing_tranfert += returned_value
+                if self.udp_settings.dataflow.value in (1, 2):
+                    for incoming_data , address in task_receive_datagrams(udp):
+                        temp_incoming_tranfert += len(incoming_data)
+                        if self.udp_settings.replies_to_sender():
+                            sendaddress = (address[0], self.udp_settings.port)
+                        self._forward_incoming_data(incoming_data, linked_ports)
+                elif self.stop_event.wait(0.1):
+                    break
+
+                if self.udp_settings.dataflow.value in (0, 2):
+                    if not linked_data[self.stream_id].empty():
+                        temp_outgoing_tranfert += task_send_command(self.linked_data[self.stream_id] , stream=udp , show_data=self.show_outgoing_data.is_set() , udp_send_address=sendaddress , data_to_show=self.data_to_show,logger=logger,line_termination=self.line_termination)
+                else :
+                    self._clear_queue(linked_data[self.stream_id])
             except Exception as e:
-                self._exception_disconnect()
+                self._exception_disconnect(e)
                 if self.log_file is not None :
-                    self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , e )
+                    self.log_file.error("Stream %i %s has been disconnected, error: %s",self.stream_id , self.stream_type , e )
                 raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
             #Update linked Streams list
             if not self.update_linked_ports_queue.empty():
@@ -922,16 +1597,15 @@ class Stream:
             self.log_file.info("Stream %i : sending closing script" , self.stream_id )
         try : 
             if not self.linked_data[self.stream_id].empty():
-                if sendaddress is not None:
-                    task_send_command(self.linked_data[self.stream_id] ,stream= udp  , udp_send_address=sendaddress,logger=logger,line_termination=self.line_termination)
+                task_send_command(self.linked_data[self.stream_id] ,stream= udp  , udp_send_address=sendaddress,logger=logger,line_termination=self.line_termination)
         except TaskException as e :
             if self.log_file is not None :
-                self.log_file.error("Stream %i :  closing script couldn't finish : %e " , self.stream_id , e)
+                self.log_file.error("Stream %i :  closing script couldn't finish : %s " , self.stream_id , e)
             raise ScriptFileException(f"Start script couldn't finish {e}") from e
         return 0
     
     def datalink_ntrip_task(self, ntrip : NtripClient, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue 
-                           , data_to_show : queue.Queue , logger):
+                           , data_to_show : RingBuffer , logger):
         """
         Process the NTRIP data received from the NTRIP client and send correction to other the linked streams .
 
@@ -950,14 +1624,20 @@ class Stream:
             self.log_file.info("Stream %i : sending startup script" , self.stream_id )
         try:
             if self.ntrip_client.ntrip_settings.fixed_pos :
-                self.linked_data[self.stream_id].put(self.ntrip_client.fixed_pos_gga)
+                self.linked_data[self.stream_id].put(self.ntrip_client.fixed_pos_gga.encode(encoding='ISO-8859-1'))
             if not self.linked_data[self.stream_id].empty():
                 task_send_command(self.linked_data[self.stream_id],ntrip ,logger=logger,line_termination=self.line_termination)
         except TaskException as e :
             if self.log_file is not None :
                     self.log_file.error("Stream %i :  Start script couldn't finish : %e ", self.stream_id , e )
-            self._exception_disconnect()
+            self._exception_disconnect(e)
             raise ScriptFileException(f"Start script couldn't finish {e}") from e    
+        # Corrections received with the answer of the caster
+        if len(ntrip.initial_data) != 0 :
+            if not self.update_linked_ports_queue.empty():
+                task_update_linked_port(update_linked_ports_queue,linked_ports)
+            temp_incoming_tranfert += len(ntrip.initial_data)
+            self._forward_incoming_data(ntrip.initial_data, linked_ports)
         current_time = datetime.now()
         #Main loop
         if self.log_file is not None :
@@ -970,28 +1650,23 @@ class Stream:
                     #Read input data
                     try:
                         incoming_data = ntrip.socket.recv(4096)
+                        if len(incoming_data) == 0 :
+                            raise StreamThreadException(f"Stream {self.stream_id} : connection closed by the NTRIP caster")
                         temp_incoming_tranfert += len(incoming_data)
+                        incoming_data = ntrip.decode(incoming_data)
                     except socket.timeout:
-                        incoming_data = ""
+                        incoming_data = b""
                     except (socket.gaierror,socket.herror) as e :
                         raise e
                     # Print data if show data input
-                    if len(incoming_data) != 0:
-                        if self.logging:
-                            logger.write(str(incoming_data))
-                        if self.show_incoming_data.is_set():
-                            data_to_show.put(incoming_data.decode(encoding='ISO-8859-1'))
-                        # Send input data to linked Streams
-                        if linked_ports is not None:
-                            for portid in linked_ports:
-                                linked_data[portid].put(incoming_data.decode(encoding='ISO-8859-1'))
+                    self._forward_incoming_data(incoming_data, linked_ports)
                     #Send output data comming from other streams and print data if showdata is set
                     if not linked_data[self.stream_id].empty():
                         returnedValue = task_send_command(linked_data[self.stream_id],ntrip ,self.show_outgoing_data.is_set(),data_to_show=data_to_show,logger=logger,line_termination=self.line_termination)
                         if returnedValue is not None :
                             temp_outgoing_tranfert += returnedValue
             except Exception as e:
-                self._exception_disconnect()
+                self._exception_disconnect(e)
                 if self.log_file is not None :
                     self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , e )
                 raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
@@ -1028,10 +1703,153 @@ class Stream:
         try :
             self.stream.close()
         finally:
+            self._close_logger()
             self.connected = False  
             self.data_transfer_input = 0.0
             self.data_transfer_output = 0.0
-    
+
+    def datalink_file_task(self, replay : FileReplay, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue
+                           , data_to_show : RingBuffer , logger):
+        """
+        Task for data link Stream replaying a recorded file.
+        Capture files are replayed with the original pacing divided by the speed setting ,
+        raw files and a speed of 0 are replayed as fast as the linked streams accept the data.
+        The data sent to the stream by the linked streams is dropped
+        """
+        linked_ports = []
+        temp_incoming_tranfert = 0
+        current_time = datetime.now()
+        speed = self.file_settings.speed
+        if self.log_file is not None :
+            self.log_file.info("Stream %i : Task Started , replaying %s" , self.stream_id , self.file_settings.file_name)
+        try:
+            while self.stop_event.is_set() is not True:
+                start_time = time.monotonic_ns()
+                for chunk_time , incoming_data in replay.chunks():
+                    if not update_linked_ports_queue.empty():
+                        task_update_linked_port(update_linked_ports_queue, linked_ports)
+                    if chunk_time is not None and speed > 0 :
+                        delay = (start_time + chunk_time / speed - time.monotonic_ns()) / 1e9
+                        if delay > 0 and self.stop_event.wait(delay):
+                            break
+                    elif self.stop_event.is_set():
+                        break
+                    temp_incoming_tranfert += len(incoming_data)
+                    self._forward_incoming_data(incoming_data, linked_ports)
+                    self._clear_queue(linked_data[self.stream_id])
+                    temp_incoming_tranfert , _ , current_time = task_data_transfer_rate(self , current_time , temp_incoming_tranfert , 0)
+                if not self.file_settings.loop :
+                    break
+        except Exception as e:
+            self._exception_disconnect(e)
+            if self.log_file is not None :
+                self.log_file.error("Stream %i %s has been disconnected, error: %e",self.stream_id , self.stream_type , e )
+            raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
+        if self.stop_event.is_set() is not True:
+            if self.log_file is not None :
+                self.log_file.info("Stream %i : end of the replayed file",self.stream_id )
+            self._exception_disconnect(reconnect = False)
+        return 0
+
+    def datalink_caster_task(self, caster : NtripCaster, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue
+                             , data_to_show : RingBuffer , logger):
+        """
+        Task for an embedded NTRIP caster stream.
+        The data sent to the caster by a linked stream is served to the clients of the mountpoints of this stream ,
+        the data sent by the clients is dropped
+        """
+        linked_ports: list[int] = []
+        temp_incoming_tranfert = 0
+        temp_outgoing_tranfert = 0
+        output_queue : LinkQueue = linked_data[self.stream_id]
+        # The caster wakes up as soon as data is queued , the listener of the I/O engine is restored when it stops
+        previous_listener = output_queue.listener
+        output_queue.set_listener(caster.wakeup)
+        if self.log_file is not None :
+            self.log_file.info("Stream %i : Task Started , serving %s" , self.stream_id , ", ".join(caster.mountpoints))
+        current_time = datetime.now()
+        try :
+            while self.stop_event.is_set() is not True:
+                temp_incoming_tranfert ,temp_outgoing_tranfert, current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)
+                try:
+                    temp_incoming_tranfert += caster.poll(0.1)
+                    task_check_overflow(output_queue)
+                    while True :
+                        item = output_queue.get_with_source()
+                        if item is None :
+                            break
+                        outgoing_data , source = item
+                        if isinstance(outgoing_data, str):
+                            # Scripts have no mountpoint
+                            continue
+                        sent = caster.publish(source, outgoing_data)
+                        temp_outgoing_tranfert += sent
+                        if sent == 0 :
+                            continue
+                        if self.show_outgoing_data.is_set():
+                            data_to_show.put(outgoing_data)
+                        if logger is not None and (self.show_outgoing_data.is_set() or logger.log_format == LogFormat.TIMESTAMPED):
+                            logger.write(outgoing_data, Direction.OUTGOING)
+                except Exception as exc:
+                    self._exception_disconnect(exc)
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %i %s has been disconnected, error: %s",self.stream_id , self.stream_type , exc )
+                    raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {exc}") from exc
+                if not update_linked_ports_queue.empty():
+                    linked_ports = task_update_linked_port(update_linked_ports_queue , linked_ports)
+        finally :
+            output_queue.set_listener(previous_listener)
+            caster.close_clients(flush_timeout = 1)
+        return 0
+
+    def datalink_ntrip_server_task(self, ntrip : NtripServer, linked_data: list[queue.Queue], update_linked_ports_queue: queue.Queue
+                                   , data_to_show : RingBuffer , logger):
+        """
+        Task for a NTRIP server stream uploading the data of the linked streams to a caster mountpoint.
+        The task wakes up as soon as data is queued and everything waiting is sent with a single write ,
+        the connection is watched so that a caster closing it is detected even when there is nothing to send
+        """
+        temp_incoming_tranfert = 0
+        temp_outgoing_tranfert = 0
+        output_queue = linked_data[self.stream_id]
+        data_queued = threading.Event()
+        # The listener of the I/O engine is restored when the task stops
+        previous_listener = getattr(output_queue, "listener", None)
+        if isinstance(output_queue, LinkQueue):
+            output_queue.set_listener(data_queued.set)
+        if self.log_file is not None :
+            self.log_file.info("Stream %i : Task Started , uploading to %s" , self.stream_id , ntrip.ntrip_settings.mountpoint)
+        current_time = datetime.now()
+        try :
+            while self.stop_event.is_set() is not True:
+                temp_incoming_tranfert ,temp_outgoing_tranfert, current_time =  task_data_transfer_rate(self , current_time , temp_incoming_tranfert , temp_outgoing_tranfert)
+                try:
+                    data_queued.wait(0.1)
+                    data_queued.clear()
+                    temp_incoming_tranfert += ntrip.poll()
+                    if not output_queue.empty():
+                        temp_outgoing_tranfert += task_send_command(output_queue, ntrip, self.show_outgoing_data.is_set(), data_to_show=data_to_show,
+                                                                    logger=logger, line_termination=self.line_termination)
+                except Exception as e:
+                    self._exception_disconnect(e)
+                    if self.log_file is not None :
+                        self.log_file.error("Stream %i %s has been disconnected, error: %s",self.stream_id , self.stream_type , e )
+                    raise StreamThreadException(f"Stream {self.stream_id} {self.stream_type} has been disconnected, error: {e}") from e
+                # Nothing received from the caster is forwarded
+                if not update_linked_ports_queue.empty():
+                    self._clear_queue(update_linked_ports_queue)
+            #Send closeup commands
+            try :
+                if not output_queue.empty():
+                    task_send_command(output_queue, ntrip, logger=logger, line_termination=self.line_termination)
+            except TaskException as e :
+                if self.log_file is not None :
+                    self.log_file.error("Stream %i :  closing script couldn't finish : %s " , self.stream_id , e)
+        finally :
+            if isinstance(output_queue, LinkQueue):
+                output_queue.set_listener(previous_listener)
+        return 0
+
     def _clearQueue(self, queue : queue.Queue):
         """
         clear the queue passed as argument
@@ -1057,6 +1875,17 @@ class Stream:
 # STREAM TASK
 #####################################################################################
 
+def task_check_overflow(linked_data : queue.Queue):
+    """
+    Raise an exception if data was dropped because the output queue was full with the DISCONNECT policy
+
+    Raises:
+        LinkOverflowException: the stream is too slow for the data of its linked streams
+    """
+    if getattr(linked_data, "overflowed", False):
+        linked_data.overflowed = False
+        raise LinkOverflowException("Output buffer full : the stream is too slow to send the data of the linked streams")
+
 def task_update_linked_port(update_linked_ports_queue : queue.Queue , linked_ports : list[int] ):
     """
     update the list of port to which we have to share incoming data
@@ -1070,39 +1899,143 @@ def task_update_linked_port(update_linked_ports_queue : queue.Queue , linked_por
     return linked_ports
 
 
-def task_send_command(linked_data : queue.Queue , stream  : Serial | socket.socket | NtripClient, show_data : bool = False ,
-                      udp_send_address = None ,  data_to_show : queue.Queue = None ,
-                      logger : TextIOWrapper = None , line_termination : str = "\r\n"):
+def task_send_command(linked_data : queue.Queue , stream  : Serial | socket.socket | NtripClient | NtripServer, show_data : bool = False ,
+                      udp_send_address = None ,  data_to_show : RingBuffer = None ,
+                      logger : StreamLogger = None , line_termination : str = "\r\n") -> int :
     """
-    output data from data queue
+    output every data waiting in the data queue.
+    The pending chunks are coalesced and written with a single call on stream transports (TCP , serial , NTRIP) ,
+    on UDP each chunk keeps its own datagram. Only the most recent GGA is sent to a NTRIP caster , at most once every gga_interval seconds
+
+    Returns:
+        int: total number of bytes written
     """
+    task_check_overflow(linked_data)
+    chunks : list[bytes] = []
+    for _ in range(linked_data.qsize()):
+        try :
+            outgoing_data = linked_data.get_nowait()
+        except queue.Empty :
+            break
+        # Script lines are still queued as text
+        if isinstance(outgoing_data, str):
+            outgoing_data = outgoing_data.encode(encoding='ISO-8859-1')
+        if len(outgoing_data) != 0 :
+            chunks.append(outgoing_data)
+    if len(chunks) == 0 :
+        return 0
+    # The chunks are shared with the other consumers : only join them when there is more than one
+    outgoing_data = chunks[0] if len(chunks) == 1 else None
     try :
-        for _ in range(linked_data.qsize()):
-            outgoing_data = linked_data.get()
-            if isinstance(outgoing_data, str):
-                outgoing_data = outgoing_data.encode(encoding='ISO-8859-1')
-            if isinstance(stream , Serial):
-                stream.write(outgoing_data)
-            elif isinstance(stream, socket.socket) and udp_send_address is None:
-                stream.sendall(outgoing_data)
-            elif isinstance(stream, socket.socket) :
-                stream.sendto(outgoing_data, udp_send_address)
-            elif isinstance(stream, NtripClient): 
-                if isinstance(outgoing_data , bytes):
-                    outgoing_data = outgoing_data.decode(encoding='ISO-8859-1')
-                if "GGA" in outgoing_data:
-                    stream.send_nmea(outgoing_data)
-            else : continue
-            if show_data and len(outgoing_data) != 0 :
-                data_to_show.put(outgoing_data)
-                try :
-                    if logger is not None:
-                        logger.write(outgoing_data)
-                except : pass
-            return len(outgoing_data)
-    except (NtripClientError, socket.gaierror, SerialException)  as e :
+        if isinstance(stream , Serial):
+            outgoing_data = outgoing_data or b"".join(chunks)
+            stream.write(outgoing_data)
+        elif isinstance(stream, TcpClientGroup):
+            outgoing_data = outgoing_data or b"".join(chunks)
+            stream.sendall(outgoing_data)
+        elif isinstance(stream, OutputBuffer):
+            outgoing_data = outgoing_data or b"".join(chunks)
+            stream.write(outgoing_data)
+        elif isinstance(stream, socket.socket) and udp_send_address is None:
+            outgoing_data = outgoing_data or b"".join(chunks)
+            stream.sendall(outgoing_data)
+        elif isinstance(stream, socket.socket) :
+            _send_datagrams(stream, chunks, udp_send_address)
+            if show_data or (logger is not None and logger.log_format == LogFormat.TIMESTAMPED) :
+                outgoing_data = outgoing_data or b"".join(chunks)
+            else :
+                return sum(len(chunk) for chunk in chunks)
+        elif isinstance(stream, asyncio.BaseTransport) and udp_send_address is None:
+            stream.writelines(chunks)
+            if show_data :
+                outgoing_data = outgoing_data or b"".join(chunks)
+            else :
+                return sum(len(chunk) for chunk in chunks)
+        elif isinstance(stream, asyncio.BaseTransport):
+            _send_datagrams(stream, chunks, udp_send_address)
+            if show_data or (logger is not None and logger.log_format == LogFormat.TIMESTAMPED) :
+                outgoing_data = outgoing_data or b"".join(chunks)
+            else :
+                return sum(len(chunk) for chunk in chunks)
+        elif isinstance(stream, NtripServer):
+            outgoing_data = outgoing_data or b"".join(chunks)
+            stream.send(outgoing_data)
+        elif isinstance(stream, NtripClient):
+            # Only the most recent valid GGA sentence is sent to the caster
+            outgoing_data = find_last_sentence(outgoing_data or b"".join(chunks), b"GGA") or b""
+            if len(outgoing_data) != 0 and not stream.send_nmea(outgoing_data) :
+                # Dropped by the GGA rate limit
+                outgoing_data = b""
+        else :
+            return 0
+    except (NtripClientError, NtripServerError, socket.gaierror, SerialException)  as e :
         raise TaskException(e) from e
-    
+    if show_data and len(outgoing_data) != 0 :
+        data_to_show.put(outgoing_data)
+    # The timestamped format records the direction : the sent data is always logged
+    if logger is not None and len(outgoing_data) != 0 and (show_data or logger.log_format == LogFormat.TIMESTAMPED):
+        logger.write(outgoing_data, Direction.OUTGOING)
+    return len(outgoing_data)
+
+def _update_tcp_selector(selector : selectors.BaseSelector , tcp : socket.socket , clients : TcpClientGroup):
+    """
+    Watch the sockets of the connected clients , for writing too when data is waiting in their output buffer
+    """
+    registered = {key.fileobj : key.events for key in selector.get_map().values()}
+    for conn in registered :
+        if conn is not tcp and conn not in clients.clients :
+            selector.unregister(conn)
+    for conn in clients.clients :
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if clients.has_pending(conn) else 0)
+        if conn not in registered :
+            selector.register(conn, events)
+        elif registered[conn] != events :
+            selector.modify(conn, events)
+
+def task_receive_datagrams(udp : socket.socket , max_datagrams : int = UDP_MAX_BATCH) -> list[tuple[bytes, tuple]]:
+    """
+    Read the datagrams waiting on a UDP socket.
+    The first read waits for the timeout of the socket , the following ones only drain the datagrams already received
+
+    Returns:
+        list[tuple[bytes, tuple]]: the data and the sender address of each datagram
+    """
+    try :
+        datagrams = [udp.recvfrom(UDP_MAX_RECEIVE_SIZE)]
+    except (socket.timeout, BlockingIOError) :
+        return []
+    timeout = udp.gettimeout()
+    udp.setblocking(False)
+    try :
+        while len(datagrams) < max_datagrams :
+            datagrams.append(udp.recvfrom(UDP_MAX_RECEIVE_SIZE))
+    except BlockingIOError :
+        pass
+    finally :
+        udp.settimeout(timeout)
+    return datagrams
+
+def _send_datagrams(stream : socket.socket | asyncio.DatagramTransport , chunks : list[bytes] , address):
+    """
+    Send each queued chunk as its own datagram so that the message boundaries are kept
+    """
+    for chunk in chunks :
+        if len(chunk) <= UDP_MAX_DATAGRAM_SIZE :
+            stream.sendto(chunk, address)
+        else :
+            for datagram in _split_datagrams(chunk):
+                stream.sendto(datagram, address)
+
+def _split_datagrams(data : bytes):
+    """
+    Split a chunk too large for a single UDP packet in several datagrams
+    """
+    if len(data) <= UDP_MAX_DATAGRAM_SIZE :
+        yield data
+        return
+    view = memoryview(data)
+    for offset in range(0, len(data), UDP_MAX_DATAGRAM_SIZE):
+        yield view[offset:offset + UDP_MAX_DATAGRAM_SIZE]
 
 def task_data_transfer_rate(stream :Stream , current_time  , temp_incoming_tranfert , temp_outgoing_tranfert) :
     """
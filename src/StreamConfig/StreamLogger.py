@@ -0,0 +1,357 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import glob
+import gzip
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from enum import Enum
+
+try :
+    import zstandard
+except ImportError :
+    zstandard = None
+
+from .CaptureFile import (LogFormat , Direction , RECORD_HEADER , CAPTURE_HEADER , INDEX_ENTRY , DEFAULT_INDEX_INTERVAL ,
+                          capture_file_header , index_file_header , index_file_name)
+
+DEFAULT_LOG_BUFFER_SIZE = 256 * 1024
+DEFAULT_LOG_FLUSH_INTERVAL = 1.0
+DEFAULT_LOG_MAX_PENDING_SIZE = 16 * 1024 * 1024
+
+class StreamLoggerException(Exception):
+    """
+    Raised when the log file of a stream can't be written
+    """
+
+class LogCompression(Enum):
+    """
+    Compression of the closed log segments
+    """
+    NONE = 0
+    GZIP = 1
+    ZSTD = 2
+
+class LogRotation:
+    """
+    Segmentation of the log file of a stream.
+    A new segment is started when the current one reaches segment_size bytes and/or at every UTC hour ,
+    closed segments can be compressed and the oldest ones deleted
+    """
+
+    def __init__(self, segment_size : int = 0 , hourly : bool = False , compression : LogCompression = LogCompression.NONE ,
+                 retention_count : int = 0 , retention_size : int = 0) -> None:
+        # 0 : no size limit
+        self.segment_size : int = segment_size
+        self.hourly : bool = hourly
+        self.compression : LogCompression = compression
+        # 0 : keep every segment
+        self.retention_count : int = retention_count
+        self.retention_size : int = retention_size
+
+    def is_enabled(self) -> bool:
+        return self.segment_size > 0 or self.hourly
+
+# Closed segments are compressed and pruned one after the other , away from the streams
+_segment_executor : ThreadPoolExecutor = None
+_segment_executor_lock = threading.Lock()
+
+def _get_segment_executor() -> ThreadPoolExecutor:
+    global _segment_executor
+    with _segment_executor_lock :
+        if _segment_executor is None :
+            _segment_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="StreamLogger segments")
+        return _segment_executor
+
+def compress_segment(segment : str , compression : LogCompression) -> str:
+    """
+    Compress a closed log segment and delete the uncompressed file
+
+    Returns:
+        str: name of the compressed file
+    """
+    match compression :
+        case LogCompression.GZIP :
+            compressed = segment + ".gz"
+            with open(segment, "rb") as source , gzip.open(compressed, "wb") as destination :
+                shutil.copyfileobj(source, destination, 1024 * 1024)
+        case LogCompression.ZSTD :
+            if zstandard is None :
+                raise StreamLoggerException("zstandard is not installed")
+            compressed = segment + ".zst"
+            with open(segment, "rb") as source , open(compressed, "wb") as destination :
+                zstandard.ZstdCompressor().copy_stream(source, destination)
+        case _ :
+            return segment
+    os.remove(segment)
+    return compressed
+
+def prune_segments(pattern : str , retention_count : int , retention_size : int):
+    """
+    Delete the oldest segments matching the pattern until the retention limits are respected.
+    The most recent segment , which may still be written , is never deleted.
+    The time index of a segment is deleted with it
+    """
+    segments = sorted(segment for segment in glob.glob(pattern) if not segment.endswith(".idx"))
+    total_size = sum(os.path.getsize(segment) for segment in segments)
+    while len(segments) > 1 :
+        if not ((retention_count > 0 and len(segments) > retention_count)
+                or (retention_size > 0 and total_size > retention_size)):
+            break
+        oldest = segments.pop(0)
+        total_size -= os.path.getsize(oldest)
+        os.remove(oldest)
+        index = index_file_name(oldest)
+        if os.path.exists(index):
+            os.remove(index)
+
+class StreamLogger:
+    """
+    Binary logger of the data of a stream.
+    write() only copies the data in a bounded buffer , a background thread writes it to the file
+    in large blocks : when buffer_size bytes are waiting or every flush_interval seconds.
+    If the disk is too slow and more than max_pending_size bytes are waiting , the new data is dropped
+    so the stream is never blocked by the logging.
+    Without rotation the data is appended to file_name , with rotation it's written in segments
+    named <file name>_stream<id>_<UTC time><extension> next to file_name.
+    With the TIMESTAMPED format every chunk is written as a record (see CaptureFile) and
+    an index entry (time , offset) is written in <file>.idx every index_interval seconds
+    """
+
+    def __init__(self, file_name : str , buffer_size : int = DEFAULT_LOG_BUFFER_SIZE ,
+                 flush_interval : float = DEFAULT_LOG_FLUSH_INTERVAL , max_pending_size : int = DEFAULT_LOG_MAX_PENDING_SIZE ,
+                 stream_id : int = 0 , rotation : LogRotation = None ,
+                 log_format : LogFormat = LogFormat.RAW , index_interval : float = DEFAULT_INDEX_INTERVAL) -> None:
+        self.file_name : str = file_name
+        self.stream_id : int = stream_id
+        self.rotation : LogRotation = rotation if rotation is not None else LogRotation()
+        self.log_format : LogFormat = log_format
+        self.index_interval : int = int(index_interval * 1e9)
+        self._index_file = None
+        self._file_offset : int = 0
+        # Index entries waiting to be written : (wall-clock time , monotonic time , offset in the logged bytes)
+        self._pending_index : list[tuple[int, int, int]] = []
+        self._logged_size : int = 0
+        self._pending_start : int = 0
+        self._last_index_time : int = None
+        self.segment_name : str = None
+        self._segment_size : int = 0
+        self._segment_hour : datetime = None
+        self.buffer_size : int = buffer_size
+        self.flush_interval : float = flush_interval
+        self.max_pending_size : int = max(max_pending_size, buffer_size)
+        self.dropped_bytes : int = 0
+        self.written_bytes : int = 0
+        self.error : Exception = None
+        self._pending : bytearray = bytearray()
+        self._condition = threading.Condition()
+        self._stop : bool = False
+        self._file = None
+        self._writer_thread : threading.Thread = None
+
+    def open(self):
+        """
+        Open the log file and start the writer thread
+
+        Raises:
+            StreamLoggerException: the file can't be opened
+        """
+        if self.rotation.compression == LogCompression.ZSTD and zstandard is None :
+            raise StreamLoggerException("zstandard is not installed , zstd compression is not available")
+        try :
+            if self.rotation.is_enabled():
+                self._open_segment()
+            else :
+                self._open_file(self.file_name, "ab")
+        except OSError as e :
+            raise StreamLoggerException(e) from e
+        self._stop = False
+        self._writer_thread = threading.Thread(target=self._writer_task, name=f"StreamLogger {self.file_name}", daemon=True)
+        self._writer_thread.start()
+
+    def is_open(self) -> bool:
+        return self._writer_thread is not None
+
+    def write(self, data : bytes | str , direction : Direction = Direction.INCOMING):
+        """
+        Queue data to be written in the log file , never blocks on the disk
+
+        Args:
+            data (bytes | str): raw data , text is encoded in ISO-8859-1
+            direction (Direction, optional): data read or sent by the stream , only recorded in the TIMESTAMPED format
+        """
+        if isinstance(data, str):
+            data = data.encode(encoding='ISO-8859-1')
+        timestamped = self.log_format == LogFormat.TIMESTAMPED
+        if timestamped :
+            monotonic_time = time.monotonic_ns()
+            wall_time = time.time_ns()
+        size = len(data) + RECORD_HEADER.size if timestamped else len(data)
+        with self._condition :
+            if self._writer_thread is None :
+                return
+            if len(self._pending) + size > self.max_pending_size :
+                self.dropped_bytes += len(data)
+                return
+            if timestamped :
+                if self._last_index_time is None or monotonic_time - self._last_index_time >= self.index_interval :
+                    self._pending_index.append((wall_time, monotonic_time, self._logged_size))
+                    self._last_index_time = monotonic_time
+                self._pending += RECORD_HEADER.pack(monotonic_time, wall_time, self.stream_id, direction.value, len(data))
+            self._pending += data
+            self._logged_size += size
+            if len(self._pending) >= self.buffer_size :
+                self._condition.notify()
+
+    def flush(self):
+        """
+        Wake up the writer thread to write every waiting data
+        """
+        with self._condition :
+            self._condition.notify()
+
+    def close(self):
+        """
+        Write every waiting data , stop the writer thread and close the file
+        """
+        with self._condition :
+            if self._writer_thread is None :
+                return
+            writer_thread = self._writer_thread
+            self._writer_thread = None
+            self._stop = True
+            self._condition.notify()
+        if writer_thread is not threading.current_thread():
+            writer_thread.join()
+
+    def _writer_task(self):
+        stop = False
+        while not stop :
+            with self._condition :
+                if not self._stop and len(self._pending) < self.buffer_size :
+                    self._condition.wait(self.flush_interval)
+                data = self._pending
+                self._pending = bytearray()
+                index_entries = self._pending_index
+                self._pending_index = []
+                block_start = self._pending_start
+                self._pending_start = self._logged_size
+                stop = self._stop
+            if len(data) != 0 and self.error is None :
+                try :
+                    if self.rotation.is_enabled() and self._segment_full():
+                        self._rotate()
+                    self._file.write(data)
+                    self._file.flush()
+                    if self._index_file is not None and len(index_entries) != 0 :
+                        self._index_file.write(b"".join(INDEX_ENTRY.pack(wall_time, monotonic_time, self._file_offset + offset - block_start)
+                                                        for wall_time , monotonic_time , offset in index_entries))
+                        self._index_file.flush()
+                    self._file_offset += len(data)
+                    self._segment_size += len(data)
+                    self.written_bytes += len(data)
+                except OSError as e :
+                    # Keep the stream running , the error is reported by the logger
+                    self.error = e
+            elif len(data) != 0 :
+                self.dropped_bytes += len(data)
+        try :
+            self._close_file()
+        except OSError as e :
+            self.error = e
+        if self.rotation.is_enabled():
+            self._close_segment(self.segment_name)
+
+    def _segment_pattern(self) -> str:
+        base , extension = os.path.splitext(self.file_name)
+        return f"{glob.escape(base)}_stream{self.stream_id}_*{glob.escape(extension)}*"
+
+    def _open_segment(self):
+        now = datetime.now(timezone.utc)
+        base , extension = os.path.splitext(self.file_name)
+        timestamp = f"{now:%Y%m%dT%H%M%S}.{now.microsecond // 1000:03d}Z"
+        segment_name = f"{base}_stream{self.stream_id}_{timestamp}{extension}"
+        index = 1
+        # The previous segment may already be compressed under another name
+        while len(glob.glob(glob.escape(segment_name) + "*")) != 0 :
+            segment_name = f"{base}_stream{self.stream_id}_{timestamp}_{index:03d}{extension}"
+            index += 1
+        self._open_file(segment_name, "wb")
+        self.segment_name = segment_name
+        self._segment_size = 0
+        self._segment_hour = now.replace(minute=0, second=0, microsecond=0)
+
+    def _segment_full(self) -> bool:
+        if self.rotation.segment_size > 0 and self._segment_size >= self.rotation.segment_size :
+            return True
+        if self.rotation.hourly :
+            return datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) != self._segment_hour
+        return False
+
+    def _open_file(self, file_name : str , mode : str):
+        self._file = open(file_name, mode)
+        self._file_offset = self._file.seek(0, os.SEEK_END)
+        if self.log_format == LogFormat.TIMESTAMPED :
+            if self._file_offset == 0 :
+                self._file.write(capture_file_header(self.stream_id))
+                self._file_offset = CAPTURE_HEADER.size
+            self._index_file = open(index_file_name(file_name), mode)
+            if self._index_file.seek(0, os.SEEK_END) == 0 :
+                self._index_file.write(index_file_header(self.stream_id))
+
+    def _close_file(self):
+        self._file.close()
+        if self._index_file is not None :
+            self._index_file.close()
+            self._index_file = None
+
+    def _rotate(self):
+        self._close_file()
+        closed_segment = self.segment_name
+        self._open_segment()
+        self._close_segment(closed_segment)
+
+    def _close_segment(self, segment : str):
+        _get_segment_executor().submit(self._finish_segment, segment, self._segment_pattern())
+
+    def _finish_segment(self, segment : str , pattern : str):
+        try :
+            if os.path.getsize(segment) <= (CAPTURE_HEADER.size if self.log_format == LogFormat.TIMESTAMPED else 0) :
+                os.remove(segment)
+                if os.path.exists(index_file_name(segment)):
+                    os.remove(index_file_name(segment))
+            else :
+                compress_segment(segment, self.rotation.compression)
+            prune_segments(pattern, self.rotation.retention_count, self.rotation.retention_size)
+        except (OSError, StreamLoggerException) as e :
+            self.error = e
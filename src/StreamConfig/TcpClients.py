@@ -0,0 +1,255 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import asyncio
+import logging
+import socket
+import time
+from collections import deque
+
+class TcpClient:
+    """
+    A client connected to a TCP server stream.
+    The connection is a non blocking socket or an asyncio transport ,
+    data that can't be sent right away waits in the output buffer of the client
+    """
+
+    def __init__(self, connection : socket.socket | asyncio.Transport , address) -> None:
+        self.connection = connection
+        self.address = address
+        self.pending : deque = deque()
+        self.pending_size : int = 0
+        self.connect_time : float = time.monotonic()
+        # Time between the connection and the first data handed to the socket
+        self.first_byte_latency : float = None
+
+    def buffered_size(self) -> int:
+        """
+        Return the number of bytes waiting to be sent to the client
+        """
+        if isinstance(self.connection, asyncio.BaseTransport):
+            return self.connection.get_write_buffer_size()
+        return self.pending_size
+
+    def write(self, data : bytes):
+        """
+        Send data to the client , the part that can't be sent now is kept in the output buffer
+
+        Raises:
+            OSError: the connection is lost
+        """
+        if isinstance(self.connection, asyncio.BaseTransport):
+            self.connection.write(data)
+            self._first_byte_sent()
+            return
+        if self.pending_size == 0 :
+            try :
+                sent = self.connection.send(data)
+            except BlockingIOError :
+                sent = 0
+            if sent != 0 :
+                self._first_byte_sent()
+            if sent == len(data):
+                return
+            data = data[sent:]
+        self.pending.append(data)
+        self.pending_size += len(data)
+
+    def flush(self):
+        """
+        Send as much of the output buffer as the socket accepts
+
+        Raises:
+            OSError: the connection is lost
+        """
+        while len(self.pending) != 0 :
+            data = self.pending[0]
+            try :
+                sent = self.connection.send(data)
+            except BlockingIOError :
+                return
+            self._first_byte_sent()
+            self.pending_size -= sent
+            if sent < len(data):
+                self.pending[0] = data[sent:]
+                return
+            self.pending.popleft()
+
+    def _first_byte_sent(self):
+        if self.first_byte_latency is None :
+            self.first_byte_latency = time.monotonic() - self.connect_time
+
+    def close(self, graceful : bool = False):
+        """
+        Close the connection and drop the output buffer
+
+        Args:
+            graceful (bool): let an asyncio transport send its buffered data before closing
+        """
+        self.pending.clear()
+        self.pending_size = 0
+        if isinstance(self.connection, asyncio.BaseTransport):
+            if graceful :
+                self.connection.close()
+            else :
+                self.connection.abort()
+            return
+        try :
+            self.connection.close()
+        except OSError :
+            pass
+
+
+class TcpClientGroup:
+    """
+    Clients of a TCP server stream.
+    The data sent by the stream is written to every client , each client has its own bounded output buffer :
+    a client that can't keep up is disconnected when its buffer is full instead of slowing down the others
+    """
+
+    def __init__(self, max_clients : int , buffer_size : int , stream_id : int = 0 ,
+                 log_file : logging.Logger = None) -> None:
+        self.max_clients : int = max_clients
+        self.buffer_size : int = buffer_size
+        self.stream_id : int = stream_id
+        self.log_file : logging.Logger = log_file
+        self.clients : dict = {}
+        self.evicted : int = 0
+        # Latency between the connection of the last client and the first data sent to it
+        self.first_byte_latency : float = None
+        self._waiting_first_byte : list[TcpClient] = []
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def add(self, connection : socket.socket | asyncio.Transport , address) -> TcpClient:
+        """
+        Add a new client , the connection is closed if the server already has max_clients clients
+
+        Returns:
+            TcpClient: the new client , None if it has been refused
+        """
+        if self.max_clients > 0 and len(self.clients) >= self.max_clients :
+            if self.log_file is not None :
+                self.log_file.warning("Stream %s : client %s refused , %s clients already connected", self.stream_id, address, len(self.clients))
+            connection.close()
+            return None
+        if isinstance(connection, socket.socket):
+            connection.setblocking(False)
+            # Small writes are handed to the client without waiting for the previous ones to be acknowledged
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client = TcpClient(connection, address)
+        self.clients[connection] = client
+        self._waiting_first_byte.append(client)
+        if self.log_file is not None :
+            self.log_file.info("Stream %s : new Client Connected %s (%s clients)", self.stream_id, address, len(self.clients))
+        return client
+
+    def remove(self, connection , graceful : bool = False):
+        """
+        Remove a client and close its connection
+        """
+        client = self.clients.pop(connection, None)
+        if client is None :
+            return
+        client.close(graceful)
+        if self.log_file is not None :
+            self.log_file.info("Stream %s : Client %s disconnected (%s clients)", self.stream_id, client.address, len(self.clients))
+
+    def has_pending(self, connection) -> bool:
+        """
+        Return True if data is waiting in the output buffer of the client
+        """
+        client = self.clients.get(connection)
+        return client is not None and client.pending_size != 0
+
+    def sendall(self, data : bytes):
+        """
+        Write data to every client , the clients whose output buffer overflows are disconnected
+        """
+        for connection , client in list(self.clients.items()):
+            try :
+                client.write(data)
+            except OSError :
+                self.remove(connection)
+                continue
+            if self.buffer_size > 0 and client.buffered_size() > self.buffer_size :
+                self._evict(connection, client)
+        self._update_first_byte_latency()
+
+    def flush(self, connection = None):
+        """
+        Send the buffered data of a client , or of every client if no connection is given
+        """
+        if connection is not None :
+            clients = [(connection, self.clients[connection])] if connection in self.clients else []
+        else :
+            clients = list(self.clients.items())
+        for client_connection , client in clients :
+            try :
+                client.flush()
+            except OSError :
+                self.remove(client_connection)
+        self._update_first_byte_latency()
+
+    def close(self, flush_timeout : float = 0):
+        """
+        Disconnect every client
+
+        Args:
+            flush_timeout (float): time given to each socket client to receive its buffered data
+        """
+        for connection , client in list(self.clients.items()):
+            if flush_timeout > 0 and client.pending_size != 0 :
+                try :
+                    connection.settimeout(flush_timeout)
+                    client.flush()
+                except OSError :
+                    pass
+            self.remove(connection, graceful = flush_timeout > 0)
+
+    def _update_first_byte_latency(self):
+        if len(self._waiting_first_byte) == 0 :
+            return
+        waiting = []
+        for client in self._waiting_first_byte :
+            if client.first_byte_latency is not None :
+                self.first_byte_latency = client.first_byte_latency
+                if self.log_file is not None :
+                    self.log_file.info("Stream %s : first data sent to client %s %.1f ms after its connection",
+                                       self.stream_id, client.address, client.first_byte_latency * 1000)
+            elif client.connection in self.clients :
+                waiting.append(client)
+        self._waiting_first_byte = waiting
+
+    def _evict(self, connection, client : TcpClient):
+        self.evicted += 1
+        if self.log_file is not None :
+            self.log_file.warning("Stream %s : Client %s is too slow , %s bytes waiting : disconnected", self.stream_id, client.address, client.buffered_size())
+        self.remove(connection)
@@ -0,0 +1,229 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import socket
+import logging
+from ..constants import DEFAULTLOGFILELOGGER
+from ..StreamConfig.NtripCaster import NtripCaster
+
+DEFAULT_CASTER_PORT = 2101
+DEFAULT_CASTER_MAX_CLIENTS = 1000
+DEFAULT_CASTER_BUFFER_SIZE = 64 * 1024
+DEFAULT_CASTER_BACKLOG = 128
+
+class CasterSettingsException(Exception):
+    """
+        Exception class for caster settings
+    """
+    def __init__(self, message, error_code = None):
+        super().__init__(message)
+        self.error_code = error_code
+
+class CasterMountpoint:
+    """
+    A mountpoint of the embedded caster , serving the data of a local stream
+
+    Attributes:
+        name (str): name of the mountpoint in the source table.
+        stream_id (int): id of the stream whose data is served , the stream has to be linked to the caster stream.
+        ntrip_format (str): format announced in the source table.
+        latitude (float): position announced in the source table.
+        longitude (float): position announced in the source table.
+    """
+
+    def __init__(self, name : str , stream_id : int , ntrip_format : str = "RTCM 3" ,
+                 latitude : float = 0.0 , longitude : float = 0.0) -> None:
+        self.name : str = name
+        self.stream_id : int = stream_id
+        self.ntrip_format : str = ntrip_format
+        self.latitude : float = latitude
+        self.longitude : float = longitude
+
+    def to_string(self) -> str:
+        """
+        Return the mountpoint as [name]:[stream]:[format]:[latitude]:[longitude]
+        """
+        return f"{self.name}:{self.stream_id}:{self.ntrip_format}:{self.latitude}:{self.longitude}"
+
+    @classmethod
+    def from_string(cls, value : str):
+        """
+        Create a mountpoint from [name]:[stream] , the format and the position are optional
+
+        Raises:
+            CasterSettingsException: the value is incorrect
+        """
+        fields = value.strip().split(":")
+        if len(fields) < 2 or len(fields[0]) == 0 :
+            raise CasterSettingsException(f"Incorrect mountpoint : {value}")
+        try :
+            mountpoint = cls(fields[0], int(fields[1]))
+            if len(fields) > 2 and len(fields[2]) != 0 :
+                mountpoint.ntrip_format = fields[2]
+            if len(fields) > 4 :
+                mountpoint.latitude = float(fields[3])
+                mountpoint.longitude = float(fields[4])
+        except ValueError as e :
+            raise CasterSettingsException(f"Incorrect mountpoint : {value}") from e
+        return mountpoint
+
+class CasterSettings:
+    """
+    Represents the settings of an embedded NTRIP caster stream.
+    The caster serves a mountpoint for each configured local stream to NTRIP clients
+    """
+
+    def __init__(self, port : int = DEFAULT_CASTER_PORT , auth : bool = False ,
+                 username : str = "" , password : str = "" ,
+                 mountpoints : list[CasterMountpoint] = None ,
+                 max_clients : int = DEFAULT_CASTER_MAX_CLIENTS ,
+                 client_buffer_size : int = DEFAULT_CASTER_BUFFER_SIZE ,
+                 debug_logging : bool = False) -> None:
+        self.port : int = port
+        self.auth : bool = auth
+        self.username : str = username
+        self.password : str = password
+        self.mountpoints : list[CasterMountpoint] = mountpoints if mountpoints is not None else []
+        # Number of clients of each mountpoint and output buffer of each client
+        self.max_clients : int = max_clients
+        self.client_buffer_size : int = client_buffer_size
+        # Number of connections waiting to be accepted
+        self.backlog : int = DEFAULT_CASTER_BACKLOG
+        if debug_logging :
+            self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
+        else :
+            self.log_file = None
+
+    def connect(self, stream_id : int = 0) -> NtripCaster:
+        """
+        Open the listening socket of the caster
+
+        Returns:
+            NtripCaster: the caster , ready to accept clients
+
+        Raises:
+            CasterSettingsException: the socket can't be opened or no mountpoint is configured
+        """
+        if len(self.mountpoints) == 0 :
+            raise CasterSettingsException("No mountpoint configured")
+        try :
+            server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            server.bind(('', self.port))
+            server.listen(self.backlog)
+            server.setblocking(False)
+        except socket.error as e :
+            if self.log_file is not None :
+                self.log_file.error("Failed to open the caster socket : %s" , e)
+            raise CasterSettingsException(e) from e
+        return NtripCaster(server, self, stream_id, self.log_file)
+
+    def set_port(self, new_port : int):
+        """
+        set the port the caster listens on
+
+        Args:
+            new_port (int): The new Port
+        """
+        self.port = new_port
+
+    def set_auth(self, new_auth : bool):
+        """
+        set whether the clients have to authenticate
+
+        Args:
+            new_auth (bool): True to require the username and the password
+        """
+        self.auth = new_auth
+
+    def set_username(self, new_username : str):
+        """
+        set the username required from the clients
+
+        Args:
+            new_username (str): The new username
+        """
+        self.username = new_username
+
+    def set_password(self, new_password : str):
+        """
+        set the password required from the clients
+
+        Args:
+            new_password (str): The new password
+        """
+        self.password = new_password
+
+    def set_mountpoints(self, new_mountpoints : str):
+        """
+        set the mountpoints from a list of [name]:[stream]:[format]:[latitude]:[longitude] separated by ","
+
+        Raises:
+            CasterSettingsException: a mountpoint is incorrect
+        """
+        mountpoints = [CasterMountpoint.from_string(value) for value in new_mountpoints.split(",") if len(value.strip()) != 0]
+        names = [mountpoint.name for mountpoint in mountpoints]
+        if len(set(names)) != len(names):
+            raise CasterSettingsException("Two mountpoints have the same name")
+        self.mountpoints = mountpoints
+
+    def set_max_clients(self, new_max_clients : int):
+        """
+        set the number of clients of each mountpoint
+
+        Args:
+            new_max_clients (int): maximum number of clients , 0 for no limit
+        """
+        self.max_clients = new_max_clients
+
+    def set_client_buffer_size(self, new_size : int):
+        """
+        set the size of the output buffer of each client ,
+        a client is disconnected when its buffer is full
+
+        Args:
+            new_size (int): size of the buffer in bytes , 0 for no limit
+        """
+        self.client_buffer_size = new_size
+
+    def mountpoints_to_string(self) -> str:
+        """
+        Return the mountpoints as they are saved in the configuration file
+        """
+        return ",".join(mountpoint.to_string() for mountpoint in self.mountpoints)
+
+    def to_string(self) -> str :
+        """
+        Return current class as a string
+
+        Returns:
+            str: class as string
+        """
+        mountpoints = " , ".join(f"{mountpoint.name} (stream {mountpoint.stream_id})" for mountpoint in self.mountpoints)
+        return f" Port : {self.port} \n Mountpoints : {mountpoints} \n Authentication : {self.auth}\n"
@@ -0,0 +1,136 @@
+# ###############################################################################
+#
+# Copyright (c) 2024, Septentrio
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# 1. Redistributions of source code must retain the above copyright notice, this
+#    list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright notice,
+#    this list of conditions and the following disclaimer in the documentation
+#    and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the copyright holder nor the names of its
+#    contributors may be used to endorse or promote products derived from
+#    this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+import os
+import logging
+from ..constants import DEFAULTLOGFILELOGGER
+from ..StreamConfig.FileReplay import FileReplay , FileReplayException
+
+class FileSettingsException(Exception):
+    """
+        Exception class for file settings
+    """
+    def __init__(self, message, error_code = None):
+        super().__init__(message)
+        self.error_code = error_code
+
+class FileSettings:
+    """
+    Represents the settings of a FILE stream , which replays a recorded file.
+
+    Attributes:
+        file_name (str): The file to replay.
+        speed (float): Replay speed : 1 for the original pacing , 2 for twice faster ... 0 for as fast as possible.
+        loop (bool): Restart from the beginning at the end of the file.
+        start (float): Seconds of the capture skipped before the replay starts.
+    """
+
+    def __init__(self, file_name : str = "" , speed : float = 1.0 , loop : bool = False , start : float = 0.0 ,
+                 debug_logging : bool = None) -> None:
+        self.file_name : str = file_name
+        self.speed : float = speed
+        self.loop : bool = loop
+        self.start : float = start
+        if debug_logging :
+            self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
+        else :
+            self.log_file = None
+
+    def connect(self) -> FileReplay:
+        """
+        Open the file to replay.
+
+        Returns:
+            FileReplay: The opened file.
+
+        Raises:
+            FileSettingsException: If the file can't be opened.
+        """
+        replay = FileReplay(self.file_name, start=self.start)
+        try :
+            replay.open()
+        except FileReplayException as e :
+            if self.log_file is not None :
+                self.log_file.error("Failed to open file to replay : %s" , e)
+            raise FileSettingsException(e) from e
+        return replay
+
+    def set_file_name(self, new_file_name : str):
+        """
+        Sets the file to replay.
+
+        Args:
+            new_file_name (str): The path of the file.
+
+        Raises:
+            FileSettingsException: If the file doesn't exist.
+        """
+        if not os.path.isfile(new_file_name):
+            raise FileSettingsException(f"File not found : {new_file_name}")
+        self.file_name = new_file_name
+
+    def set_speed(self, new_speed : float):
+        """
+        Sets the replay speed.
+
+        Args:
+            new_speed (float): 1 for the original pacing , N for N times faster , 0 for as fast as possible.
+        """
+        if new_speed < 0 :
+            raise FileSettingsException("The replay speed can't be negative")
+        self.speed = new_speed
+
+    def set_loop(self, new_loop : bool):
+        """
+        Sets whether the file is replayed in a loop.
+
+        Args:
+            new_loop (bool): True to restart at the end of the file.
+        """
+        self.loop = new_loop
+
+    def set_start(self, new_start : float):
+        """
+        Sets the time of the capture where the replay starts.
+
+        Args:
+            new_start (float): Seconds after the first record of the capture , 0 to replay the whole file.
+        """
+        if new_start < 0 :
+            raise FileSettingsException("The replay start can't be negative")
+        self.start = new_start
+
+    def to_string(self) -> str :
+        """
+        Return current class as a string
+
+        Returns:
+            str: class as string
+        """
+        return f" File : {self.file_name} \n Speed : {'max' if self.speed == 0 else self.speed} \n Loop : {self.loop} \n Start : {self.start} s\n"
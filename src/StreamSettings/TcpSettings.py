@@ -32,6 +32,10 @@ import logging
 from enum import Enum
 from ..constants import DEFAULTLOGFILELOGGER
 
+DEFAULT_MAX_CLIENTS = 32
+DEFAULT_CLIENT_BUFFER_SIZE = 256 * 1024
+DEFAULT_LISTEN_BACKLOG = 64
+
 
 class TCPSettingsException(Exception):
     """
@@ -57,11 +61,19 @@ class TcpSettings:
 
     def __init__(self , host : str = "localhost" , port : int =28784 ,
                  stream_mode : StreamMode = StreamMode.CLIENT ,
+                 max_clients : int = DEFAULT_MAX_CLIENTS ,
+                 client_buffer_size : int = DEFAULT_CLIENT_BUFFER_SIZE ,
+                 backlog : int = DEFAULT_LISTEN_BACKLOG ,
                  debug_logging : bool =False) -> None:
 
         self.host : str = host
         self.port : int = port
         self.stream_mode : StreamMode = stream_mode
+        # Server mode : number of clients served at the same time and output buffer of each client
+        self.max_clients : int = max_clients
+        self.client_buffer_size : int = client_buffer_size
+        # Number of connections waiting to be accepted by the server
+        self.backlog : int = backlog
         if self.stream_mode == StreamMode.SERVER :
             self.host = ''
 
@@ -135,6 +147,34 @@ class TcpSettings:
         """
         self.stream_mode = new_mode
 
+    def set_max_clients(self, new_max_clients : int):
+        """
+        set the number of clients a TCP server accepts at the same time
+
+        Args:
+            new_max_clients (int): maximum number of clients , 0 for no limit
+        """
+        self.max_clients = new_max_clients
+
+    def set_client_buffer_size(self, new_size : int):
+        """
+        set the size of the output buffer of each client of a TCP server ,
+        a client is disconnected when its buffer is full
+
+        Args:
+            new_size (int): size of the buffer in bytes , 0 for no limit
+        """
+        self.client_buffer_size = new_size
+
+    def set_backlog(self, new_backlog : int):
+        """
+        set the number of connections waiting to be accepted by a TCP server
+
+        Args:
+            new_backlog (int): size of the listen queue
+        """
+        self.backlog = new_backlog
+
     def is_server(self):
         """
         Return current stream mode of the stream
@@ -150,4 +190,6 @@ class TcpSettings:
         Returns:
             str: class as string
         """
+        if self.stream_mode == StreamMode.SERVER :
+            return f" Host : {self.host} \n Port :{self.port} \n StreamMode : {self.stream_mode.value} \n Max clients : {self.max_clients}"
         return f" Host : {self.host} \n Port :{self.port} \n StreamMode : {self.stream_mode.value}"
\ No newline at end of file
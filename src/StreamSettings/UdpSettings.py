@@ -28,10 +28,13 @@
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
 import socket
+import struct
 import logging
 from enum import Enum
 from ..constants import DEFAULTLOGFILELOGGER
 
+UDP_RECEIVE_BUFFER_SIZE = 1024 * 1024
+
 class UDPSettingsException(Exception):
     """
         Exception class for udp settings 
@@ -48,6 +51,16 @@ class DataFlow(Enum):
     OnlyListen = 1
     BOTH  = 2
 
+class UdpMode(Enum):
+    """
+    Addressing of the datagrams sent by a UDP Stream
+    """
+    UNICAST = 0
+    # The host is a multicast group joined by the stream
+    MULTICAST = 1
+    # The host is the broadcast address , 255.255.255.255 if no specific host is set
+    BROADCAST = 2
+
 
 class UdpSettings:
     """
@@ -59,20 +72,31 @@ class UdpSettings:
         DataFlow (DataFlow): The data flow mode. Default is DataFlow.Both.
         socket (socket): The socket object used for the Stream.
         specific_host (str): The specific host IP address to bind to.
+        mode (UdpMode): Unicast , multicast or broadcast. Default is UdpMode.UNICAST.
+        multicast_ttl (int): Number of routers a multicast datagram can cross. Default is 1.
+        multicast_loopback (bool): Receive the multicast datagrams sent by this host. Default is False.
+        interface (str): IP address of the local interface used for multicast , any interface if empty.
     """
 
-    def __init__(self , host : str =  "localhost", port : int = 28784 , dataflow : DataFlow = DataFlow.BOTH , specific_host : bool = False , debug_logging : bool =None) -> None:
+    def __init__(self , host : str =  "localhost", port : int = 28784 , dataflow : DataFlow = DataFlow.BOTH , specific_host : bool = False ,
+                 mode : UdpMode = UdpMode.UNICAST , multicast_ttl : int = 1 , multicast_loopback : bool = False ,
+                 interface : str = "" , debug_logging : bool =None) -> None:
         """
         Initializes a new instance of the UDPSettings class.
         
         Args:
             port (int, optional): The port number to connect to. Default is 28784.
             dataflow (DataFlow, optional): The data flow mode. Default is DataFlow.Both.
+            mode (UdpMode, optional): The addressing mode. Default is UdpMode.UNICAST.
         """
         self.host : str = host
         self.port : int = port
         self.dataflow : DataFlow = dataflow
         self.specific_host : bool  = specific_host
+        self.mode : UdpMode = mode
+        self.multicast_ttl : int = multicast_ttl
+        self.multicast_loopback : bool = multicast_loopback
+        self.interface : str = interface
         if debug_logging :
             self.log_file : logging.Logger = DEFAULTLOGFILELOGGER
         else : 
@@ -97,14 +121,71 @@ class UdpSettings:
                 self.log_file.error("Failed to create socket : %s" , e)
             raise UDPSettingsException(e) from e
         try :
-            if self.specific_host is False:
-                newsocket.bind(('', self.port))
+            # A larger receive buffer keeps the datagrams received between two reads
+            newsocket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECEIVE_BUFFER_SIZE)
+        except socket.error :
+            pass
+        try :
+            match self.mode :
+                case UdpMode.MULTICAST :
+                    newsocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    newsocket.bind(('', self.port))
+                    newsocket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.multicast_ttl)
+                    newsocket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1 if self.multicast_loopback else 0)
+                    if self.interface != "":
+                        newsocket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(self.interface))
+                    newsocket.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, self._membership())
+                case UdpMode.BROADCAST :
+                    newsocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                    newsocket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                    newsocket.bind(('', self.port))
+                case _ :
+                    if self.specific_host is False:
+                        newsocket.bind(('', self.port))
             return newsocket
-        except socket.error as e :
+        except (socket.error, ValueError) as e :
+            newsocket.close()
             if self.log_file is not None :
                 self.log_file.error("Failed to create UDP server : %s" ,e)
             raise UDPSettingsException(e) from e
 
+    def leave_group(self, udp_socket):
+        """
+        Leave the multicast group joined by a socket opened with connect()
+
+        Args:
+            udp_socket (socket.socket): the socket of the stream
+        """
+        if self.mode != UdpMode.MULTICAST :
+            return
+        try :
+            udp_socket.setsockopt(socket.IPPROTO_IP, socket.IP_DROP_MEMBERSHIP, self._membership())
+        except (socket.error, ValueError) as e :
+            if self.log_file is not None :
+                self.log_file.warning("Failed to leave the multicast group %s : %s" , self.host , e)
+
+    def get_send_address(self) -> tuple[str, int]:
+        """
+        Return the address the datagrams are sent to
+        """
+        match self.mode :
+            case UdpMode.MULTICAST :
+                return (self.host, self.port)
+            case UdpMode.BROADCAST :
+                return (self.host if self.specific_host else "255.255.255.255", self.port)
+            case _ :
+                return (self.host if self.specific_host else "localhost", self.port)
+
+    def replies_to_sender(self) -> bool:
+        """
+        Return True if the datagrams are sent back to the address of the last received datagram
+        """
+        return self.mode == UdpMode.UNICAST and self.specific_host is not True
+
+    def _membership(self) -> bytes:
+        interface = self.interface if self.interface != "" else "0.0.0.0"
+        return struct.pack("4s4s", socket.inet_aton(self.host), socket.inet_aton(interface))
+
 
     def set_host(self, new_host : str):
         """
@@ -133,6 +214,28 @@ class UdpSettings:
         """
         self.dataflow = new_dataflow
 
+    def set_mode(self, new_mode : UdpMode):
+        """
+        Sets the addressing mode.
+
+        Args:
+            new_mode (UdpMode): The new mode , the host is the multicast group in multicast mode.
+        """
+        self.mode = new_mode
+
+    def set_multicast(self, ttl : int , loopback : bool , interface : str = ""):
+        """
+        Sets the multicast options.
+
+        Args:
+            ttl (int): Number of routers a multicast datagram can cross.
+            loopback (bool): Receive the multicast datagrams sent by this host.
+            interface (str, optional): IP address of the local interface , any interface if empty.
+        """
+        self.multicast_ttl = ttl
+        self.multicast_loopback = loopback
+        self.interface = interface
+
     def to_string(self) -> str :
         """
         Return current class as a string
@@ -140,6 +243,6 @@ class UdpSettings:
         Returns:
             str: class as string
         """
-        return f" Host : {self.host} \n Port : {self.port} \n SpecificHost : {self.specific_host} \n DataFlow : {self.dataflow.name}\n"
+        return f" Host : {self.host} \n Port : {self.port} \n SpecificHost : {self.specific_host} \n DataFlow : {self.dataflow.name}\n Mode : {self.mode.name}\n"
    
     
\ No newline at end of file
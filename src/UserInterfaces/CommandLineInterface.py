@@ -67,9 +67,15 @@ class CommandLineInterface:
     def _showDataTask(self,stop_show_data_event, selected_port : Stream):
         """Show all the data of a specific stream
         """
+        sequence = selected_port.data_to_show.get_sequence()
         while stop_show_data_event.is_set() is False:
-            if selected_port.data_to_show.empty() is False :
-                print(selected_port.data_to_show.get())
+            if selected_port.data_to_show.empty(sequence) is False :
+                data , sequence , lost = selected_port.data_to_show.read(sequence)
+                if lost != 0 :
+                    print(f"\n[{lost} bytes not shown]")
+                print(data.decode(encoding='ISO-8859-1'), end="")
+            else :
+                time.sleep(0.05)
         return 0
 
     def _showDataTransfert(self,stop_show_data_event, app : App):
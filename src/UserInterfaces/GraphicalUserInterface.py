@@ -39,7 +39,7 @@ from PySide6.QtGui import  QRegularExpressionValidator,QTextCursor,QAction,QIcon
 from PySide6.QtWidgets import (QMainWindow, QApplication, QCheckBox, QComboBox, QFrame,
                                QDialog, QDialogButtonBox,QGridLayout, QGroupBox, QHBoxLayout, QLabel,
                                QLineEdit, QPushButton, QRadioButton, QMessageBox,
-                               QSpinBox,QTabWidget, QTextEdit,QVBoxLayout, QWidget,QFileDialog)
+                               QSpinBox,QDoubleSpinBox,QTabWidget, QTextEdit,QVBoxLayout, QWidget,QFileDialog)
 
 
 def pair_h_widgets( *widgets : QWidget ) -> QHBoxLayout:
@@ -402,6 +402,9 @@ class ConfigureInterface(QDialog) :
         tcp_menu = self.tcp_menu()
         udp_menu =  self.udp_menu()
         ntrip_menu = self.ntrip_menu()
+        file_menu = self.file_menu()
+        caster_menu = self.caster_menu()
+        ntrip_server_menu = self.ntrip_server_menu()
 
         self.config_tabs = QTabWidget()
         self.config_tabs.addTab(self.general_menu(), "General")
@@ -409,6 +412,9 @@ class ConfigureInterface(QDialog) :
         self.config_tabs.addTab(tcp_menu, "TCP")
         self.config_tabs.addTab(udp_menu, "UDP")
         self.config_tabs.addTab(ntrip_menu, "NTRIP")
+        self.config_tabs.addTab(file_menu, "File")
+        self.config_tabs.addTab(caster_menu, "NTRIP Caster")
+        self.config_tabs.addTab(ntrip_server_menu, "NTRIP Server")
 
         if len(self.stream.serial_settings.get_available_port()) == 0 :
             self.config_tabs.setTabEnabled(index,False)
@@ -614,11 +620,27 @@ class ConfigureInterface(QDialog) :
         port_layout.addWidget(port)
         port_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
+        # Server clients Box
+        max_clients_box = QGroupBox("Maximum number of clients (Server)")
+
+        max_clients = QSpinBox()
+        max_clients.setMaximumWidth(100)
+        max_clients.setMaximum(1000)
+        max_clients.setSpecialValueText("No limit")
+        max_clients.setValue(self.stream.tcp_settings.max_clients)
+        max_clients.setDisabled(client_mode.isChecked())
+        client_mode.toggled.connect(max_clients.setDisabled)
+
+        max_clients_layout = QHBoxLayout(max_clients_box)
+        max_clients_layout.addWidget(max_clients)
+        max_clients_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
         # Final Layout
 
         result_layout.addWidget(connection_mode_box)
         result_layout.addWidget(host_name_box)
         result_layout.addWidget(port_box)
+        result_layout.addWidget(max_clients_box)
         result_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         # SIGNALS
@@ -626,6 +648,7 @@ class ConfigureInterface(QDialog) :
         server_mode.clicked.connect(lambda : self.stream.tcp_settings.set_stream_mode(StreamMode.SERVER))
         host_name.editingFinished.connect(lambda : self.stream.tcp_settings.set_host(host_name.text()))
         port.editingFinished.connect(lambda : self.stream.tcp_settings.set_port(port.value()))
+        max_clients.editingFinished.connect(lambda : self.stream.tcp_settings.set_max_clients(max_clients.value()))
 
         return result
 
@@ -672,10 +695,28 @@ class ConfigureInterface(QDialog) :
         data_flow_list.setCurrentIndex(index)
         data_flow_box_layout.addWidget(data_flow_list)
 
+        # Mode Box
+        mode_box = QGroupBox("Mode (the host is the group in multicast)")
+
+        mode_list = QComboBox()
+        for mode in UdpSettings.UdpMode :
+            mode_list.addItem( mode.name , mode )
+        mode_list.setCurrentIndex(mode_list.findData(self.stream.udp_settings.mode))
+        multicast_ttl = QSpinBox()
+        multicast_ttl.setMaximumWidth(100)
+        multicast_ttl.setRange(1, 255)
+        multicast_ttl.setValue(self.stream.udp_settings.multicast_ttl)
+
+        mode_box_layout = QHBoxLayout(mode_box)
+        mode_box_layout.addWidget(mode_list)
+        mode_box_layout.addWidget(QLabel("TTL"))
+        mode_box_layout.addWidget(multicast_ttl)
+
         # Final Layout
         result_layout.addWidget(host_name_box)
         result_layout.addWidget(port_box)
         result_layout.addWidget(data_flow_box)
+        result_layout.addWidget(mode_box)
         result_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
 
         # SIGNALS
@@ -683,6 +724,245 @@ class ConfigureInterface(QDialog) :
         host_name.editingFinished.connect(lambda : self.stream.udp_settings.set_host(host_name.text()))
         port.editingFinished.connect(lambda : self.stream.udp_settings.set_port(int(port.text())))
         data_flow_list.currentIndexChanged.connect(lambda : self.stream.udp_settings.set_dataflow(data_flow_list.currentData()))
+        mode_list.currentIndexChanged.connect(lambda : self.stream.udp_settings.set_mode(mode_list.currentData()))
+        multicast_ttl.editingFinished.connect(lambda : self.stream.udp_settings.set_multicast(multicast_ttl.value(), self.stream.udp_settings.multicast_loopback, self.stream.udp_settings.interface))
+
+        return result
+
+    def file_menu(self):
+        """file replay configure tab
+        """
+        result = QWidget()
+        result_layout = QVBoxLayout(result)
+
+        # File box
+        file_box = QGroupBox("File to replay")
+
+        file_name = QLineEdit()
+        file_name.setText(self.stream.file_settings.file_name)
+        file_name.setReadOnly(True)
+        file_button = QPushButton("Browse")
+
+        file_layout = QVBoxLayout(file_box)
+        file_layout.addLayout(pair_h_widgets(file_name, file_button))
+
+        # Speed box
+        speed_box = QGroupBox("Replay speed (0 : as fast as possible)")
+
+        speed = QDoubleSpinBox()
+        speed.setMaximumWidth(100)
+        speed.setMaximum(1000)
+        speed.setValue(self.stream.file_settings.speed)
+        loop = QCheckBox("Restart at the end of the file")
+        loop.setChecked(self.stream.file_settings.loop)
+        start = QDoubleSpinBox()
+        start.setMaximumWidth(100)
+        start.setMaximum(10000000)
+        start.setSuffix(" s")
+        start.setToolTip("Time of the capture where the replay starts")
+        start.setValue(self.stream.file_settings.start)
+
+        speed_layout = QVBoxLayout(speed_box)
+        speed_layout.addWidget(speed)
+        speed_layout.addWidget(loop)
+        speed_layout.addWidget(QLabel("Start"))
+        speed_layout.addWidget(start)
+        speed_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # Final Layout
+        result_layout.addWidget(file_box)
+        result_layout.addWidget(speed_box)
+        result_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # SIGNALS
+        file_button.pressed.connect(lambda : self.select_replay_file(file_name))
+        speed.editingFinished.connect(lambda : self.stream.file_settings.set_speed(speed.value()))
+        loop.toggled.connect(lambda : self.stream.file_settings.set_loop(loop.isChecked()))
+        start.editingFinished.connect(lambda : self.stream.file_settings.set_start(start.value()))
+
+        return result
+
+    def caster_menu(self):
+        """embedded ntrip caster configure tab
+        """
+        result = QWidget()
+        result_layout = QVBoxLayout(result)
+
+        # Port Box
+        port_box = QGroupBox("Port number")
+
+        port = QSpinBox()
+        port.setMaximumWidth(100)
+        port.setMaximum(65535)
+        port.setValue(self.stream.caster_settings.port)
+
+        port_layout = QHBoxLayout(port_box)
+        port_layout.addWidget(port)
+        port_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # Mountpoints Box
+        mountpoints_box = QGroupBox("Mountpoints ([name]:[stream]:[format]:[latitude]:[longitude] , ...)")
+
+        mountpoints = QLineEdit()
+        mountpoints.setText(self.stream.caster_settings.mountpoints_to_string())
+
+        mountpoints_layout = QVBoxLayout(mountpoints_box)
+        mountpoints_layout.addWidget(mountpoints)
+        mountpoints_layout.addWidget(QLabel("The streams of the mountpoints have to be linked to this stream"))
+        mountpoints_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # Authentification Box
+        auth_box = QGroupBox("Authentification")
+        auth_box.setCheckable(True)
+        auth_box.setChecked(self.stream.caster_settings.auth)
+
+        auth_box_layout = QVBoxLayout(auth_box)
+        user = QLineEdit()
+        user.setText(self.stream.caster_settings.username)
+        user_label = QLabel("Username : ")
+        user_label.setBuddy(user)
+        auth_box_layout.addLayout(pair_h_widgets(user_label,user))
+
+        password = QLineEdit()
+        password.setText(self.stream.caster_settings.password)
+        password_label= QLabel("Password : ")
+        password_label.setBuddy(password)
+        auth_box_layout.addLayout(pair_h_widgets(password_label , password))
+
+        # Clients Box
+        max_clients_box = QGroupBox("Maximum number of clients per mountpoint")
+
+        max_clients = QSpinBox()
+        max_clients.setMaximumWidth(100)
+        max_clients.setMaximum(100000)
+        max_clients.setSpecialValueText("No limit")
+        max_clients.setValue(self.stream.caster_settings.max_clients)
+
+        max_clients_layout = QHBoxLayout(max_clients_box)
+        max_clients_layout.addWidget(max_clients)
+        max_clients_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # Final Layout
+        result_layout.addWidget(port_box)
+        result_layout.addWidget(mountpoints_box)
+        result_layout.addWidget(auth_box)
+        result_layout.addWidget(max_clients_box)
+        result_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # SIGNALS
+        port.editingFinished.connect(lambda : self.stream.caster_settings.set_port(port.value()))
+        mountpoints.editingFinished.connect(lambda : self.set_caster_mountpoints(mountpoints))
+        auth_box.toggled.connect(lambda : self.stream.caster_settings.set_auth(auth_box.isChecked()))
+        user.editingFinished.connect(lambda : self.stream.caster_settings.set_username(user.text()))
+        password.editingFinished.connect(lambda : self.stream.caster_settings.set_password(password.text()))
+        max_clients.editingFinished.connect(lambda : self.stream.caster_settings.set_max_clients(max_clients.value()))
+
+        return result
+
+    def set_caster_mountpoints(self, mountpoints_edit : QLineEdit):
+        """set the mountpoints of the caster , an incorrect value is replaced by the current mountpoints
+        """
+        try :
+            self.stream.caster_settings.set_mountpoints(mountpoints_edit.text())
+        except CasterSettingsException :
+            mountpoints_edit.setText(self.stream.caster_settings.mountpoints_to_string())
+
+    def ntrip_server_menu(self):
+        """ntrip server (upload to a caster) configure tab
+        """
+        settings = self.stream.ntrip_server.ntrip_settings
+        result = QWidget()
+        result_layout = QVBoxLayout(result)
+
+        # Caster Box
+        caster_box = QGroupBox("Ntrip Caster")
+        caster_layout = QVBoxLayout(caster_box)
+
+        host_name = QLineEdit()
+        host_name.setText(settings.host)
+        host_name_label = QLabel("Host : ")
+        host_name_label.setBuddy(host_name)
+        caster_layout.addLayout(pair_h_widgets(host_name_label, host_name))
+
+        port = QSpinBox()
+        port.setMaximumWidth(100)
+        port.setMaximum(65535)
+        port.setValue(settings.port)
+        port_label = QLabel("Port : ")
+        port_label.setBuddy(port)
+        caster_layout.addLayout(pair_h_widgets(port_label, port))
+
+        version = QComboBox()
+        version.addItem("NTRIP 2.0", 2)
+        version.addItem("NTRIP 1.0", 1)
+        version.setCurrentIndex(version.findData(settings.ntrip_version))
+        version_label = QLabel("Version : ")
+        version_label.setBuddy(version)
+        caster_layout.addLayout(pair_h_widgets(version_label, version))
+
+        # MountPoint Box
+        mountpoint_box = QGroupBox("Mountpoint")
+        mountpoint = QLineEdit()
+        mountpoint.setText(settings.mountpoint)
+        mountpoint_layout = QVBoxLayout(mountpoint_box)
+        mountpoint_layout.addWidget(mountpoint)
+        mountpoint_layout.addWidget(QLabel("The data of the linked streams is uploaded"))
+        mountpoint_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # TLS
+        tls_box = QGroupBox("TLS")
+        tls_box.setCheckable(True)
+        tls_box.setChecked(settings.tls)
+        tls_box_layout = QVBoxLayout(tls_box)
+        tls_box_layout.addWidget(QLabel("Use a secured connection with the caster"))
+
+        # Authentification Box
+        auth_box = QGroupBox("Authentification")
+        auth_box.setCheckable(True)
+        auth_box.setChecked(settings.auth)
+
+        auth_box_layout = QVBoxLayout(auth_box)
+        user = QLineEdit()
+        user.setText(settings.username)
+        user_label = QLabel("User : ")
+        user_label.setBuddy(user)
+        auth_box_layout.addLayout(pair_h_widgets(user_label,user))
+
+        password = QLineEdit()
+        password.setText(settings.password)
+        password_label= QLabel("Password : ")
+        password_label.setBuddy(password)
+        auth_box_layout.addLayout(pair_h_widgets(password_label , password))
+
+        # Keepalive Box
+        keepalive_box = QGroupBox("Keepalive (seconds)")
+        keepalive = QSpinBox()
+        keepalive.setMaximumWidth(100)
+        keepalive.setMaximum(3600)
+        keepalive.setSpecialValueText("Disabled")
+        keepalive.setValue(settings.keepalive)
+        keepalive_layout = QHBoxLayout(keepalive_box)
+        keepalive_layout.addWidget(keepalive)
+        keepalive_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # Final Layout
+        result_layout.addWidget(caster_box)
+        result_layout.addWidget(mountpoint_box)
+        result_layout.addWidget(tls_box)
+        result_layout.addWidget(auth_box)
+        result_layout.addWidget(keepalive_box)
+        result_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+
+        # SIGNALS
+        host_name.editingFinished.connect(lambda : settings.set_host(host_name.text()))
+        port.editingFinished.connect(lambda : settings.set_port(port.value()))
+        version.currentIndexChanged.connect(lambda : settings.set_ntrip_version(version.currentData()))
+        mountpoint.editingFinished.connect(lambda : settings.set_mountpoint(mountpoint.text()))
+        tls_box.toggled.connect(lambda : settings.set_tls(tls_box.isChecked()))
+        auth_box.toggled.connect(lambda : settings.set_auth(auth_box.isChecked()))
+        user.editingFinished.connect(lambda : settings.set_username(user.text()))
+        password.editingFinished.connect(lambda : settings.set_password(password.text()))
+        keepalive.editingFinished.connect(lambda : settings.set_keepalive(keepalive.value()))
 
         return result
 
@@ -953,6 +1233,17 @@ class ConfigureInterface(QDialog) :
         else :
             logedit.setDisabled(True)
 
+    def select_replay_file(self , file_edit : QLineEdit):
+        """open the dialog to get the path to the file to replay
+        """
+        file_name = QFileDialog.getOpenFileName(self,"Select file to replay")
+        if file_name[0] != '' :
+            try :
+                self.stream.file_settings.set_file_name(file_name[0])
+                file_edit.setText(file_name[0])
+            except FileSettingsException :
+                pass
+
     def select_cert_file(self):
         """open a dialog to get the path to the certification file
         """
@@ -980,6 +1271,7 @@ class ShowDataInterface(QDialog):
         self.freeze = False
         self.stream.show_incoming_data.set()
         self.stream.show_outgoing_data.set()
+        self.show_sequence : int = self.stream.data_to_show.get_sequence()
 
         self.send_command_edit = QLineEdit()
         self.send_command_edit.returnPressed.connect(lambda  : self.send_command(self.send_command_edit.text()))
@@ -996,10 +1288,12 @@ class ShowDataInterface(QDialog):
         configure_layout.addLayout(self.bottom_button())
 
     def timerEvent(self, event):
-        if self.stream.data_to_show.empty() is False :
-            value = self.stream.data_to_show.get()
+        if self.stream.data_to_show.empty(self.show_sequence) is False :
+            data , self.show_sequence , lost = self.stream.data_to_show.read(self.show_sequence)
             if not self.freeze :
-                self.show_data_output.insertPlainText( value )
+                if lost != 0 :
+                    self.show_data_output.insertPlainText(f"\n[{lost} bytes not shown]\n")
+                self.show_data_output.insertPlainText( data.decode(encoding='ISO-8859-1') )
                 self.show_data_output.moveCursor(QTextCursor.End)
                 self.show_data_output.horizontalScrollBar().setValue(self.show_data_output.horizontalScrollBar().minimum())
 
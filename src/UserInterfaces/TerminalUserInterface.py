@@ -31,6 +31,7 @@
 import threading
 import socket
 import sys
+import time
 
 from src.StreamSettings.SerialSettings import BaudRate , Parity ,ByteSize , StopBits
 from src.StreamSettings.TcpSettings import StreamMode
@@ -81,9 +82,15 @@ class TerminalUserInterface :
         self.stop_show_data_event = threading.Event()
 
     def _show_data_task(self, selected_port : Stream):
+        sequence = selected_port.data_to_show.get_sequence()
         while self.stop_show_data_event.is_set() is False:
-            if selected_port.data_to_show.empty() is False :
-                print(selected_port.data_to_show.get())
+            if selected_port.data_to_show.empty(sequence) is False :
+                data , sequence , lost = selected_port.data_to_show.read(sequence)
+                if lost != 0 :
+                    print(f"\n[{lost} bytes not shown]")
+                print(data.decode(encoding='ISO-8859-1'), end="")
+            else :
+                time.sleep(0.05)
         return 0
 
 
@@ -50,6 +50,7 @@ DATAPATH = os.path.join(os.path.expanduser("~") , ".septentrio") # Path to the P
 CONFIGPATH = os.path.join(DATAPATH , "confs" )   # Path to the Configuration folder
 LOGFILESPATH =  os.path.join(DATAPATH ,"logs")   # Path to the Logs folder
 DEFAULTCONFIGFILE = os.path.join(CONFIGPATH ,"pydatalink.conf")  # Path to the default configuration file
+SOURCETABLESPATH = os.path.join(DATAPATH , "sourcetables")   # Path to the NTRIP source table cache folder
 
 # Check if folder exist else create them 
 if os.path.exists(DATAPATH) is not True :
@@ -58,6 +59,8 @@ if os.path.exists( CONFIGPATH ) is not True:
     os.mkdir(CONFIGPATH )
 if os.path.exists( LOGFILESPATH ) is not True:
     os.mkdir(LOGFILESPATH )
+if os.path.exists( SOURCETABLESPATH ) is not True:
+    os.mkdir(SOURCETABLESPATH )
     
 # Create logging file for the app
 now = datetime.datetime.now()